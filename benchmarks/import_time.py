@@ -0,0 +1,84 @@
+"""
+Import time check of the extension module.
+
+KNIME imports ``cvp_app_knime_bim`` (and with it every node module) whenever
+it registers the extension, e.g. at startup and when the node repository is
+shown. The work of the nodes is only needed once they execute, so registering
+must not load IfcOpenShell, OpenCascade, NumPy, pandas, PyArrow or a process
+pool. Every run imports the module in a fresh process, after ``knime_extension``
+(and what it loads itself) has been imported, and fails when the import takes
+longer than ``--budget-ms`` or loads one of those modules.
+
+Usage::
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module ifc_core.options --budget-ms 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, "..", "knime_extension", "src")
+
+# Top-level packages that must only be imported once a node executes
+HEAVY_MODULES = ("ifcopenshell", "OCC", "numpy", "pandas", "pyarrow", "multiprocessing")
+
+_PROBE = """
+import json, sys, time
+if {baseline!r}:
+    __import__({baseline!r})
+baseline = set(sys.modules)
+start = time.perf_counter()
+__import__({module!r})
+seconds = time.perf_counter() - start
+loaded = sorted({{name.split(".")[0] for name in set(sys.modules) - baseline}})
+print(json.dumps({{"seconds": seconds, "loaded": loaded}}))
+"""
+
+
+def probe(module: str, baseline: str) -> dict:
+    """
+    Seconds to import ``module`` in a fresh process after ``baseline``, and the top-level
+    packages it loaded that ``baseline`` had not.
+    """
+    code = _PROBE.format(module=module, baseline=baseline)
+    output = subprocess.run([sys.executable, "-c", code], cwd=SRC, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks the import time of the KNIME extension module.")
+    parser.add_argument("--module", default="cvp_app_knime_bim", help="module to import")
+    parser.add_argument("--baseline", default="knime_extension",
+                        help="module imported first and not counted (empty for none)")
+    parser.add_argument("--budget-ms", type=float, default=200.0, help="maximum import time")
+    parser.add_argument("--repeat", type=int, default=5, help="runs; the fastest one is kept")
+    args = parser.parse_args()
+
+    try:
+        runs = [probe(args.module, args.baseline) for _ in range(max(1, args.repeat))]
+    except subprocess.CalledProcessError as e:
+        print(e.stderr, file=sys.stderr)
+        sys.exit(2)
+    best = min(runs, key=lambda run: run["seconds"])
+    heavy = sorted(set(HEAVY_MODULES).intersection(best["loaded"]))
+
+    milliseconds = best["seconds"] * 1000
+    print(f"import {args.module}: {milliseconds:.1f} ms (budget {args.budget_ms:.0f} ms), "
+          f"{len(best['loaded'])} new top-level modules")
+    failed = False
+    if milliseconds > args.budget_ms:
+        print(f"OVER BUDGET {args.module}: {milliseconds:.1f} ms > {args.budget_ms:.0f} ms")
+        failed = True
+    if heavy:
+        print(f"HEAVY IMPORT {args.module}: {', '.join(heavy)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
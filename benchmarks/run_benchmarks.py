@@ -0,0 +1,189 @@
+"""
+Benchmarks of the node logic, without a KNIME runtime.
+
+Synthetic models of every requested size (see ``synthetic.py``) are generated
+once, then every case runs ``--repeat`` times, each time in a fresh process so
+that caches are cold and the peak memory belongs to the case. Wall time and
+peak resident memory are printed, optionally written as JSON, and compared to a
+previous JSON run to flag regressions.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py --sizes small medium --output results.json
+    python benchmarks/run_benchmarks.py --sizes medium --compare results.json
+"""
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "knime_extension", "src"))
+sys.path.insert(0, HERE)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Imported up front, so that import time is not part of the measurements
+from ifc_core import building, model_cache, reader
+from ifc_core.bounds import element_bounds
+from ifc_core.connectivity import room_connectivity
+from ifc_core.geometry_cache import GeometryCache
+from ifc_core.offsets import offset_points
+from ifc_core.room_points import RoomPointOptions, extract_room_points
+from ifc_core.rooms import map_elements_to_rooms
+from synthetic import SIZES, write
+
+
+# Cases: the core routine behind each node, given the model path
+
+def reader_case(path):
+    return reader.read_model(path, use_cache=False).num_rows
+
+
+def building_info_case(path):
+    return len(building.read_building(path, use_cache=False, fast_scan=False))
+
+
+def building_info_scan_case(path):
+    return len(building.read_building(path, use_cache=False, fast_scan=True))
+
+
+def _centroids(path, fast):
+    model = model_cache.open_model(path, False)
+    return len(element_bounds(path, model, GeometryCache(enabled=False), fast=fast).ids)
+
+
+def centroids_case(path):
+    return _centroids(path, fast=False)
+
+
+def centroids_fast_case(path):
+    return _centroids(path, fast=True)
+
+
+def room_mapping_case(path):
+    return len(map_elements_to_rooms(path, path, GeometryCache(enabled=False), use_cache=False))
+
+
+def room_points_case(path):
+    results = extract_room_points(path, RoomPointOptions(spacing=0.5, min_offset=0.1), use_cache=False)
+    return sum(len(result.points) for result in results)
+
+
+def door_offsets_case(path):
+    model = model_cache.open_model(path, False)
+    return len(offset_points(path, model, geometry_cache=GeometryCache(enabled=False)).guids)
+
+
+def room_connectivity_case(path):
+    model = model_cache.open_model(path, False)
+    return len(room_connectivity(path, model, GeometryCache(enabled=False)))
+
+
+CASES = {
+    "IFC Reader": reader_case,
+    "IFC Building Info": building_info_case,
+    "IFC Building Info (scan)": building_info_scan_case,
+    "IFC Element Centroids": centroids_case,
+    "IFC Element Centroids (fast)": centroids_fast_case,
+    "IFC Intersection": room_mapping_case,
+    "IFC Room Points": room_points_case,
+    "IFC Door Offset XYZ": door_offsets_case,
+    "IFC Room Connectivity": room_connectivity_case,
+}
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run(name: str, path: str) -> dict:
+    """
+    Runs one case in the current (fresh) process.
+    """
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    items = CASES[name](path)
+    seconds = time.perf_counter() - start
+    peak = _peak_rss_mb()
+    return {
+        "seconds": seconds,
+        "peak_mb": peak,
+        "delta_mb": peak - baseline if peak is not None else None,
+        "items": items,
+    }
+
+
+def run_case(name: str, path: str) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as pool:
+        return pool.submit(_run, name, path).result()
+
+
+def _key(result: dict) -> tuple:
+    return result["size"], result["case"]
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> list:
+    """
+    Cases slower than ``threshold`` (a fraction) compared to the baseline run.
+    """
+    with open(baseline_path) as f:
+        baseline = {_key(r): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        before = baseline.get(_key(result))
+        if before and result["seconds"] > before["seconds"] * (1 + threshold):
+            regressions.append((result, before))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the IFC node logic on synthetic models.")
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=sorted(SIZES))
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES), metavar="CASE")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest one is kept")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown reported as regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="cvp_bim_bench_") as directory:
+        for size in args.sizes:
+            path = write(os.path.join(directory, f"{size}.ifc"), **SIZES[size])
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            print(f"\n{size}: {SIZES[size]} ({size_mb:.1f} MB)")
+            for name in args.cases:
+                runs = [run_case(name, path) for _ in range(max(1, args.repeat))]
+                best = min(runs, key=lambda run: run["seconds"])
+                results.append({"size": size, "case": name, "file_mb": size_mb, **best})
+                peak = f"{best['peak_mb']:8.1f} MB (+{best['delta_mb']:.1f})" if best["peak_mb"] is not None else "n/a"
+                print(f"  {name:<30} {best['seconds']:8.3f} s {peak}  ({best['items']} items)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(), "results": results}, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for result, before in regressions:
+            print(f"REGRESSION {result['size']} {result['case']}: {before['seconds']:.3f} s -> {result['seconds']:.3f} s")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Scalable synthetic IFC4 models for the benchmarks.
+
+Every storey holds a grid of rectangular IfcSpaces, walls along the grid lines
+and doors between neighbouring spaces, like a simple office floor. Elements
+carry property sets, a material layer set (through their type), a Uniclass
+reference and placements nested site > building > storey > element. Half of the
+doors have an IfcBoundingBox representation, the other half only a Body, so
+both code paths of the door nodes are exercised. Lengths are in millimeters.
+
+Usage::
+
+    python benchmarks/synthetic.py model.ifc --storeys 4 --spaces 20 --walls 60 --doors 20
+"""
+import argparse
+import math
+import random
+
+import ifcopenshell
+import ifcopenshell.api.aggregate
+import ifcopenshell.api.classification
+import ifcopenshell.api.context
+import ifcopenshell.api.material
+import ifcopenshell.api.root
+import ifcopenshell.api.spatial
+import ifcopenshell.api.type
+import ifcopenshell.api.unit
+import ifcopenshell.guid
+
+# Per storey counts of the predefined sizes
+SIZES = {
+    "small": dict(storeys=2, spaces=4, walls=12, doors=4),
+    "medium": dict(storeys=4, spaces=25, walls=80, doors=25),
+    "large": dict(storeys=8, spaces=100, walls=300, doors=100),
+}
+
+SPACE_X, SPACE_Y = 5000.0, 4000.0  # [mm]
+STOREY_HEIGHT, ROOM_HEIGHT = 3000.0, 2800.0  # [mm]
+WALL_THICKNESS = 200.0  # [mm]
+DOOR_WIDTH, DOOR_DEPTH, DOOR_HEIGHT = 900.0, 100.0, 2100.0  # [mm]
+
+
+class _Builder:
+    """
+    Low-level entity creation for the bulk of the model; the API is only used for its skeleton.
+    """
+
+    def __init__(self, model, body, box):
+        self.model = model
+        self.body = body
+        self.box = box
+
+    def point(self, *coordinates):
+        return self.model.createIfcCartesianPoint([float(c) for c in coordinates])
+
+    def axis(self, location, rotation=0.0):
+        direction = self.model.createIfcDirection([math.cos(rotation), math.sin(rotation), 0.0])
+        return self.model.createIfcAxis2Placement3D(self.point(*location), None, direction)
+
+    def placement(self, relative_to, location, rotation=0.0):
+        return self.model.createIfcLocalPlacement(relative_to, self.axis(location, rotation))
+
+    def extrusion(self, x, y, z):
+        """
+        Body of an ``x`` by ``y`` by ``z`` box starting at the object origin.
+        """
+        profile = self.model.createIfcRectangleProfileDef(
+            "AREA", None, self.model.createIfcAxis2Placement2D(self.model.createIfcCartesianPoint([x / 2, y / 2])), x, y
+        )
+        solid = self.model.createIfcExtrudedAreaSolid(
+            profile, self.axis((0, 0, 0)), self.model.createIfcDirection([0.0, 0.0, 1.0]), z
+        )
+        return self.model.createIfcShapeRepresentation(self.body, "Body", "SweptSolid", [solid])
+
+    def bounding_box(self, x, y, z):
+        box = self.model.createIfcBoundingBox(self.point(0, 0, 0), x, y, z)
+        return self.model.createIfcShapeRepresentation(self.box, "Box", "BoundingBox", [box])
+
+    def product(self, ifc_class, name, placement, representations, **attributes):
+        return self.model.create_entity(
+            ifc_class,
+            GlobalId=ifcopenshell.guid.new(),
+            Name=name,
+            ObjectPlacement=placement,
+            Representation=self.model.createIfcProductDefinitionShape(None, None, representations),
+            **attributes,
+        )
+
+    def pset(self, products, name, properties: dict):
+        values = []
+        for key, value in properties.items():
+            if isinstance(value, bool):
+                nominal = self.model.createIfcBoolean(value)
+            elif isinstance(value, float):
+                nominal = self.model.createIfcReal(value)
+            else:
+                nominal = self.model.createIfcLabel(str(value))
+            values.append(self.model.createIfcPropertySingleValue(key, None, nominal, None))
+        pset = self.model.createIfcPropertySet(ifcopenshell.guid.new(), None, name, None, values)
+        self.model.createIfcRelDefinesByProperties(ifcopenshell.guid.new(), None, None, None, products, pset)
+
+
+def generate(storeys: int = 2, spaces: int = 4, walls: int = 12, doors: int = 4, seed: int = 0) -> ifcopenshell.file:
+    """
+    Builds a model with ``storeys`` storeys of ``spaces`` spaces, ``walls`` walls and ``doors`` doors each.
+    """
+    rng = random.Random(seed)
+    model = ifcopenshell.file(schema="IFC4")
+    project = ifcopenshell.api.root.create_entity(model, ifc_class="IfcProject", name="Synthetic Project")
+    ifcopenshell.api.unit.assign_unit(model, length={"is_metric": True, "raw": "MILLIMETERS"})
+    context = ifcopenshell.api.context.add_context(model, context_type="Model")
+    body = ifcopenshell.api.context.add_context(
+        model, context_type="Model", context_identifier="Body", target_view="MODEL_VIEW", parent=context
+    )
+    box = ifcopenshell.api.context.add_context(
+        model, context_type="Model", context_identifier="Box", target_view="MODEL_VIEW", parent=context
+    )
+    builder = _Builder(model, body, box)
+
+    site = ifcopenshell.api.root.create_entity(model, ifc_class="IfcSite", name="Site")
+    building = ifcopenshell.api.root.create_entity(model, ifc_class="IfcBuilding", name="Building")
+    ifcopenshell.api.aggregate.assign_object(model, products=[site], relating_object=project)
+    ifcopenshell.api.aggregate.assign_object(model, products=[building], relating_object=site)
+    site.ObjectPlacement = builder.placement(None, (0, 0, 0))
+    building.ObjectPlacement = builder.placement(site.ObjectPlacement, (10000, 5000, 0), rotation=0.1)
+    builder.pset([building], "CVP_BuildingData", {"NumberOfStoreys": float(storeys), "Reference": "SYN-01", "IsLandmarked": False})
+
+    wall_type = ifcopenshell.api.root.create_entity(model, ifc_class="IfcWallType", name="Basic Wall:Generic 200")
+    layers = ifcopenshell.api.material.add_material_set(model, name="Generic 200", set_type="IfcMaterialLayerSet")
+    for material, thickness in (("Plaster", 15.0), ("Brick", 170.0), ("Plaster", 15.0)):
+        layer = ifcopenshell.api.material.add_layer(
+            model, layer_set=layers, material=ifcopenshell.api.material.add_material(model, name=material)
+        )
+        layer.LayerThickness = thickness
+    ifcopenshell.api.material.assign_material(model, products=[wall_type], material=layers)
+    door_type = ifcopenshell.api.root.create_entity(model, ifc_class="IfcDoorType", name="Single Flush:900x2100")
+    uniclass = ifcopenshell.api.classification.add_classification(model, classification="Uniclass")
+
+    columns = max(1, math.ceil(math.sqrt(spaces)))
+    for s in range(storeys):
+        storey = ifcopenshell.api.root.create_entity(model, ifc_class="IfcBuildingStorey", name=f"Level {s}")
+        storey.Elevation = s * STOREY_HEIGHT
+        ifcopenshell.api.aggregate.assign_object(model, products=[storey], relating_object=building)
+        storey.ObjectPlacement = builder.placement(building.ObjectPlacement, (0, 0, s * STOREY_HEIGHT))
+
+        cells = [(i % columns, i // columns) for i in range(spaces)]
+        storey_spaces = []
+        for n, (cx, cy) in enumerate(cells):
+            space = builder.product(
+                "IfcSpace", f"{s}.{n:02d}", builder.placement(storey.ObjectPlacement, (cx * SPACE_X, cy * SPACE_Y, 0)),
+                [builder.extrusion(SPACE_X, SPACE_Y, ROOM_HEIGHT)], LongName=f"Room {s}.{n:02d}",
+            )
+            storey_spaces.append(space)
+        if storey_spaces:
+            ifcopenshell.api.aggregate.assign_object(model, products=storey_spaces, relating_object=storey)
+
+        storey_walls = []
+        for w in range(walls):
+            cx, cy = rng.choice(cells) if cells else (0, 0)
+            vertical = rng.random() < 0.5
+            length = SPACE_Y if vertical else SPACE_X
+            wall = builder.product(
+                "IfcWall", f"Basic Wall:Generic 200:{s}{w:04d}",
+                builder.placement(storey.ObjectPlacement, (cx * SPACE_X, cy * SPACE_Y, 0), math.pi / 2 if vertical else 0.0),
+                [builder.extrusion(length, WALL_THICKNESS, ROOM_HEIGHT)],
+            )
+            builder.pset([wall], "Pset_WallCommon", {
+                "IsExternal": cy == 0, "LoadBearing": w % 3 == 0, "FireRating": rng.choice(["REI30", "REI60", "REI90"]),
+                "ThermalTransmittance": round(rng.uniform(0.2, 1.5), 3),
+            })
+            storey_walls.append(wall)
+
+        # Doors in the wall between two neighbouring spaces of a row; local Y crosses the wall
+        pairs = [(a, b) for a, (ax, ay) in enumerate(cells) for b, (bx, by) in enumerate(cells) if bx == ax + 1 and by == ay]
+        storey_doors = []
+        for d in range(doors if pairs else 0):
+            a, b = pairs[d % len(pairs)]
+            bx, by = cells[b]
+            placement = builder.placement(
+                storey.ObjectPlacement, (bx * SPACE_X + DOOR_DEPTH / 2, by * SPACE_Y + rng.uniform(500, SPACE_Y - 1500), 0),
+                math.pi / 2,
+            )
+            representations = [builder.extrusion(DOOR_WIDTH, DOOR_DEPTH, DOOR_HEIGHT)]
+            if d % 2 == 0:
+                representations.append(builder.bounding_box(DOOR_WIDTH, DOOR_DEPTH, DOOR_HEIGHT))
+            door = builder.product("IfcDoor", f"Single Flush:900x2100:{s}{d:04d}", placement, representations)
+            builder.pset([door], "Pset_DoorCommon", {"FireRating": rng.choice(["EI30", "EI60"]), "IsExternal": False})
+            storey_doors.append(door)
+
+        contained = storey_walls + storey_doors
+        if contained:
+            ifcopenshell.api.spatial.assign_container(model, products=contained, relating_structure=storey)
+        if storey_walls:
+            ifcopenshell.api.type.assign_type(model, related_objects=storey_walls, relating_type=wall_type)
+            ifcopenshell.api.classification.add_reference(
+                model, products=storey_walls, identification="Ss_25_10", name="Walls", classification=uniclass
+            )
+        if storey_doors:
+            ifcopenshell.api.type.assign_type(model, related_objects=storey_doors, relating_type=door_type)
+            ifcopenshell.api.classification.add_reference(
+                model, products=storey_doors, identification="Pr_30_59_24", name="Doors", classification=uniclass
+            )
+    return model
+
+
+def write(path: str, **sizes) -> str:
+    generate(**sizes).write(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path")
+    parser.add_argument("--size", choices=sorted(SIZES), help="predefined size; overrides the counts below")
+    parser.add_argument("--storeys", type=int, default=2)
+    parser.add_argument("--spaces", type=int, default=4, help="spaces per storey")
+    parser.add_argument("--walls", type=int, default=12, help="walls per storey")
+    parser.add_argument("--doors", type=int, default=4, help="doors per storey")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sizes = SIZES[args.size] if args.size else dict(storeys=args.storeys, spaces=args.spaces, walls=args.walls, doors=args.doors)
+    write(args.path, seed=args.seed, **sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,4 +20,5 @@ import nodes.ifc_reader
 import nodes.ifc_intersection
 import nodes.ifc_extract_centroids 
 import nodes.ifc_extract_room_points
-import nodes.ifc_door_offset_points
\ No newline at end of file
+import nodes.ifc_door_offset_points
+import nodes.ifc_room_connectivity
\ No newline at end of file
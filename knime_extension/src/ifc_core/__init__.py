@@ -0,0 +1,6 @@
+"""
+Pure-Python IFC extraction core shared by the KNIME BIM nodes.
+
+Nothing in this package may import ``knime_extension``: the modules are
+imported by worker processes that run outside of the KNIME node context.
+"""
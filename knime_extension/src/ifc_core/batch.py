@@ -0,0 +1,281 @@
+"""
+Headless batch runner of the extractions, started with ``python -m ifc_core``.
+
+A manifest lists the models. Every model (or rooms/elements pair of the
+intersection) is one task of a local process pool (see ``parallel``), and the
+tables of all models are written as one Parquet file per output, each row with
+the ``ModelPath`` it comes from. A failing model is reported and skipped, and
+the exit status is 1 if any model failed.
+
+Usage::
+
+    python -m ifc_core centroids models.txt --output results --workers 8 --fast
+    python -m ifc_core intersection models.txt --rooms rooms.ifc --output results
+"""
+import argparse
+import csv
+import functools
+import os
+import sys
+import time
+from typing import List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from . import building, model_cache, parallel, reader
+from .columns import concat_tables, constant_column
+from .geometry_cache import DEFAULT_MAX_SIZE_MB, GeometryCache
+from .options import (DEFAULT_CLASSES, DEFAULT_DISTANCE, ENGINE_MESH, ENGINE_OCC, GEOMETRY, TOPOLOGY_FIRST,
+                      split_names)
+from .revisions import RevisionStore
+from .room_points import RoomPointOptions
+from .rooms import path_pairs
+from .tables import (building_table, centroid_table, connectivity_table, door_offset_table,
+                     incremental_centroid_table, room_mapping_table, room_point_tables)
+
+PATH_COLUMNS = ("Path", "RoomsPath", "ElementsPath")
+
+REVISIONS_HELP = ("directory keeping the output of every model: only the elements changed since the previous run "
+                  "are extracted again, and a ChangeFlag column is added")
+
+
+def read_manifest(path: str) -> List[dict]:
+    """
+    Rows of a manifest: a ``.csv`` file with a header row, or a text file with one model path
+    per line (read as the ``Path`` column; blank lines and ``#`` comments are skipped).
+    Relative paths are resolved against the directory of the manifest.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            lines = (line.strip() for line in f)
+            rows = [{"Path": line} for line in lines if line and not line.startswith("#")]
+
+    base = os.path.dirname(os.path.abspath(path))
+    for row in rows:
+        for column in PATH_COLUMNS:
+            if row.get(column):
+                row[column] = os.path.join(base, os.path.expanduser(row[column]))
+    return rows
+
+
+def _column(rows: List[dict], column: str) -> list:
+    values = [row.get(column) for row in rows]
+    if not values or not all(values):
+        raise ValueError(f"Every manifest row needs a '{column}' value.")
+    return values
+
+
+def _arrow(df: pd.DataFrame, path: str = None) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if path is not None:
+        table = table.append_column("ModelPath", constant_column(path, table.num_rows))
+    return table
+
+
+# Tasks: one model (or model pair) in, output name -> Arrow table out
+
+def _reader(path, use_cache, options, revisions):
+    return {"reader": reader.read_model(path, options, use_cache, revisions=revisions)}
+
+
+def _building(path, use_cache, fast_scan, header):
+    row = building.read_building(path, use_cache, fast_scan, header)
+    return {"building": _arrow(building_table([row]), path)}
+
+
+def _centroids(path, use_cache, geometry_cache, include, exclude, threads, fast, revisions):
+    if revisions is not None:
+        table = incremental_centroid_table(path, lambda: model_cache.open_model(path, use_cache), geometry_cache,
+                                           revisions, include, exclude, threads, fast)
+        return {"centroids": _arrow(table, path)}
+    model = model_cache.open_model(path, use_cache)
+    return {"centroids": _arrow(centroid_table(path, model, geometry_cache, include, exclude, threads, fast), path)}
+
+
+def _door_offsets(path, use_cache, geometry_cache, classes, distance, threads):
+    model = model_cache.open_model(path, use_cache)
+    return {"door-offsets": _arrow(door_offset_table(path, model, classes, distance, geometry_cache, threads), path)}
+
+
+def _connectivity(path, use_cache, geometry_cache, classes, distance, threads):
+    model = model_cache.open_model(path, use_cache)
+    return {"connectivity": _arrow(connectivity_table(path, model, geometry_cache, classes, distance, threads), path)}
+
+
+def _room_points(path, use_cache, geometry_cache, options):
+    points, summary = room_point_tables(path, options, use_cache=use_cache, geometry_cache=geometry_cache)
+    return {"room-points": _arrow(points, path), "room-points-summary": _arrow(summary, path)}
+
+
+def _intersection(pair, use_cache, geometry_cache, threads, method):
+    rooms_path, elements_path = pair
+    return {"intersection": _arrow(room_mapping_table(rooms_path, elements_path, geometry_cache, use_cache, threads, method))}
+
+
+def _task(args) -> functools.partial:
+    """
+    The task function of the selected extraction, bound to its options.
+    """
+    use_cache = args.model_cache_mb > 0
+    geometry_cache = GeometryCache(args.geometry_cache, args.geometry_cache_mb, not args.no_geometry_cache)
+    revisions = RevisionStore(args.revisions) if getattr(args, "revisions", None) else None
+    if args.extraction == "reader":
+        options = reader.ReaderOptions(
+            include_classes=split_names(args.include),
+            exclude_classes=split_names(args.exclude),
+            psets=split_names(args.psets),
+            classifications=not args.no_classifications,
+            materials=not args.no_materials,
+            placement=not args.no_placement,
+        )
+        return functools.partial(_reader, use_cache=use_cache, options=options, revisions=revisions)
+    if args.extraction == "building":
+        return functools.partial(_building, use_cache=use_cache, fast_scan=not args.full_parse, header=args.header)
+    if args.extraction == "centroids":
+        return functools.partial(
+            _centroids, use_cache=use_cache, geometry_cache=geometry_cache, include=split_names(args.include),
+            exclude=split_names(args.exclude), threads=args.threads, fast=args.fast, revisions=revisions,
+        )
+    if args.extraction in ("door-offsets", "connectivity"):
+        classes = split_names(args.classes)
+        if not classes:
+            raise ValueError("At least one IFC class is required.")
+        func = _door_offsets if args.extraction == "door-offsets" else _connectivity
+        return functools.partial(
+            func, use_cache=use_cache, geometry_cache=geometry_cache, classes=classes,
+            distance=args.distance, threads=args.threads,
+        )
+    if args.extraction == "room-points":
+        options = RoomPointOptions(
+            spacing=args.spacing / 1000.0, min_offset=args.min_offset / 1000.0,
+            engine=args.engine, adaptive=not args.no_adaptive,
+        )
+        return functools.partial(_room_points, use_cache=use_cache, geometry_cache=geometry_cache, options=options)
+    return functools.partial(
+        _intersection, use_cache=use_cache, geometry_cache=geometry_cache, threads=args.threads, method=args.method,
+    )
+
+
+def _items(args, rows: List[dict]) -> list:
+    if args.extraction != "intersection":
+        return list(dict.fromkeys(_column(rows, "Path")))
+    if args.rooms:
+        return path_pairs([os.path.abspath(args.rooms)], _column(rows, "Path"))
+    return path_pairs(_column(rows, "RoomsPath"), _column(rows, "ElementsPath"))
+
+
+def write_outputs(results: List[parallel.TaskResult], directory: str) -> dict:
+    """
+    Writes the tables of the successful tasks as ``<directory>/<output>.parquet`` and
+    returns output name -> (path, rows).
+    """
+    parts = {}
+    for result in results:
+        if result.ok:
+            for name, table in result.value.items():
+                parts.setdefault(name, []).append(table)
+
+    os.makedirs(directory, exist_ok=True)
+    written = {}
+    for name, tables in parts.items():
+        table = concat_tables(tables)
+        path = os.path.join(directory, f"{name}.parquet")
+        pq.write_table(table, path)
+        written[name] = (path, table.num_rows)
+    return written
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("manifest", help="text file with one IFC path per line, or CSV file with a Path column")
+    common.add_argument("-o", "--output", required=True, help="directory of the Parquet outputs")
+    common.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes handling models at the same time (default: all processors)")
+    common.add_argument("--memory-limit-mb", type=int, default=0, help="memory limit of each worker (0 = unlimited)")
+    common.add_argument("--model-cache-mb", type=int, default=model_cache.DEFAULT_BUDGET_MB,
+                        help="budget of the parsed models kept by each worker (0 disables the model cache)")
+    common.add_argument("--geometry-cache", default="", help="geometry cache directory (default: system temporary directory)")
+    common.add_argument("--geometry-cache-mb", type=int, default=DEFAULT_MAX_SIZE_MB, help="geometry cache size limit")
+    common.add_argument("--no-geometry-cache", action="store_true", help="tessellate without the geometry cache")
+
+    parser = argparse.ArgumentParser(prog="python -m ifc_core", description="Runs an IFC extraction on many models.")
+    extractions = parser.add_subparsers(dest="extraction", required=True, metavar="EXTRACTION")
+
+    sub = extractions.add_parser("reader", parents=[common], help="element properties, as the IFC Reader node")
+    sub.add_argument("--include", default="", help="comma-separated IFC classes to read")
+    sub.add_argument("--exclude", default="", help="comma-separated IFC classes to skip")
+    sub.add_argument("--psets", default="", help="comma-separated property sets or Pset.Property names to extract")
+    sub.add_argument("--no-classifications", action="store_true")
+    sub.add_argument("--no-materials", action="store_true")
+    sub.add_argument("--no-placement", action="store_true")
+    sub.add_argument("--revisions", help=REVISIONS_HELP)
+
+    sub = extractions.add_parser("building", parents=[common], help="IfcBuilding properties, as the IFC Building Info node")
+    sub.add_argument("--full-parse", action="store_true", help="parse every model instead of scanning it")
+    sub.add_argument("--header", action="store_true", help="append the file header columns")
+
+    sub = extractions.add_parser("centroids", parents=[common], help="element centroids, as the IFC Element Centroids node")
+    sub.add_argument("--include", default="", help="comma-separated IFC classes to process")
+    sub.add_argument("--exclude", default="", help="comma-separated IFC classes to skip")
+    sub.add_argument("--fast", action="store_true", help="derive simple bounding boxes without tessellation")
+    sub.add_argument("--threads", type=int, default=1, help="geometry iterator threads per worker")
+    sub.add_argument("--revisions", help=REVISIONS_HELP)
+
+    sub = extractions.add_parser("intersection", parents=[common], help="elements in rooms, as the IFC Intersection node")
+    sub.add_argument("--rooms", help="rooms model paired with every manifest path; otherwise the manifest is a CSV "
+                                     "file with RoomsPath and ElementsPath columns")
+    sub.add_argument("--method", choices=[GEOMETRY, TOPOLOGY_FIRST], default=GEOMETRY)
+    sub.add_argument("--threads", type=int, default=1, help="containment test threads per worker")
+
+    sub = extractions.add_parser("room-points", parents=[common], help="points inside spaces, as the IFC Room Points node")
+    sub.add_argument("--spacing", type=float, default=300.0, help="grid spacing [mm]")
+    sub.add_argument("--min-offset", type=float, default=100.0, help="minimum distance to the space boundary [mm]")
+    sub.add_argument("--engine", choices=[ENGINE_MESH, ENGINE_OCC], default=ENGINE_MESH)
+    sub.add_argument("--no-adaptive", action="store_true", help="disable the adaptive octree sampling and classify every point of the uniform grid")
+
+    for name, help_text in (("door-offsets", "points on both sides of doors, as the IFC Door Offset XYZ node"),
+                            ("connectivity", "room adjacency through doors, as the IFC Room Connectivity node")):
+        sub = extractions.add_parser(name, parents=[common], help=help_text)
+        sub.add_argument("--classes", default=", ".join(DEFAULT_CLASSES), help="comma-separated IFC classes")
+        sub.add_argument("--distance", type=float, default=DEFAULT_DISTANCE, help="offset distance [mm]")
+        sub.add_argument("--threads", type=int, default=1, help="threads per worker")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        task = _task(args)
+        items = _items(args, read_manifest(args.manifest))
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    done = []
+
+    def on_result(result):
+        done.append(result)
+        status = "OK" if result.ok else f"FAILED {result.error}"
+        print(f"[{len(done)}/{len(items)}] {result.item}: {status}", file=sys.stderr)
+
+    results = parallel.map_ordered(
+        task,
+        items,
+        workers=args.workers,
+        memory_limit_mb=args.memory_limit_mb,
+        initializer=model_cache.set_budget,
+        initargs=(args.model_cache_mb,),
+        on_result=on_result,
+    )
+    written = write_outputs(results, args.output)
+
+    failed = sum(1 for result in results if not result.ok)
+    for name, (path, rows) in written.items():
+        print(f"{name}: {rows} rows -> {path}", file=sys.stderr)
+    print(f"{len(items) - failed} of {len(items)} models processed in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return 1 if failed else 0
@@ -0,0 +1,178 @@
+"""
+Bounding boxes of elements computed from their IFC definitions instead of their tessellation.
+
+Extruded profiles with straight edges (rectangles, circles, polylines) and explicit
+IfcBoundingBox representations give exact or authored bounds with a few matrix
+products. Elements described any other way (clippings, Breps, mapped items, ...)
+are reported as unknown and left to the geometry kernel.
+"""
+from typing import NamedTuple, Sequence
+
+import numpy as np
+import ifcopenshell.util.unit
+from ifcopenshell.util import placement as placement_util
+
+from .geometry_cache import GeometryCache, iterator_products, tessellate_model
+from .placements import PlacementResolver
+
+
+def _profile_bounds(profile):
+    """
+    2D ``(min xy, max xy)`` of a profile in the coordinates of the swept solid, or None.
+    """
+    if profile.is_a("IfcRectangleProfileDef"):
+        half = np.array([profile.XDim, profile.YDim], dtype=float) / 2.0
+        points = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) * half
+    elif profile.is_a("IfcCircleProfileDef"):
+        points = np.array([[-1, -1], [1, 1]]) * float(profile.Radius)
+    elif profile.is_a("IfcArbitraryClosedProfileDef"):
+        curve = profile.OuterCurve
+        if curve.is_a("IfcPolyline"):
+            points = np.array([p.Coordinates[:2] for p in curve.Points], dtype=float)
+        elif curve.is_a("IfcIndexedPolyCurve") and not any(s.is_a("IfcArcIndex") for s in curve.Segments or ()):
+            points = np.array(curve.Points.CoordList, dtype=float)[:, :2]
+        else:
+            return None
+    else:
+        return None
+
+    # Parameterized profiles are placed by their optional Position
+    position = getattr(profile, "Position", None)
+    if position is not None:
+        matrix = placement_util.get_axis2placement(position)
+        points = points @ matrix[:2, :2].T + matrix[:2, 3]
+    return points.min(axis=0), points.max(axis=0)
+
+
+def _box_corners(low, high) -> np.ndarray:
+    return np.array([[x, y, z] for x in (low[0], high[0]) for y in (low[1], high[1]) for z in (low[2], high[2])])
+
+
+def _extrusion_corners(solid):
+    """
+    Corners enclosing an IfcExtrudedAreaSolid, in object coordinates, or None.
+    """
+    bounds = _profile_bounds(solid.SweptArea)
+    if bounds is None:
+        return None
+    low, high = bounds
+    base = np.array([[low[0], low[1], 0.0], [high[0], low[1], 0.0], [high[0], high[1], 0.0], [low[0], high[1], 0.0]])
+    direction = np.array(solid.ExtrudedDirection.DirectionRatios, dtype=float)
+    extrusion = direction / np.linalg.norm(direction) * float(solid.Depth)
+    corners = np.concatenate([base, base + extrusion])
+    if solid.Position is not None:
+        matrix = placement_util.get_axis2placement(solid.Position)
+        corners = corners @ matrix[:3, :3].T + matrix[:3, 3]
+    return corners
+
+
+def _representation(product, identifiers):
+    if product.Representation is None:
+        return None
+    for representation in product.Representation.Representations:
+        if representation.RepresentationIdentifier in identifiers:
+            return representation
+    return None
+
+
+def local_corners(product):
+    """
+    Points enclosing ``product`` in its object coordinates (file units): the corners of its Body
+    extrusions, otherwise of its explicit IfcBoundingBox. None if neither is available.
+    """
+    body = _representation(product, ("Body",))
+    if body is not None and body.Items and all(item.is_a("IfcExtrudedAreaSolid") for item in body.Items):
+        corners = [_extrusion_corners(item) for item in body.Items]
+        if all(c is not None for c in corners):
+            return np.concatenate(corners)
+
+    box = _representation(product, ("Box",))
+    if box is not None:
+        for item in box.Items:
+            if item.is_a("IfcBoundingBox"):
+                low = np.array(item.Corner.Coordinates, dtype=float)
+                return _box_corners(low, low + [float(item.XDim), float(item.YDim), float(item.ZDim)])
+    return None
+
+
+def analytic_bounds(model, products, resolver: PlacementResolver = None) -> dict:
+    """
+    Step id -> world bounding box (6,) [m] (min xyz, max xyz) for the ``products`` whose
+    bounds can be derived without tessellation; the others are missing from the result.
+    """
+    resolver = resolver or PlacementResolver(model)
+    scale = ifcopenshell.util.unit.calculate_unit_scale(model)
+    bounds = {}
+    for product in products:
+        try:
+            corners = local_corners(product)
+        except (AttributeError, TypeError, ValueError, ZeroDivisionError):
+            # Incomplete or unusual definitions are left to the geometry kernel
+            corners = None
+        if corners is None:
+            continue
+        matrix = resolver.matrix(product.ObjectPlacement)
+        world = (corners @ matrix[:3, :3].T + matrix[:3, 3]) * scale
+        bounds[product.id()] = np.concatenate([world.min(axis=0), world.max(axis=0)])
+    return bounds
+
+
+class ElementBounds(NamedTuple):
+    """
+    World bounding boxes (N,6) [m] of elements with their step ids and GlobalIds, and how many
+    of them were derived analytically instead of tessellated.
+    """
+    ids: np.ndarray
+    guids: np.ndarray
+    bounds: np.ndarray
+    analytic: int = 0
+
+    def centroids(self) -> np.ndarray:
+        return (self.bounds[:, :3] + self.bounds[:, 3:]) / 2.0
+
+
+def element_bounds(path: str, model, geometry_cache: GeometryCache, include: Sequence[str] = (),
+                   exclude: Sequence[str] = (), threads: int = 0, fast: bool = False) -> ElementBounds:
+    """
+    Bounding boxes of the elements the geometry iterator selects with ``include``/``exclude``.
+    With ``fast``, elements with analytic bounds (see ``analytic_bounds``) are not tessellated;
+    only the rest goes through the geometry cache and follows the analytic ones in the result.
+    """
+    if not fast:
+        geometry = geometry_cache.load(path, model, include, exclude, threads)
+        return ElementBounds(np.asarray(geometry.ids), np.asarray(geometry.guids), np.asarray(geometry.bounds))
+
+    products = iterator_products(model, include, exclude)
+    known = analytic_bounds(model, products)
+    remaining = [product for product in products if product.id() not in known]
+    geometry = geometry_cache.load(path, model, include=remaining, threads=threads) if remaining else None
+    return _merged_bounds(model, known, geometry)
+
+
+def product_bounds(model, products: Sequence, threads: int = 0, fast: bool = False) -> ElementBounds:
+    """
+    Bounding boxes of some ``products`` of a model (e.g. the changed ones), analytic with ``fast``
+    as in ``element_bounds``. They are tessellated without the geometry cache, whose entries
+    hold whole models.
+    """
+    known = analytic_bounds(model, products) if fast else {}
+    remaining = [product for product in products if product.id() not in known]
+    geometry = tessellate_model(model, include=remaining, threads=threads) if remaining else None
+    return _merged_bounds(model, known, geometry)
+
+
+def _merged_bounds(model, known: dict, geometry) -> ElementBounds:
+    # Analytic bounds first, followed by the tessellated ones
+    ids = list(known)
+    guids = [model.by_id(step_id).GlobalId for step_id in ids]
+    bounds = list(known.values())
+    if geometry is not None:
+        ids.extend(geometry.ids.tolist())
+        guids.extend(geometry.guids.tolist())
+        bounds.extend(np.asarray(geometry.bounds))
+    return ElementBounds(
+        np.array(ids, dtype=np.int64),
+        np.array(guids, dtype="U22"),
+        np.array(bounds, dtype=float).reshape(-1, 6),
+        len(known),
+    )
@@ -0,0 +1,67 @@
+"""
+IfcBuilding extraction used by the IFC Building Info node.
+"""
+import logging
+from typing import Optional
+
+from ifcopenshell.util import element
+
+from . import model_cache, step_scan
+from .metrics import OPEN, PROCESSED, PROPERTIES, Metrics
+
+LOGGER = logging.getLogger(__name__)
+
+
+def model_header(model) -> dict:
+    """
+    File header metadata of an opened model, in the layout of ``step_scan.header_row``.
+    """
+    description, name = model.header.file_description, model.header.file_name
+    return step_scan.header_row(
+        description.description,
+        description.implementation_level,
+        name.name,
+        name.time_stamp,
+        name.author,
+        name.organization,
+        name.preprocessor_version,
+        name.originating_system,
+        name.authorization,
+        model.header.file_schema.schema_identifiers,
+    )
+
+
+def read_building(path: str, use_cache: bool = True, fast_scan: bool = True, header: bool = False,
+                  metrics: Optional[Metrics] = None) -> dict:
+    """
+    Returns the properties of the first IfcBuilding (lowest step id) of an IFC file as one flat
+    dict, followed by the file header metadata with ``header``. A model held by the model cache
+    is used directly; otherwise with ``fast_scan`` the file is only scanned (see ``step_scan``)
+    and files the scanner cannot handle are opened with the full parser.
+    """
+    metrics = metrics or Metrics()
+    model = model_cache.CACHE.cached(path) if use_cache else None
+    if fast_scan and model is None:
+        try:
+            with metrics.phase(OPEN):
+                file_header, row = step_scan.scan_building(path)
+            metrics.count(PROCESSED)
+            return {**row, **file_header} if header else row
+        except (step_scan.ScanError, OSError) as e:
+            LOGGER.debug(f"Falling back to the full parser for {path}: {e}")
+
+    if model is None:
+        with metrics.phase(OPEN):
+            model = model_cache.open_model(path, use_cache)
+
+    with metrics.phase(PROPERTIES):
+        building = model.by_type('IfcBuilding')
+        buildPset = element.get_psets(building[0])
+        row = {}
+        if buildPset:
+            for ps in buildPset.values():
+                row.update(ps)
+        if header:
+            row.update(model_header(model))
+    metrics.count(PROCESSED)
+    return row
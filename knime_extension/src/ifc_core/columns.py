@@ -0,0 +1,261 @@
+"""
+Sparse, typed column builders producing Arrow tables.
+
+Element rows are appended one at a time; each column only stores the rows that
+actually have a value, so thousands of sparse property columns cost memory in
+proportion to the values present, not to rows x columns.
+"""
+import numbers
+from array import array
+
+import numpy as np
+import pyarrow as pa
+
+_BOOL, _INT, _FLOAT, _STR = "bool", "int", "float", "str"
+
+
+def _normalize(value):
+    """
+    Returns ``(value, kind)`` with the value converted to a plain Python primitive.
+    IfcOpenShell unwraps IFC measure and simple types (IfcLengthMeasure, IfcBoolean,
+    IfcInteger, IfcLabel, ...) to bool/int/float/str, which decides the column type.
+    Anything else (entities, enumerations, lists) is kept as its string form.
+    """
+    if isinstance(value, bool) or isinstance(value, np.bool_):
+        return bool(value), _BOOL
+    if isinstance(value, numbers.Integral):
+        return int(value), _INT
+    if isinstance(value, numbers.Real):
+        return float(value), _FLOAT
+    if isinstance(value, str):
+        return value, _STR
+    return str(value), _STR
+
+
+def arrow_type(kinds) -> pa.DataType:
+    """
+    Smallest Arrow type able to hold all value kinds of a column.
+    """
+    kinds = set(kinds)
+    if not kinds:
+        return pa.null()
+    if kinds == {_BOOL}:
+        return pa.bool_()
+    if kinds == {_INT}:
+        return pa.int64()
+    if kinds <= {_INT, _FLOAT}:
+        return pa.float64()
+    return pa.string()
+
+
+def _kinds(data_type: pa.DataType) -> set:
+    if pa.types.is_dictionary(data_type):
+        data_type = data_type.value_type
+    if pa.types.is_null(data_type):
+        return set()
+    if pa.types.is_boolean(data_type):
+        return {_BOOL}
+    if pa.types.is_integer(data_type):
+        return {_INT}
+    if pa.types.is_floating(data_type):
+        return {_FLOAT}
+    return {_STR}
+
+
+def common_type(types) -> pa.DataType:
+    """
+    Arrow type that all of ``types`` can be cast to, following the rules of ``arrow_type``.
+    """
+    types = list(types)
+    if types and all(t == types[0] for t in types):
+        return types[0]
+    kinds = set()
+    for t in types:
+        kinds |= _kinds(t)
+    return arrow_type(kinds)
+
+
+def _cast(array_: pa.Array, data_type: pa.DataType) -> pa.Array:
+    if array_.type == data_type:
+        return array_
+    if pa.types.is_dictionary(array_.type):
+        array_ = array_.dictionary_decode()
+    if pa.types.is_dictionary(data_type):
+        return array_.cast(data_type.value_type).dictionary_encode()
+    return array_.cast(data_type)
+
+
+class ColumnBuilder:
+    """
+    Collects the values of one column together with the row numbers they belong to.
+    """
+
+    __slots__ = ("rows", "values", "kinds", "dictionary")
+
+    def __init__(self, dictionary: bool = False):
+        self.rows = array("q")
+        self.values = []
+        self.kinds = set()
+        self.dictionary = dictionary
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, row: int, value):
+        value, kind = _normalize(value)
+        self.rows.append(row)
+        self.values.append(value)
+        self.kinds.add(kind)
+
+    @property
+    def type(self) -> pa.DataType:
+        data_type = arrow_type(self.kinds)
+        if self.dictionary and data_type == pa.string():
+            return pa.dictionary(pa.int32(), pa.string())
+        return data_type
+
+    def finish(self, num_rows: int, data_type: pa.DataType = None) -> pa.Array:
+        """
+        Returns an Arrow array of ``num_rows`` values, null where no value was appended.
+        """
+        data_type = data_type or self.type
+        value_type = data_type.value_type if pa.types.is_dictionary(data_type) else data_type
+
+        values = self.values
+        if value_type == pa.string() and self.kinds != {_STR}:
+            values = [str(v) for v in values]
+        dense = pa.array(values, type=value_type)
+
+        if len(values) != num_rows:
+            positions = np.full(num_rows, -1, dtype=np.int64)
+            positions[np.frombuffer(self.rows, dtype=np.int64)] = np.arange(len(values))
+            dense = dense.take(pa.array(positions, mask=positions < 0))
+
+        if pa.types.is_dictionary(data_type):
+            return _cast(dense, data_type)
+        return dense
+
+
+class TableBuilder:
+    """
+    Appends row dicts into sparse column builders and assembles an Arrow table.
+    Columns keep the order in which their names were first seen; ``None`` values
+    register the column but are stored as nulls.
+    """
+
+    def __init__(self, dictionary_columns=()):
+        self.columns = {}
+        self.num_rows = 0
+        self.dictionary_columns = set(dictionary_columns)
+
+    def append(self, row: dict):
+        for name, value in row.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = ColumnBuilder(name in self.dictionary_columns)
+            if value is not None:
+                column.append(self.num_rows, value)
+        self.num_rows += 1
+
+    def schema(self) -> dict:
+        """
+        Column names mapped to the Arrow type inferred from the values seen so far.
+        """
+        return {name: column.type for name, column in self.columns.items()}
+
+    def finish(self, schema: dict = None) -> pa.Table:
+        """
+        Builds the table. With ``schema`` (name -> type) the output has exactly
+        those columns and types, missing columns become all-null.
+        """
+        if schema is None:
+            schema = self.schema()
+        arrays = []
+        for name, data_type in schema.items():
+            column = self.columns.get(name)
+            if column is None:
+                arrays.append(pa.nulls(self.num_rows, type=data_type))
+            else:
+                arrays.append(column.finish(self.num_rows, data_type))
+        return pa.Table.from_arrays(arrays, names=list(schema))
+
+
+class SchemaBuilder:
+    """
+    Same interface as TableBuilder, but only tracks column names and value kinds.
+    Used to fix the schema of a table before writing it in batches.
+    """
+
+    def __init__(self):
+        self.kinds = {}
+        self.num_rows = 0
+
+    def append(self, row: dict):
+        for name, value in row.items():
+            kinds = self.kinds.setdefault(name, set())
+            if value is not None:
+                kinds.add(_normalize(value)[1])
+        self.num_rows += 1
+
+    def schema(self) -> dict:
+        return {name: arrow_type(kinds) for name, kinds in self.kinds.items()}
+
+
+def constant_column(value: str, num_rows: int) -> pa.Array:
+    """
+    Dictionary-encoded column repeating one string, e.g. the model path of every row.
+    """
+    return pa.DictionaryArray.from_arrays(
+        pa.array(np.zeros(num_rows, dtype=np.int32)), pa.array([value], type=pa.string())
+    )
+
+
+def merge_schemas(schemas) -> dict:
+    """
+    Union of several name -> type schemas, in first-seen column order, with
+    conflicting types widened by ``common_type``.
+    """
+    types = {}
+    for schema in schemas:
+        for name, data_type in schema.items():
+            types.setdefault(name, []).append(data_type)
+    return {name: common_type(ts) for name, ts in types.items()}
+
+
+def conform(table: pa.Table, schema: dict) -> pa.Table:
+    """
+    Casts and reorders ``table`` to ``schema``, adding all-null columns it lacks.
+    """
+    arrays = []
+    for name, data_type in schema.items():
+        if name in table.column_names:
+            arrays.append(_cast(table.column(name).combine_chunks(), data_type))
+        else:
+            arrays.append(pa.nulls(table.num_rows, type=data_type))
+    return pa.Table.from_arrays(arrays, names=list(schema))
+
+
+def concat_tables(tables) -> pa.Table:
+    """
+    Concatenates tables with different column sets, e.g. one per IFC model.
+    """
+    tables = list(tables)
+    schema = merge_schemas({f.name: f.type for f in t.schema} for t in tables)
+    return pa.concat_tables([conform(t, schema) for t in tables])
+
+
+def plain_table(table: pa.Table) -> pa.Table:
+    """
+    Decodes dictionary columns and types all-null columns as string, which is the
+    layout ``knext.Table.from_pyarrow`` expects. Dictionary encoding therefore only
+    saves memory while tables are built and concatenated; KNIME receives plain strings.
+    """
+    arrays = []
+    for column in table.columns:
+        column = column.combine_chunks()
+        if pa.types.is_dictionary(column.type):
+            column = column.dictionary_decode()
+        elif pa.types.is_null(column.type):
+            column = pa.nulls(len(column), type=pa.string())
+        arrays.append(column)
+    return pa.Table.from_arrays(arrays, names=table.column_names)
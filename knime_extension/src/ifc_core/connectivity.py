@@ -0,0 +1,49 @@
+"""
+Room adjacency through doors, used by the IFC Room Connectivity node.
+
+The two offset points of every door (see ``offsets``) are located in the IfcSpace
+volumes of the same model with one RoomTree query, so the cost grows with the
+number of doors instead of doors times room points.
+"""
+from typing import Sequence
+
+import numpy as np
+
+from .geometry_cache import GeometryCache
+from .offsets import offset_points
+from .options import DEFAULT_CLASSES, DEFAULT_DISTANCE
+from .room_points import SPACE_CLASSES
+from .rooms import RoomTree
+
+
+def room_connectivity(path: str, model, geometry_cache: GeometryCache, classes: Sequence[str] = DEFAULT_CLASSES,
+                      distance: float = DEFAULT_DISTANCE, threads: int = 1) -> list:
+    """
+    Returns ``{"DoorGUID", "IfcClass", "RoomA", "RoomB"}`` edges for the elements of ``classes``:
+    RoomA is the space containing the positive offset point, RoomB the one containing the negative
+    point, as GlobalIds. A side outside of every space is empty; elements with both sides outside
+    are left out. The space meshes are read from ``geometry_cache``.
+    """
+    points = offset_points(path, model, classes, distance, geometry_cache)
+    if not points.guids or not model.by_type("IfcSpace"):
+        return []
+
+    tree = RoomTree(geometry_cache.load(path, model, include=SPACE_CLASSES))
+    # Offset points are in millimeters, the space geometry in meters
+    matches = tree.select(np.concatenate([points.positive, points.negative]) / 1000.0, threads)
+    count = len(points.guids)
+
+    def room(step_ids):
+        return model.by_id(step_ids[0]).GlobalId if step_ids else ""
+
+    edges = []
+    seen = set()
+    for n, (guid, ifc_class) in enumerate(zip(points.guids, points.classes)):
+        # Elements with several bounding boxes: the first one decides their edge
+        if guid in seen:
+            continue
+        seen.add(guid)
+        room_a, room_b = room(matches[n]), room(matches[count + n])
+        if room_a or room_b:
+            edges.append({"DoorGUID": guid, "IfcClass": ifc_class, "RoomA": room_a, "RoomB": room_b})
+    return edges
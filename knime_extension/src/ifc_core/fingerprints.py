@@ -0,0 +1,153 @@
+"""
+Content fingerprints of IFC elements, used to find what changed between two revisions of a model.
+
+The fingerprint of an entity is a hash of its STEP record in which every
+reference is replaced by the fingerprint of the referenced entity, so it covers
+everything the entity points to (e.g. the whole placement chain) and does not
+depend on the step ids, which exporters renumber freely. Owner histories are
+left out: they change on every export without changing the element.
+
+The fingerprint of an element adds the relating side of its relationships:
+property sets, type, materials, classifications, container and parent and,
+for geometry, its openings, as well as the associations of its type, which
+occurrences inherit (e.g. a classification added to an IfcWallType). Adding an
+element to a shared property set therefore does not change the fingerprint of
+the other elements in it.
+"""
+import hashlib
+import re
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+# Relationship class -> (attribute holding the element(s), attribute holding what they are related to)
+RELATIONS = {
+    "IfcRelDefinesByProperties": ("RelatedObjects", "RelatingPropertyDefinition"),
+    "IfcRelDefinesByType": ("RelatedObjects", "RelatingType"),
+    "IfcRelAssociatesMaterial": ("RelatedObjects", "RelatingMaterial"),
+    "IfcRelAssociatesClassification": ("RelatedObjects", "RelatingClassification"),
+    "IfcRelContainedInSpatialStructure": ("RelatedElements", "RelatingStructure"),
+    "IfcRelAggregates": ("RelatedObjects", "RelatingObject"),
+}
+# Relationships that only change the shape of an element
+GEOMETRY_RELATIONS = {
+    "IfcRelVoidsElement": ("RelatingBuildingElement", "RelatedOpeningElement"),
+}
+
+# References outside of string literals; a quote inside a string is written twice
+_REFERENCE = re.compile(r"'(?:[^']|'')*'|#(\d+)")
+_OMITTED = "*"
+_DIGEST_SIZE = 16
+
+
+def _entities(value) -> tuple:
+    if value is None:
+        return ()
+    return tuple(value) if isinstance(value, (tuple, list)) else (value,)
+
+
+class Fingerprinter:
+    """
+    Memoized fingerprints of the entities of one model. With ``geometry`` the shape
+    representation of the elements and their openings are part of their fingerprint.
+    """
+
+    def __init__(self, model, geometry: bool = False):
+        self.model = model
+        self.geometry = geometry
+        self._by_id = model.by_id
+        self._omit = ()
+        self._digests = {owner.id(): _OMITTED for owner in model.by_type("IfcOwnerHistory")}
+        self._types = {}
+        self._related = self._relations()
+
+    def _relations(self) -> Dict[int, list]:
+        """
+        Element step id -> ``relationship class:fingerprint of the relating side`` entries.
+        """
+        relations = dict(RELATIONS, **(GEOMETRY_RELATIONS if self.geometry else {}))
+        related = {}
+        for name, (elements_attribute, relating_attribute) in relations.items():
+            try:
+                relationships = self.model.by_type(name)
+            except RuntimeError:
+                # Not part of the schema of the model
+                continue
+            for rel in relationships:
+                relating = ":".join(self.entity(e) for e in _entities(getattr(rel, relating_attribute)))
+                for element in _entities(getattr(rel, elements_attribute)):
+                    related.setdefault(element.id(), []).append(f"{name}:{relating}")
+                    if name == "IfcRelDefinesByType" and rel.RelatingType is not None:
+                        self._types[element.id()] = rel.RelatingType.id()
+        return related
+
+    def entity(self, entity, omit: Tuple[int, ...] = ()) -> str:
+        """
+        Hex fingerprint of ``entity`` and everything it references, except the ``omit`` step ids.
+        """
+        if not omit:
+            return self._digest(entity.id(), entity)
+        self._omit = omit
+        try:
+            return self._hash(str(entity))
+        finally:
+            self._omit = ()
+
+    def _digest(self, step_id: int, entity=None) -> str:
+        digest = self._digests.get(step_id)
+        if digest is None:
+            # Guards against reference cycles, which valid models do not have
+            self._digests[step_id] = _OMITTED
+            # Shared entities are hashed in full, whatever the element being fingerprinted omits
+            omit, self._omit = self._omit, ()
+            try:
+                digest = self._digests[step_id] = self._hash(str(entity or self._by_id(step_id)))
+            finally:
+                self._omit = omit
+        return digest
+
+    def _hash(self, record: str) -> str:
+        record = _REFERENCE.sub(self._replace, record[record.index("=") + 1:])
+        return hashlib.blake2b(record.encode(), digest_size=_DIGEST_SIZE).hexdigest()
+
+    def _replace(self, match) -> str:
+        ref = match.group(1)
+        if ref is None:
+            return match.group(0)
+        ref = int(ref)
+        if ref in self._omit:
+            return _OMITTED
+        return self._digests.get(ref) or self._digest(ref)
+
+    def element(self, element) -> bytes:
+        """
+        Fingerprint of an element: its own record (without its shape unless ``geometry``),
+        the relating side of its relationships and of those of its type.
+        """
+        omit = ()
+        if not self.geometry and getattr(element, "Representation", None) is not None:
+            omit = (element.Representation.id(),)
+        parts = [self.entity(element, omit)] + sorted(self._related.get(element.id(), ()))
+        type_id = self._types.get(element.id())
+        if type_id is not None:
+            parts += sorted(f"type:{entry}" for entry in self._related.get(type_id, ()))
+        return hashlib.blake2b("|".join(parts).encode(), digest_size=_DIGEST_SIZE).digest()
+
+    def elements(self, elements: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ``(GlobalIds (N,), fingerprints (N,))`` of ``elements``.
+        """
+        elements = list(elements)
+        guids = np.array([element.GlobalId for element in elements], dtype="U22")
+        fingerprints = np.array([self.element(element) for element in elements], dtype=f"S{_DIGEST_SIZE}")
+        return guids, fingerprints
+
+    def context(self) -> str:
+        """
+        Fingerprint of what all elements depend on: the schema and the units of the project.
+        """
+        parts = [self.model.schema]
+        for project in self.model.by_type("IfcProject"):
+            if project.UnitsInContext is not None:
+                parts.append(self.entity(project.UnitsInContext))
+        return hashlib.blake2b("|".join(parts).encode(), digest_size=_DIGEST_SIZE).hexdigest()
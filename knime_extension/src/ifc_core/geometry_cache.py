@@ -0,0 +1,312 @@
+"""
+Persistent cache of tessellated element geometry.
+
+Tessellation is the most expensive step of the geometry nodes. The triangulated
+elements of a model are stored once per model content, iterator filter and
+geometry settings as plain ``.npy`` files and loaded back memory-mapped, so
+re-runs and other nodes (also in other processes) read them without calling the
+geometry kernel again.
+
+Invalidation: an entry is keyed by the content hash of the IFC file, the
+iterator filter, the geometry settings, the cache format and the IfcOpenShell
+version, so any change to one of them is a cache miss. Entries are never
+updated in place; stale ones are removed least recently used first once the
+cache directory exceeds its size limit.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+import ifcopenshell
+import ifcopenshell.geom
+import ifcopenshell.util.shape
+
+from . import model_cache
+
+LOGGER = logging.getLogger(__name__)
+
+# Bumped whenever the stored layout changes
+FORMAT_VERSION = 1
+
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "cvp_bim_geometry_cache")
+DEFAULT_MAX_SIZE_MB = 4096
+
+# Geometry settings the cache is built with; part of the key
+SETTINGS = {"use-world-coords": False, "weld-vertices": True}
+
+_ARRAYS = ("ids", "guids", "vertex_offsets", "face_offsets", "vertices", "faces", "matrices", "bounds")
+_META = "meta.json"
+
+
+class GeometrySet:
+    """
+    Triangulated elements of a model, packed into flat arrays:
+
+    - ``ids`` (N,) step ids and ``guids`` (N,) GlobalIds
+    - ``vertices`` (V,3) local coordinates [m] and ``faces`` (F,3) vertex indices local to each element,
+      element i owning ``vertices[vertex_offsets[i]:vertex_offsets[i+1]]`` and the faces in ``face_offsets`` likewise
+    - ``matrices`` (N,4,4) world transforms and ``bounds`` (N,6) world bounding boxes (min xyz, max xyz)
+    """
+
+    def __init__(self, ids, guids, vertex_offsets, face_offsets, vertices, faces, matrices, bounds):
+        self.ids = ids
+        self.guids = guids
+        self.vertex_offsets = vertex_offsets
+        self.face_offsets = face_offsets
+        self.vertices = vertices
+        self.faces = faces
+        self.matrices = matrices
+        self.bounds = bounds
+        self._positions = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, step_id: int) -> Optional[int]:
+        """
+        Index of the element with ``step_id``, or None if it has no geometry.
+        """
+        if self._positions is None:
+            self._positions = {int(i): n for n, i in enumerate(self.ids)}
+        return self._positions.get(int(step_id))
+
+    def mesh(self, i: int) -> tuple:
+        """
+        ``(vertices (V,3), faces (F,3))`` of element ``i`` in world coordinates.
+        """
+        local = self.vertices[self.vertex_offsets[i]:self.vertex_offsets[i + 1]]
+        matrix = self.matrices[i]
+        return local @ matrix[:3, :3].T + matrix[:3, 3], np.asarray(self.faces[self.face_offsets[i]:self.face_offsets[i + 1]])
+
+    def bbox_centroids(self) -> np.ndarray:
+        """
+        (N,3) centers of the world bounding boxes, as ``ifcopenshell.util.shape.get_bbox_centroid``
+        on world coordinate geometry.
+        """
+        return (self.bounds[:, :3] + self.bounds[:, 3:]) / 2.0
+
+    def shape_bbox_centroids(self) -> np.ndarray:
+        """
+        (N,3) centers of the local bounding boxes moved to world coordinates, as
+        ``ifcopenshell.util.shape.get_shape_bbox_centroid``.
+        """
+        centroids = np.zeros((len(self), 3))
+        filled = np.diff(self.vertex_offsets) > 0
+        starts = self.vertex_offsets[:-1][filled]
+        if len(starts):
+            low = np.minimum.reduceat(self.vertices, starts, axis=0)
+            high = np.maximum.reduceat(self.vertices, starts, axis=0)
+            centroids[filled] = (low + high) / 2.0
+        matrices = self.matrices
+        return np.einsum("nij,nj->ni", matrices[:, :3, :3], centroids) + matrices[:, :3, 3]
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, name + ".npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "GeometrySet":
+        mode = "r" if mmap else None
+        return cls(*(np.load(os.path.join(directory, name + ".npy"), mmap_mode=mode) for name in _ARRAYS))
+
+
+def _iterator_filter(include: Sequence[str], exclude: Sequence[str]) -> dict:
+    if include:
+        return {"include": list(include)}
+    if exclude:
+        return {"exclude": list(exclude)}
+    return {}
+
+
+def _filter_key(include: Sequence, exclude: Sequence) -> dict:
+    # Entity instances are identified by their step id
+    return {
+        name: [value if isinstance(value, str) else f"#{value.id()}" for value in values]
+        for name, values in _iterator_filter(include, exclude).items()
+    }
+
+
+def iterator_products(model, include: Sequence[str] = (), exclude: Sequence[str] = (), openings: bool = False) -> list:
+    """
+    Products the geometry iterator considers for the ``include``/``exclude`` class lists:
+    those with a representation, except openings unless they are included explicitly or
+    ``openings`` is set (some IfcOpenShell versions tessellate them by default).
+    """
+    def selected(product):
+        if include:
+            return any(product.is_a(name) for name in include)
+        if not openings and product.is_a("IfcOpeningElement"):
+            return False
+        return not any(product.is_a(name) for name in exclude)
+
+    return [product for product in model.by_type("IfcProduct") if product.Representation is not None and selected(product)]
+
+
+def tessellate_model(model, include: Sequence[str] = (), exclude: Sequence[str] = (), threads: int = 0) -> GeometrySet:
+    """
+    Tessellates the elements of ``model`` selected by the ``include``/``exclude`` lists
+    (include wins) of IFC class names or entity instances with the geometry iterator and
+    packs them into a GeometrySet.
+    """
+    settings = ifcopenshell.geom.settings()
+    for name, value in SETTINGS.items():
+        settings.set(name, value)
+
+    ids, guids, vertices, faces, matrices, bounds = [], [], [], [], [], []
+    vertex_counts, face_counts = [0], [0]
+    iterator = ifcopenshell.geom.iterator(
+        settings, model, threads or multiprocessing.cpu_count(), **_iterator_filter(include, exclude)
+    )
+    if iterator.initialize():
+        while True:
+            shape = iterator.get()
+            local = np.asarray(shape.geometry.verts, dtype=float).reshape(-1, 3)
+            matrix = ifcopenshell.util.shape.get_shape_matrix(shape)
+            world = local @ matrix[:3, :3].T + matrix[:3, 3]
+
+            ids.append(shape.id)
+            guids.append(shape.guid)
+            vertices.append(local)
+            faces.append(np.asarray(shape.geometry.faces, dtype=np.int32).reshape(-1, 3))
+            matrices.append(matrix)
+            bounds.append(np.concatenate([world.min(axis=0), world.max(axis=0)]) if len(world) else np.zeros(6))
+            vertex_counts.append(len(local))
+            face_counts.append(len(faces[-1]))
+            if not iterator.next():
+                break
+
+    return GeometrySet(
+        np.array(ids, dtype=np.int64),
+        np.array(guids, dtype="U22"),
+        np.cumsum(vertex_counts, dtype=np.int64),
+        np.cumsum(face_counts, dtype=np.int64),
+        np.concatenate(vertices) if vertices else np.zeros((0, 3)),
+        np.concatenate(faces) if faces else np.zeros((0, 3), dtype=np.int32),
+        np.array(matrices, dtype=float).reshape(-1, 4, 4),
+        np.array(bounds, dtype=float).reshape(-1, 6),
+    )
+
+
+def _directory_size(directory: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+
+class GeometryCache:
+    """
+    Directory of GeometrySet entries with a size limit; the least recently used entries are removed first.
+    Instances are cheap and picklable, so worker processes can read the entries written by the node.
+    """
+
+    def __init__(self, directory: str = "", max_size_mb: int = DEFAULT_MAX_SIZE_MB, enabled: bool = True):
+        self.directory = directory or DEFAULT_DIRECTORY
+        self.max_size = max_size_mb * 1024 * 1024
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, path: str, include: Sequence[str] = (), exclude: Sequence[str] = ()) -> str:
+        description = {
+            "model": model_cache.CACHE.digest(path),
+            "filter": _filter_key(include, exclude),
+            "settings": SETTINGS,
+            "format": FORMAT_VERSION,
+            "ifcopenshell": ifcopenshell.version,
+        }
+        return hashlib.blake2b(json.dumps(description, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+    def load(self, path: str, model=None, include: Sequence[str] = (), exclude: Sequence[str] = (),
+             threads: int = 0, key: Optional[str] = None) -> GeometrySet:
+        """
+        Returns the geometry of the model at ``path`` (see ``tessellate_model``), memory-mapped
+        from the cache when present, otherwise tessellated and stored. ``model`` avoids opening
+        the file again on a miss, ``key`` (as returned by ``key``, e.g. in a parent process)
+        hashing its content again.
+        """
+        if not self.enabled:
+            return tessellate_model(model or model_cache.open_model(path), include, exclude, threads)
+
+        entry = os.path.join(self.directory, key or self.key(path, include, exclude))
+        if os.path.exists(os.path.join(entry, _META)):
+            try:
+                geometry = GeometrySet.load(entry)
+                os.utime(os.path.join(entry, _META))
+                self.hits += 1
+                return geometry
+            except (OSError, ValueError) as e:
+                LOGGER.warning(f"Ignoring unreadable geometry cache entry {entry}: {e}")
+                shutil.rmtree(entry, ignore_errors=True)
+
+        self.misses += 1
+        geometry = tessellate_model(model or model_cache.open_model(path), include, exclude, threads)
+        try:
+            self._store(entry, geometry, path)
+            self._evict(keep=entry)
+        except OSError as e:
+            LOGGER.warning(f"Could not write the geometry cache entry for {path}: {e}")
+        return geometry
+
+    def _store(self, entry: str, geometry: GeometrySet, path: str):
+        # Written next to the final location and renamed, so readers never see partial entries
+        os.makedirs(self.directory, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.directory)
+        try:
+            geometry.save(staging)
+            with open(os.path.join(staging, _META), "w") as f:
+                json.dump({"path": os.path.abspath(path), "elements": len(geometry), "created": time.time()}, f)
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                # Another process stored the same entry in the meantime
+                if not os.path.exists(os.path.join(entry, _META)):
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def entries(self) -> list:
+        """
+        ``(last access time, size in bytes, directory)`` of every complete entry.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for entry in os.scandir(self.directory):
+            meta = os.path.join(entry.path, _META)
+            if entry.is_dir() and os.path.exists(meta):
+                entries.append((os.path.getmtime(meta), _directory_size(entry.path), entry.path))
+        return entries
+
+    def _evict(self, keep: str = None):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, directory in entries:
+            if total <= self.max_size:
+                break
+            if directory == keep:
+                continue
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+            LOGGER.debug(f"Evicted geometry cache entry {directory}.")
+
+    def clear(self):
+        for _, _, directory in self.entries():
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def stats(self) -> dict:
+        entries = self.entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "size_mb": sum(size for _, size, _ in entries) / (1024 * 1024),
+        }
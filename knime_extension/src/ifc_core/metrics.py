@@ -0,0 +1,135 @@
+"""
+Per-phase timings, counters, progress and cancellation of an extraction run.
+
+The core functions accept an optional ``Metrics`` and report into it; the nodes
+connect it to the execution context (progress bar and cancel button) and
+publish the collected values as flow variables. Without callbacks a Metrics
+only collects, so worker processes can fill one and return it for merging.
+"""
+import time
+from collections import defaultdict
+from typing import Callable, Optional
+
+# Phases, in reporting order
+OPEN = "open"
+INDEX = "index"
+FINGERPRINT = "fingerprint"
+GEOMETRY = "geometry"
+PROPERTIES = "properties"
+CLASSIFICATION = "classification"
+TABLE = "table"
+PHASES = (OPEN, INDEX, FINGERPRINT, GEOMETRY, PROPERTIES, CLASSIFICATION, TABLE)
+
+# Counters of elements (or spaces, models, ...)
+PROCESSED = "processed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# Minimum time between two progress reports, which also check for cancellation
+PROGRESS_INTERVAL = 0.2  # [s]
+
+
+class Canceled(RuntimeError):
+    """
+    Raised when the user canceled the run.
+    """
+
+
+class _Phase:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.seconds[self.name] += time.perf_counter() - self.start
+        return False
+
+
+class Metrics:
+    """
+    Accumulated seconds per phase and counters; ``on_progress(fraction, message)`` and
+    ``is_canceled()`` are the optional hooks of the caller.
+    """
+
+    def __init__(self, on_progress: Optional[Callable[[float, str], None]] = None,
+                 is_canceled: Optional[Callable[[], bool]] = None):
+        self.on_progress = on_progress
+        self.is_canceled = is_canceled
+        self.seconds = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.started = time.perf_counter()
+        self._offset, self._scale = 0.0, 1.0
+        self._reported = 0.0
+
+    def __getstate__(self):
+        # Callbacks stay in the process that created them
+        state = self.__dict__.copy()
+        state["on_progress"] = state["is_canceled"] = None
+        return state
+
+    def phase(self, name: str) -> _Phase:
+        """
+        Context manager adding the time spent in its block to phase ``name``.
+        """
+        return _Phase(self, name)
+
+    def count(self, name: str, n: int = 1):
+        self.counts[name] += n
+
+    def section(self, index: int = 0, total: int = 1):
+        """
+        Maps the following progress reports to part ``index`` of ``total`` equal parts of the
+        progress bar, e.g. one model of several; without arguments the whole bar is used again.
+        """
+        self._offset, self._scale = index / max(total, 1), 1 / max(total, 1)
+
+    def check_canceled(self):
+        if self.is_canceled is not None and self.is_canceled():
+            raise Canceled("Execution canceled.")
+
+    def progress(self, done: int, total: int, message: str = ""):
+        """
+        Reports ``done`` of ``total`` and raises Canceled if the user canceled. Reports closer
+        than PROGRESS_INTERVAL are dropped (except the last one), so it is cheap to call often.
+        """
+        now = time.perf_counter()
+        if done < total and now - self._reported < PROGRESS_INTERVAL:
+            return
+        self._reported = now
+        self.check_canceled()
+        if self.on_progress is not None:
+            self.on_progress(min(1.0, self._offset + self._scale * done / max(total, 1)), message)
+
+    def merge(self, other: "Metrics"):
+        for name, seconds in other.seconds.items():
+            self.seconds[name] += seconds
+        for name, n in other.counts.items():
+            self.counts[name] += n
+
+    def summary(self) -> dict:
+        """
+        ``<phase>_seconds`` of the measured phases, the counters and ``total_seconds`` since creation.
+        """
+        names = [p for p in PHASES if p in self.seconds] + sorted(set(self.seconds) - set(PHASES))
+        summary = {f"{name}_seconds": round(self.seconds[name], 3) for name in names}
+        summary.update(sorted(self.counts.items()))
+        summary["total_seconds"] = round(time.perf_counter() - self.started, 3)
+        return summary
+
+    def __str__(self) -> str:
+        return ", ".join(f"{key} {value}" for key, value in self.summary().items())
+
+
+def measured(func: Callable, *args, **kwargs) -> tuple:
+    """
+    Returns ``(func(*args, **kwargs, metrics=...), metrics)`` with a fresh Metrics, so that a
+    worker process can hand its metrics back to the caller.
+    """
+    metrics = Metrics()
+    return func(*args, **kwargs, metrics=metrics), metrics
@@ -0,0 +1,147 @@
+"""
+Process-level cache of parsed IFC models shared by all nodes running in the same Python process.
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import ifcopenshell
+
+LOGGER = logging.getLogger(__name__)
+
+# A parsed ifcopenshell.file typically needs several times the size of the STEP file.
+# The budget is checked against this estimate since the real footprint is not exposed.
+MEMORY_FACTOR = 5
+
+DEFAULT_BUDGET_MB = 4096
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(8 * 1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ModelCache:
+    """
+    LRU cache of ``ifcopenshell.file`` objects under a memory budget.
+
+    Entries are keyed by content hash, so the same file reached through different
+    paths is parsed once. The hash of a path is recomputed only when its
+    modification time or size changes.
+    """
+
+    def __init__(self, budget_mb: int = DEFAULT_BUDGET_MB):
+        self.budget = budget_mb * 1024 * 1024
+        self._models = OrderedDict()  # digest -> (model, estimated bytes)
+        self._digests = {}  # (path, mtime_ns, size) -> digest
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def size(self) -> int:
+        return sum(cost for _, cost in self._models.values())
+
+    def set_budget(self, budget_mb: int):
+        with self._lock:
+            self.budget = budget_mb * 1024 * 1024
+            self._evict(0)
+
+    def digest(self, path: str) -> str:
+        """
+        Returns the content hash of ``path``, reusing the last one while the file is unchanged.
+        """
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = _file_digest(path)
+            with self._lock:
+                self._digests[key] = digest
+        return digest
+
+    def open(self, path: str):
+        """
+        Returns the parsed model for ``path``, parsing it only on a cache miss.
+        """
+        digest = self.digest(path)
+        with self._lock:
+            entry = self._models.get(digest)
+            if entry is not None:
+                self._models.move_to_end(digest)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        model = ifcopenshell.open(path)
+        cost = os.path.getsize(path) * MEMORY_FACTOR
+
+        with self._lock:
+            if cost <= self.budget:
+                self._evict(cost)
+                self._models[digest] = (model, cost)
+            else:
+                LOGGER.info(f"Model {path} exceeds the model cache budget and is not cached.")
+        return model
+
+    def cached(self, path: str):
+        """
+        Returns the parsed model for ``path`` if the cache holds it, otherwise None. The file is
+        not hashed: only paths whose content hash is already known for their current state are found.
+        """
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._models.get(self._digests.get(key))
+            if entry is None:
+                return None
+            self._models.move_to_end(self._digests[key])
+            self.hits += 1
+            return entry[0]
+
+    def _evict(self, incoming: int):
+        while self._models and self.size + incoming > self.budget:
+            digest, _ = self._models.popitem(last=False)
+            self.evictions += 1
+            LOGGER.debug(f"Evicted model {digest} from the model cache.")
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._models),
+                "size_mb": self.size / (1024 * 1024),
+            }
+
+
+CACHE = ModelCache()
+
+
+def open_model(path: str, use_cache: bool = True):
+    """
+    Opens an IFC model through the process-level cache, or directly when ``use_cache`` is False.
+    """
+    if not use_cache:
+        return ifcopenshell.open(path)
+    return CACHE.open(path)
+
+
+def set_budget(budget_mb: int):
+    CACHE.set_budget(budget_mb)
+
+
+def stats() -> dict:
+    return CACHE.stats()
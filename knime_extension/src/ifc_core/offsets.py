@@ -0,0 +1,103 @@
+"""
+Offset points on both sides of doors, windows and openings.
+
+Every element contributes its center moved by a distance along the Y axis of its
+object placement, in both directions. Centers come from the authored
+IfcBoundingBox representation items, one per item, or from the cached geometry
+bounds when there is none, and all points are computed in one batched operation.
+"""
+from typing import NamedTuple, Sequence
+
+import numpy as np
+import ifcopenshell.util.unit
+
+from .geometry_cache import GeometryCache
+from .options import DEFAULT_CLASSES, DEFAULT_DISTANCE
+from .placements import PlacementResolver
+
+# Where an element's center comes from
+BOUNDING_BOX = "BoundingBox"
+GEOMETRY = "Geometry"
+
+
+class OffsetPoints(NamedTuple):
+    """
+    Per center: GlobalId and class of its element, center source, and the positive/negative
+    offset points (N,3) [mm]. An element with several IfcBoundingBox items has one center per item.
+    """
+    guids: list
+    classes: list
+    sources: list
+    positive: np.ndarray
+    negative: np.ndarray
+
+
+def box_centers(element) -> list:
+    """
+    Centers of the element's IfcBoundingBox items in object coordinates (file units), in file order.
+    """
+    centers = []
+    for rep in element.Representation.Representations:
+        if rep.RepresentationType == "BoundingBox":
+            for item in rep.Items:
+                if item.is_a("IfcBoundingBox"):
+                    corner = np.array(item.Corner.Coordinates, dtype=float)
+                    centers.append(corner + np.array([item.XDim, item.YDim, item.ZDim], dtype=float) / 2.0)
+    return centers
+
+
+def offset_points(path: str, model, classes: Sequence[str] = DEFAULT_CLASSES, distance: float = DEFAULT_DISTANCE,
+                  geometry_cache: GeometryCache = None, threads: int = 0) -> OffsetPoints:
+    """
+    Offset points ``distance`` [mm] away from the center of every element of ``classes`` with a
+    representation, along the Y axis of its placement, one pair per IfcBoundingBox item as the
+    baseline node. Elements without an IfcBoundingBox are tessellated through ``geometry_cache``
+    (skipped without one) and get one pair; elements without any geometry are left out.
+    """
+    selected = {}
+    for name in classes:
+        try:
+            selected.update(dict.fromkeys(model.by_type(name)))
+        except RuntimeError:
+            raise ValueError(f"'{name}' is not an IFC class of the {model.schema} schema.")
+    elements = [element for element in selected if element.Representation is not None]
+    to_mm = ifcopenshell.util.unit.calculate_unit_scale(model) * 1000.0
+
+    boxes = [box_centers(element) for element in elements]
+    missing = [element for element, centers in zip(elements, boxes) if not centers]
+
+    # World centers [mm] of the elements from the cached geometry
+    world = {}
+    if missing and geometry_cache is not None:
+        geometry = geometry_cache.load(path, model, include=missing, threads=threads)
+        world = dict(zip(geometry.ids.tolist(), geometry.bbox_centroids() * 1000.0))
+
+    # One row per bounding box item, or a single geometry row
+    rows, local = [], []
+    for element, centers in zip(elements, boxes):
+        if centers:
+            rows.extend([(element, True)] * len(centers))
+            local.extend(centers)
+        elif element.id() in world:
+            rows.append((element, False))
+            local.append(np.zeros(3))
+    elements = [element for element, _ in rows]
+    has_box = np.array([box for _, box in rows], dtype=bool)
+    local = np.array(local, dtype=float).reshape(-1, 3)
+    matrices = PlacementResolver(model).matrices(elements).reshape(-1, 4, 4)
+
+    centers = (np.einsum("nij,nj->ni", matrices[:, :3, :3], local) + matrices[:, :3, 3]) * to_mm
+    if not has_box.all():
+        centers[~has_box] = [world[element.id()] for element, box in rows if not box]
+
+    axes = matrices[:, :3, 1]
+    norms = np.linalg.norm(axes, axis=1, keepdims=True)
+    offsets = np.divide(axes, norms, out=np.zeros_like(axes), where=norms > 0) * distance
+
+    return OffsetPoints(
+        [element.GlobalId for element in elements],
+        [element.is_a() for element in elements],
+        [BOUNDING_BOX if box else GEOMETRY for box in has_box],
+        centers + offsets,
+        centers - offsets,
+    )
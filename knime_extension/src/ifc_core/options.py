@@ -0,0 +1,29 @@
+"""
+Option values and defaults offered by the node dialogs.
+
+This module has no third-party imports: the node modules import it when the
+extension is registered, while the modules doing the work are only imported
+once a node executes.
+"""
+from typing import Tuple
+
+# IFC Door Offset XYZ and IFC Room Connectivity
+DEFAULT_CLASSES = ("IfcDoor",)
+DEFAULT_DISTANCE = 1500.0  # [mm]
+
+# IFC Room Points classification engines
+ENGINE_MESH = "NumPy Mesh"
+ENGINE_OCC = "OpenCascade"
+
+# IFC Intersection room assignment methods
+GEOMETRY = "Geometry"
+TOPOLOGY_FIRST = "Topology First"
+
+
+def split_names(text: str) -> Tuple[str, ...]:
+    """
+    Splits a comma, semicolon or newline separated parameter value into names.
+    """
+    for separator in ";\n":
+        text = text.replace(separator, ",")
+    return tuple(name.strip() for name in text.split(",") if name.strip())
@@ -0,0 +1,157 @@
+"""
+Process-pool helpers used by the nodes that handle several IFC models at once.
+"""
+import concurrent.futures
+import logging
+import multiprocessing
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional
+
+from .metrics import Canceled
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TaskResult(NamedTuple):
+    """
+    Outcome of one task: either ``value`` or an ``error`` message is set.
+    """
+    item: Any
+    value: Any = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _limit_memory(memory_limit_mb: int):
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:
+        LOGGER.warning("Worker memory limit is not supported on this platform and is ignored.")
+        return
+    limit = int(memory_limit_mb) * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+# Queue of the indices of the items a pool worker started, set in every worker
+_STARTED = None
+
+
+def _init_worker(started, memory_limit_mb, initializer, initargs):
+    global _STARTED
+    _STARTED = started
+    _limit_memory(memory_limit_mb)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _run_task(func, item) -> TaskResult:
+    try:
+        return TaskResult(item, value=func(item))
+    except Canceled:
+        raise
+    except MemoryError:
+        return TaskResult(item, error="MemoryError: worker memory limit exceeded")
+    except Exception as e:
+        return TaskResult(item, error=f"{type(e).__name__}: {e}")
+
+
+def _run_pool_task(func, index, item) -> TaskResult:
+    _STARTED.put(index)
+    return _run_task(func, item)
+
+
+def _run_pool(func, items, indices, workers, memory_limit_mb, initializer, initargs, results, on_result):
+    """
+    Runs ``items[i]`` for every i in ``indices`` on a fresh pool. If a worker dies, the pool
+    breaks and ``(started, queued)`` are returned: the indices without a result that were
+    running at that moment and those that never started. Both are empty otherwise.
+    """
+    unfinished = []
+    context = multiprocessing.get_context("spawn")
+    started = context.SimpleQueue()
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(workers, len(indices)),
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(started, memory_limit_mb, initializer, initargs),
+    ) as pool:
+        futures = {pool.submit(_run_pool_task, func, i, items[i]): i for i in indices}
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except BrokenProcessPool:
+                    unfinished.append(i)
+                    continue
+                if on_result:
+                    on_result(results[i])
+        except BaseException:
+            # E.g. canceled from on_result: only wait for the running items, not the queued ones
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    if not unfinished:
+        return [], []
+    running = set()
+    while not started.empty():
+        running.add(started.get())
+    unfinished.sort()
+    return [i for i in unfinished if i in running], [i for i in unfinished if i not in running]
+
+
+def map_ordered(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    workers: int = 1,
+    memory_limit_mb: int = 0,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+    on_result: Optional[Callable[[TaskResult], None]] = None,
+) -> List[TaskResult]:
+    """
+    Applies ``func`` to every item and returns one TaskResult per item, in input order.
+
+    With ``workers`` > 1 the items are processed by a spawned process pool whose
+    workers are limited to ``memory_limit_mb`` of address space (POSIX only).
+    ``func`` must be a picklable module-level function. A failing item never
+    aborts the others: exceptions are reported in ``TaskResult.error``, and a
+    worker that dies outright (e.g. a crash inside the IFC parser) only costs
+    the items that were running: they are retried in isolation, and the items
+    that had not started yet continue on a new pool of ``workers`` workers. An
+    exception raised by ``on_result``, or a ``metrics.Canceled`` raised by
+    ``func``, stops the run: queued items are dropped and only the running ones
+    are waited for.
+    """
+    items = list(items)
+    results: List[Optional[TaskResult]] = [None] * len(items)
+
+    if workers <= 1 or len(items) <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for i, item in enumerate(items):
+            results[i] = _run_task(func, item)
+            if on_result:
+                on_result(results[i])
+        return results
+
+    # A dead worker breaks the whole pool: the items that were running are retried on
+    # their own to find out which one actually crashed, the queued ones on a new pool.
+    queued = list(range(len(items)))
+    while queued:
+        started, queued = _run_pool(func, items, queued, workers, memory_limit_mb,
+                                    initializer, initargs, results, on_result)
+        if queued and not started:
+            # The pool broke before any item started, e.g. in the initializer
+            started, queued = queued[:1], queued[1:]
+        for i in started:
+            if any(_run_pool(func, items, [i], 1, memory_limit_mb, initializer, initargs, results, on_result)):
+                results[i] = TaskResult(items[i], error="Worker process terminated unexpectedly")
+                if on_result:
+                    on_result(results[i])
+
+    return results
@@ -0,0 +1,130 @@
+"""
+Resolution of object placements to world matrices.
+
+``ifcopenshell.util.placement.get_local_placement`` walks the whole
+``PlacementRelTo`` chain and multiplies 4x4 matrices in Python for every
+element. PlacementResolver computes each IfcLocalPlacement once, level by level
+from the root placements down, with one batched matrix product per level.
+"""
+import numpy as np
+from ifcopenshell.util import placement as placement_util
+
+_IDENTITY = np.eye(4)
+
+
+def _coordinates(values, size: int = 3) -> tuple:
+    values = tuple(float(v) for v in values)
+    return (values + (0.0,) * size)[:size]
+
+
+def _axes(relative) -> tuple:
+    """
+    ``(origin, z, x)`` of an IfcAxis2Placement, or None if it needs the generic fallback.
+    """
+    if relative.is_a("IfcAxis2Placement3D"):
+        location = getattr(relative.Location, "Coordinates", None)
+        if location is None:
+            return None
+        z = relative.Axis.DirectionRatios if relative.Axis else (0, 0, 1)
+        x = relative.RefDirection.DirectionRatios if relative.RefDirection else (1, 0, 0)
+        return _coordinates(location), _coordinates(z), _coordinates(x)
+    if relative.is_a("IfcAxis2Placement2D"):
+        x = relative.RefDirection.DirectionRatios if relative.RefDirection else (1, 0)
+        return _coordinates(relative.Location.Coordinates), (0.0, 0.0, 1.0), _coordinates(x)
+    return None
+
+
+def axis2placements(origins: np.ndarray, z: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Stack of 4x4 matrices for (N,3) origins and Z/X axes, built like
+    ``ifcopenshell.util.placement.a2p``: the axes are normalized per row, as IFC
+    direction ratios need not be unit vectors, and Y is their normalized cross product.
+    """
+    z = z / np.linalg.norm(z, axis=1, keepdims=True)
+    x = x / np.linalg.norm(x, axis=1, keepdims=True)
+    y = np.cross(z, x)
+    y /= np.linalg.norm(y, axis=1, keepdims=True)
+    matrices = np.zeros((len(origins), 4, 4))
+    matrices[:, :3, 0] = x
+    matrices[:, :3, 1] = y
+    matrices[:, :3, 2] = z
+    matrices[:, :3, 3] = origins
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+class PlacementResolver:
+    """
+    Cache of world matrices per placement id.
+    """
+
+    def __init__(self, model=None):
+        self._matrices = {}
+        if model is not None:
+            self.resolve_all(model.by_type("IfcLocalPlacement"))
+
+    def resolve_all(self, placements):
+        """
+        Computes the world matrices of ``placements`` and all of their parents,
+        one vectorized pass per depth of the placement tree.
+        """
+        depths = {}
+        for plc in placements:
+            chain = []
+            while plc is not None and plc.id() not in depths and plc.id() not in self._matrices:
+                if plc in chain:
+                    raise ValueError(f"Cyclic placement chain at {plc}")
+                chain.append(plc)
+                plc = plc.PlacementRelTo if plc.is_a("IfcLocalPlacement") else None
+            depth = depths[plc.id()][0] if plc is not None and plc.id() in depths else 0
+            for plc in reversed(chain):
+                depth += 1
+                depths[plc.id()] = (depth, plc)
+
+        levels = {}
+        for depth, plc in depths.values():
+            levels.setdefault(depth, []).append(plc)
+
+        for depth in sorted(levels):
+            batch, axes = [], []
+            for plc in levels[depth]:
+                plc_axes = _axes(plc.RelativePlacement) if plc.is_a("IfcLocalPlacement") else None
+                if plc_axes is None:
+                    # IfcGridPlacement, linear placements, ...: generic and unbatched
+                    self._matrices[plc.id()] = placement_util.get_local_placement(plc)
+                    continue
+                batch.append(plc)
+                axes.append(plc_axes)
+            if not batch:
+                continue
+
+            origins, z, x = (np.array(a, dtype=float) for a in zip(*axes))
+            relative = axis2placements(origins, z, x)
+            parents = np.stack([self.matrix(plc.PlacementRelTo) for plc in batch])
+            world = np.matmul(parents, relative)
+            for plc, matrix in zip(batch, world):
+                self._matrices[plc.id()] = matrix
+
+    def matrix(self, plc) -> np.ndarray:
+        """
+        World matrix of a placement, identity for None.
+        Same result as ``ifcopenshell.util.placement.get_local_placement``.
+        """
+        if plc is None:
+            return _IDENTITY
+        matrix = self._matrices.get(plc.id())
+        if matrix is None:
+            self.resolve_all([plc])
+            matrix = self._matrices[plc.id()]
+        return matrix
+
+    def matrices(self, elements) -> np.ndarray:
+        """
+        (N,4,4) stack of the world matrices of the elements' ObjectPlacement.
+        Placements not resolved yet are resolved together in one pass.
+        """
+        if not elements:
+            return np.zeros((0, 4, 4))
+        placements = [getattr(e, "ObjectPlacement", None) for e in elements]
+        self.resolve_all([p for p in placements if p is not None and p.id() not in self._matrices])
+        return np.stack([self.matrix(p) for p in placements])
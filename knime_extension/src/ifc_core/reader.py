@@ -0,0 +1,323 @@
+"""
+Element extraction used by the IFC Reader node.
+"""
+from typing import NamedTuple, Optional, Tuple
+
+import pyarrow as pa
+
+from . import model_cache
+from .columns import SchemaBuilder, TableBuilder, constant_column
+from .metrics import CLASSIFICATION, INDEX, OPEN, PROCESSED, PROPERTIES, SKIPPED, TABLE, Metrics
+from .options import split_names
+from .placements import PlacementResolver
+from .relations import RelationshipIndex, decomposition
+from .revisions import RevisionStore, incremental_table
+
+# Columns holding few distinct values, dictionary-encoded while the table is built and merged.
+# The encoding stays internal: columns.plain_table decodes it before the table reaches KNIME.
+DICTIONARY_COLUMNS = ("ifcType", "ifcElementType", "ifcElementTypeTag")
+
+
+class ReaderOptions(NamedTuple):
+    """
+    Selects what is extracted. Work for excluded classes, property sets and
+    feature groups is skipped, not computed and dropped afterwards.
+
+    ``psets`` entries are either a property set name (all of its properties)
+    or ``"PsetName.PropertyName"``; an empty tuple extracts every property set.
+    """
+    include_classes: Tuple[str, ...] = ()
+    exclude_classes: Tuple[str, ...] = ()
+    psets: Tuple[str, ...] = ()
+    classifications: bool = True
+    materials: bool = True
+    placement: bool = True
+
+    def is_selected(self, elem) -> bool:
+        if self.include_classes and not any(elem.is_a(c) for c in self.include_classes):
+            return False
+        return not any(elem.is_a(c) for c in self.exclude_classes)
+
+    def pset_filter(self) -> dict:
+        """
+        Property set name -> set of property names, or None for the whole set.
+        """
+        selection = {}
+        for entry in self.psets:
+            pset_name, _, prop = entry.partition(".")
+            if not prop:
+                selection[pset_name] = None
+            elif selection.get(pset_name, set()) is not None:
+                selection.setdefault(pset_name, set()).add(prop)
+        return selection
+
+
+def _add_classifications(subDict: dict, classificationReference: list):
+    for cl in classificationReference:
+        try:
+            source_name = cl.ReferencedSource.Name if cl.ReferencedSource else "UnknownSource"
+            item_ref = cl.ItemReference if cl.ItemReference else "UnknownItem"
+            className = source_name + "_" + item_ref[:2]
+            subDict[className + ": ItemReference"] = item_ref
+            if cl.Name:
+                subDict[className + ": Name"] = cl.Name
+        except:
+            pass
+
+
+def _add_psets(subDict: dict, elem, pset_filter: dict, index: RelationshipIndex):
+    if not pset_filter:
+        pset = index.get_psets(elem)
+        if pset:
+            for ps_values in pset.values():
+                if ps_values:
+                    subDict.update(ps_values)
+        return
+
+    # Only the selected property sets are decoded
+    for pset_name, props in pset_filter.items():
+        ps_values = index.get_pset(elem, pset_name)
+        if not ps_values:
+            continue
+        if props is not None:
+            ps_values = {k: v for k, v in ps_values.items() if k in props}
+        subDict.update(ps_values)
+
+
+# Marks material entries without a layer thickness
+_NO_THICKNESS = object()
+
+
+def _material_key(mat) -> int:
+    # Usages of the same layer/profile set decode to the same entries
+    if mat.is_a('IfcMaterialLayerSetUsage') and mat.ForLayerSet:
+        return mat.ForLayerSet.id()
+    if mat.is_a('IfcMaterialProfileSetUsage') and mat.ForProfileSet:
+        return mat.ForProfileSet.id()
+    return mat.id()
+
+
+def _material_entries(mat) -> list:
+    """
+    ``(material name, layer thickness)`` pairs of one material definition, in extraction order.
+    """
+    entries = []
+    try:
+        if mat.is_a('IfcMaterial'):
+            entries.append((mat.Name, _NO_THICKNESS))
+
+        elif mat.is_a('IfcMaterialList'):
+            for m in mat.Materials:
+                entries.append((m.Name, _NO_THICKNESS))
+
+        elif mat.is_a('IfcMaterialLayerSetUsage'):
+            layerSet = getattr(mat, "ForLayerSet", None)
+            if layerSet and hasattr(layerSet, "MaterialLayers"):
+                for lyr in layerSet.MaterialLayers:
+                    mname = lyr.Material.Name if lyr.Material else "UnnamedLayer"
+                    # Se vuoi anche salvare spessore
+                    entries.append((mname, lyr.LayerThickness))
+
+        elif mat.is_a('IfcMaterialConstituentSet'):
+            constituents = getattr(mat, "MaterialConstituents", [])
+            for c in constituents:
+                if c.Material:
+                    entries.append((c.Material.Name, _NO_THICKNESS))
+
+        elif mat.is_a('IfcMaterialProfileSetUsage'):
+            profSet = getattr(mat, "ForProfileSet", None)
+            if profSet and hasattr(profSet, "MaterialProfiles"):
+                for mp in profSet.MaterialProfiles:
+                    if mp.Material:
+                        entries.append((mp.Material.Name, _NO_THICKNESS))
+                    # Se vuoi recuperare spessori da mp.Profile, dipende dal tipo di profilo, ecc.
+    except:
+        pass
+    return entries
+
+
+def _add_materials(subDict: dict, materials: list, memo: dict):
+    # Manual extraction approach; the entries of a material definition shared by
+    # many elements (e.g. through their type) are decoded once and kept in ``memo``
+    materialNumber = 0
+    usedMaterials = []
+    for mat in materials:
+        if not mat:
+            continue
+
+        key = _material_key(mat)
+        entries = memo.get(key)
+        if entries is None:
+            entries = memo[key] = _material_entries(mat)
+
+        for mname, thickness in entries:
+            if mname not in usedMaterials:
+                usedMaterials.append(mname)
+                materialNumber += 1
+                subDict[f"Material_{str(materialNumber).zfill(3)}"] = mname
+            if thickness is not _NO_THICKNESS:
+                subDict[f"LayerThk_{str(materialNumber).zfill(3)}"] = thickness
+
+    # Optional: You could use IfcOpenShell utility functions instead (commented)
+    # - element.get_material_layers(elem)
+    # - element.get_material_profile_sets(elem)
+    # - element.get_material_constituents(elem)
+
+
+def storey_elements(model) -> list:
+    """
+    Elements below all building storeys (IfcBuildingStorey), each once.
+    """
+    return decomposition(model, model.by_type("IfcBuildingStorey"))
+
+
+def iter_rows(model, options: ReaderOptions = ReaderOptions(), metrics: Optional[Metrics] = None, elements=None):
+    """
+    Yields ``(GlobalId, dict of column values)`` for every selected element found below the
+    building storeys of ``model`` (or of ``elements``). Elements reached from several storeys
+    are yielded once. Supports IFC2x3 and IFC4 formats. Progress and the time of the index,
+    classification and property phases are reported to ``metrics``.
+    """
+    metrics = metrics or Metrics()
+    pset_filter = options.pset_filter()
+    material_memo = {}
+    with metrics.phase(INDEX):
+        candidates = storey_elements(model) if elements is None else list(elements)
+        # The class filter first, so nothing is indexed or resolved for skipped elements
+        elements = [elem for elem in candidates if options.is_selected(elem)]
+        metrics.count(SKIPPED, len(candidates) - len(elements))
+        index = RelationshipIndex(model, materials=options.materials, classifications=options.classifications)
+        resolver = None
+        if options.placement:
+            # Only the placement chains of the selected elements
+            resolver = PlacementResolver()
+            resolver.matrices(elements)
+
+    for n, elem in enumerate(elements):
+        metrics.progress(n, len(elements), f"Read {n} of {len(elements)} elements")
+        subDict = {}
+
+        # 1) IFC type information
+        ifcType = elem.is_a()
+        subDict["ifcType"] = ifcType
+
+        ifcElementType = index.get_type(elem)
+        subDict["ifcElementType"] = ifcElementType
+
+        # 2) Classifications (e.g. OmniClass, Uniclass, etc.)
+        if options.classifications:
+            with metrics.phase(CLASSIFICATION):
+                _add_classifications(subDict, index.get_references(elem))
+
+        # 3) Element name (parsing colon-separated names if present)
+        if elem.Name:
+            if ":" in elem.Name:
+                parts = elem.Name.split(":")
+                if len(parts) > 1:
+                    subDict["ElementName"] = parts[1]
+            else:
+                subDict["ElementName"] = elem.Name
+
+        # 4) Property Sets (Psets)
+        with metrics.phase(PROPERTIES):
+            _add_psets(subDict, elem, pset_filter, index)
+
+        # 5) Tag and Type Tag (if available)
+        if hasattr(elem, "Tag") and elem.Tag:
+            subDict["Tag"] = elem.Tag
+        if ifcElementType and hasattr(ifcElementType, "Tag") and ifcElementType.Tag:
+            subDict["ifcElementTypeTag"] = ifcElementType.Tag
+
+        # 6) Materials
+        if options.materials:
+            with metrics.phase(PROPERTIES):
+                _add_materials(subDict, index.get_materials(elem), material_memo)
+
+        # 7) Global coordinates (from ObjectPlacement)
+        if options.placement:
+            locMatrix = resolver.matrix(elem.ObjectPlacement)
+            x, y, z = locMatrix[0][-1], locMatrix[1][-1], locMatrix[2][-1]
+            subDict["Global X"], subDict["Global Y"], subDict["Global Z"] = x, y, z
+
+        # 8) Clean up keys ending with whitespace
+        wrongKeys = [key for key in subDict if key.endswith(' ')]
+        for key in wrongKeys:
+            value = subDict.pop(key)
+            newKey = key.rstrip() + "(1)"
+            subDict[newKey] = value
+
+        # 9) Hand over this element’s data with its GlobalId
+        metrics.count(PROCESSED)
+        yield elem.GlobalId, subDict
+
+
+def build_table(model, path: str, options: ReaderOptions = ReaderOptions(),
+                metrics: Optional[Metrics] = None, elements=None) -> pa.Table:
+    """
+    Appends the rows of ``model`` (or of ``elements``) straight into typed column builders and
+    returns an Arrow table led by ``UniqueID`` and closed by ``ModelPath``.
+    """
+    metrics = metrics or Metrics()
+    builder = TableBuilder(DICTIONARY_COLUMNS)
+    for guid, subDict in iter_rows(model, options, metrics, elements):
+        with metrics.phase(TABLE):
+            builder.append({"UniqueID": guid, **subDict})
+    with metrics.phase(TABLE):
+        table = builder.finish()
+        return table.append_column("ModelPath", constant_column(path, table.num_rows))
+
+
+def read_model(path: str, options: ReaderOptions = ReaderOptions(), use_cache: bool = True,
+               metrics: Optional[Metrics] = None, revisions: Optional[RevisionStore] = None) -> pa.Table:
+    """
+    Opens an IFC file with IfcOpenShell and returns its selected elements as an Arrow table
+    (see ``build_table``). With ``revisions`` only the elements changed since the previous
+    run are read, and a ChangeFlag column is added (see ``revisions.incremental_table``).
+    """
+    metrics = metrics or Metrics()
+    if revisions is not None:
+        return incremental_table(
+            revisions, path, "reader", options._asdict(), "UniqueID",
+            open_model=lambda: model_cache.open_model(path, use_cache),
+            select=lambda model: [elem for elem in storey_elements(model) if options.is_selected(elem)],
+            extract=lambda model, elements, metrics: build_table(model, path, options, metrics, elements),
+            metrics=metrics,
+        )
+    with metrics.phase(OPEN):
+        model = model_cache.open_model(path, use_cache)
+    return build_table(model, path, options, metrics)
+
+
+def discover_schema(model, path: str, options: ReaderOptions = ReaderOptions(), metrics: Optional[Metrics] = None):
+    """
+    Walks ``model`` once without keeping any values and returns the
+    ``(schema, number of rows)`` that ``iter_batches`` will produce.
+    """
+    builder = SchemaBuilder()
+    builder.append({"UniqueID": ""})
+    for guid, subDict in iter_rows(model, options, metrics):
+        builder.append(subDict)
+    builder.append({"ModelPath": path})
+    return builder.schema(), builder.num_rows - 2
+
+
+def iter_batches(model, path: str, schema: dict, batch_size: int, options: ReaderOptions = ReaderOptions(),
+                 metrics: Optional[Metrics] = None):
+    """
+    Yields the selected rows of ``model`` as Arrow tables of at most ``batch_size`` rows,
+    all conforming to ``schema`` (see ``discover_schema``).
+    """
+    metrics = metrics or Metrics()
+    builder = TableBuilder()
+    for guid, subDict in iter_rows(model, options, metrics):
+        with metrics.phase(TABLE):
+            builder.append({"UniqueID": guid, **subDict, "ModelPath": path})
+        if builder.num_rows >= batch_size:
+            with metrics.phase(TABLE):
+                batch = builder.finish(schema)
+            yield batch
+            builder = TableBuilder()
+    if builder.num_rows:
+        with metrics.phase(TABLE):
+            batch = builder.finish(schema)
+        yield batch
@@ -0,0 +1,211 @@
+"""
+One-pass index of the relationships the IFC Reader queries for every element.
+
+``ifcopenshell.util.element.get_psets``, ``get_type`` and
+``ifcopenshell.util.classification.get_references`` traverse inverse attributes
+on each call and decode the same property sets again for every element sharing
+them. RelationshipIndex scans the relationship entities once and answers the
+same questions with dictionary lookups, with the same results.
+"""
+from ifcopenshell.util import element as element_util
+
+
+# Relationship class -> (parent attribute, children attribute) of the relationships
+# ``ifcopenshell.util.element.get_decomposition`` follows
+DECOMPOSITION = {
+    "IfcRelContainedInSpatialStructure": ("RelatingStructure", "RelatedElements"),
+    "IfcRelAggregates": ("RelatingObject", "RelatedObjects"),
+    "IfcRelVoidsElement": ("RelatingBuildingElement", "RelatedOpeningElement"),
+    "IfcRelFillsElement": ("RelatingOpeningElement", "RelatedBuildingElement"),
+    "IfcRelNests": ("RelatingObject", "RelatedObjects"),
+    "IfcRelAdheresToElement": ("RelatingElement", "RelatedSurfaceFeatures"),
+}
+
+
+def _definitions(rel) -> tuple:
+    definition = rel.RelatingPropertyDefinition
+    if isinstance(definition, (tuple, list)):
+        return tuple(definition)
+    # IFC4 IfcPropertySetDefinitionSet wraps a list of definitions
+    if definition.is_a("IfcPropertySetDefinitionSet"):
+        return tuple(definition.wrappedValue)
+    return (definition,)
+
+
+def _classification_system(reference):
+    source = getattr(reference, "ReferencedSource", None)
+    while source is not None and source.is_a("IfcClassificationReference"):
+        source = getattr(source, "ReferencedSource", None)
+    return source
+
+
+class RelationshipIndex:
+    """
+    Element id -> type, property definitions, materials and classification references,
+    built from IfcRelDefinesByType, IfcRelDefinesByProperties, IfcRelAssociatesMaterial
+    and IfcRelAssociatesClassification in a single scan. Without ``materials`` or
+    ``classifications`` those relationships are not scanned and their lookups return nothing.
+    """
+
+    def __init__(self, model, materials: bool = True, classifications: bool = True):
+        self.types = {}
+        self.definitions = {}
+        self.materials = {}
+        self.references = {}
+        self._decoded = {}
+        self._type_psets = {}
+
+        for rel in model.by_type("IfcRelDefinesByType"):
+            for obj in rel.RelatedObjects:
+                self.types.setdefault(obj.id(), rel.RelatingType)
+
+        for rel in model.by_type("IfcRelDefinesByProperties"):
+            definitions = _definitions(rel)
+            for obj in rel.RelatedObjects:
+                self.definitions.setdefault(obj.id(), []).extend(definitions)
+
+        for rel in model.by_type("IfcRelAssociatesMaterial") if materials else ():
+            for obj in rel.RelatedObjects:
+                self.materials.setdefault(obj.id(), []).append(rel.RelatingMaterial)
+
+        for rel in model.by_type("IfcRelAssociatesClassification") if classifications else ():
+            if not rel.RelatingClassification.is_a("IfcClassificationReference"):
+                continue
+            for obj in rel.RelatedObjects:
+                self.references.setdefault(obj.id(), []).append(rel.RelatingClassification)
+
+    def get_type(self, elem):
+        """
+        Same as ``ifcopenshell.util.element.get_type``.
+        """
+        if elem.is_a("IfcTypeObject"):
+            return elem
+        return self.types.get(elem.id())
+
+    def decode(self, definition) -> dict:
+        """
+        Properties of a property set or quantity set, decoded once per definition.
+        The returned dict is shared and must not be modified.
+        """
+        props = self._decoded.get(definition.id())
+        if props is None:
+            props = self._decoded[definition.id()] = element_util.get_property_definition(definition)
+        return props
+
+    def _own_definitions(self, elem) -> list:
+        if elem.is_a("IfcTypeObject"):
+            return list(elem.HasPropertySets or [])
+        return self.definitions.get(elem.id(), [])
+
+    def _resolve(self, definitions, inherited: dict) -> dict:
+        psets = dict(inherited)
+        for definition in definitions:
+            # Copy on write: the inherited dicts are shared by all occurrences of the type
+            psets[definition.Name] = {**psets.get(definition.Name, {}), **self.decode(definition)}
+        return psets
+
+    def type_psets(self, element_type) -> dict:
+        """
+        Resolved property sets of a type object, computed once per type.
+        The returned dicts are shared and must not be modified.
+        """
+        psets = self._type_psets.get(element_type.id())
+        if psets is None:
+            psets = self._type_psets[element_type.id()] = self._resolve(self._own_definitions(element_type), {})
+        return psets
+
+    def get_psets(self, elem) -> dict:
+        """
+        Same as ``ifcopenshell.util.element.get_psets(elem)``: type property sets first,
+        overridden property by property by the occurrence. The type part is resolved
+        once per type, each occurrence only merges its own property sets on top, so
+        the inner dicts may be shared and must not be modified.
+        """
+        element_type = self.get_type(elem)
+        inherited = {}
+        if element_type is not None and element_type != elem:
+            inherited = self.type_psets(element_type)
+        return self._resolve(self._own_definitions(elem), inherited)
+
+    def get_pset(self, elem, name: str):
+        """
+        Same as ``ifcopenshell.util.element.get_pset(elem, name)``; only the named set is decoded.
+        """
+        pset = None
+        element_type = self.get_type(elem)
+        if element_type is not None and element_type != elem:
+            inherited = self.type_psets(element_type).get(name)
+            if inherited is not None:
+                pset = dict(inherited)
+        for definition in self._own_definitions(elem):
+            if definition.Name == name:
+                pset = pset or {}
+                pset.update(self.decode(definition))
+                break
+        return pset
+
+    def get_materials(self, elem) -> list:
+        """
+        Relating materials of the element's own IfcRelAssociatesMaterial relationships.
+        """
+        return self.materials.get(elem.id(), [])
+
+    def get_references(self, elem) -> list:
+        """
+        Same as ``ifcopenshell.util.classification.get_references(elem)``: references of the
+        type, replaced per classification system by the ones of the occurrence.
+        """
+        occurrence = self.references.get(elem.id(), [])
+        element_type = self.get_type(elem)
+        if element_type is None or element_type == elem or not elem.is_a("IfcObject"):
+            return list(dict.fromkeys(occurrence))
+        inherited = self.references.get(element_type.id(), [])
+        if not inherited:
+            return list(dict.fromkeys(occurrence))
+
+        per_system = {}
+        for reference in inherited:
+            per_system.setdefault(_classification_system(reference), []).append(reference)
+        occurrence_per_system = {}
+        for reference in occurrence:
+            occurrence_per_system.setdefault(_classification_system(reference), []).append(reference)
+        per_system.update(occurrence_per_system)
+
+        results = {}
+        for references in per_system.values():
+            results.update(dict.fromkeys(references))
+        return list(results)
+
+
+def decomposition(model, roots) -> list:
+    """
+    Same elements as the union of ``ifcopenshell.util.element.get_decomposition`` over ``roots``,
+    each once and in the order found, from one scan of the decomposing relationships instead of
+    the inverse attributes of every element.
+    """
+    children = {}
+    for name, (parent_attribute, children_attribute) in DECOMPOSITION.items():
+        try:
+            relationships = model.by_type(name)
+        except RuntimeError:
+            # Not part of the schema of the model
+            continue
+        for rel in relationships:
+            parent, related = getattr(rel, parent_attribute), getattr(rel, children_attribute)
+            if parent is None or related is None:
+                continue
+            related = related if isinstance(related, (tuple, list)) else (related,)
+            children.setdefault(parent.id(), []).extend(related)
+
+    found, expanded = {}, set()
+    for root in roots:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.id() in expanded:
+                continue
+            expanded.add(node.id())
+            for child in children.get(node.id(), ()):
+                found.setdefault(child.id(), child)
+                stack.append(child)
+    return list(found.values())
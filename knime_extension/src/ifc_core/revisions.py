@@ -0,0 +1,258 @@
+"""
+Incremental re-extraction between revisions of a model.
+
+The store keeps the last output of an extraction for every model path and
+settings, with the GlobalId and fingerprint (see ``fingerprints``) of every
+element it considered. When the model at that path changes, only new elements
+and elements with a different fingerprint are extracted again; the rows of the
+others are taken from the store. Every output row gets a ChangeFlag: added,
+modified or unchanged, and the rows of deleted elements follow as deleted.
+
+Invalidation: an unchanged file (same content hash) is answered from the store
+without opening it. A change of the schema or of the project units, of the
+extraction settings or of the store format re-extracts every element. Entries
+are replaced as a whole; the least recently used ones are removed once the
+directory exceeds its size limit.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from . import model_cache
+from .columns import concat_tables
+from .fingerprints import Fingerprinter
+from .metrics import FINGERPRINT, INDEX, OPEN, TABLE, Metrics
+
+LOGGER = logging.getLogger(__name__)
+
+# Bumped whenever the stored layout or the fingerprints change
+FORMAT_VERSION = 2
+
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "cvp_bim_revisions")
+DEFAULT_MAX_SIZE_MB = 4096
+
+CHANGE_COLUMN = "ChangeFlag"
+ADDED = "added"
+MODIFIED = "modified"
+DELETED = "deleted"
+UNCHANGED = "unchanged"
+
+_ROWS = "rows.parquet"
+_META = "meta.json"
+
+
+class Revision(NamedTuple):
+    """
+    Output of one extraction of a model: the content hash of the file, the fingerprint of
+    its context, the GlobalIds and fingerprints of the elements considered and the rows.
+    """
+    digest: str
+    context: str
+    guids: np.ndarray
+    fingerprints: np.ndarray
+    rows: pa.Table
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "guids.npy"), self.guids)
+        np.save(os.path.join(directory, "fingerprints.npy"), self.fingerprints)
+        pq.write_table(self.rows, os.path.join(directory, _ROWS))
+
+    @classmethod
+    def load(cls, directory: str, digest: str, context: str) -> "Revision":
+        return cls(
+            digest,
+            context,
+            np.load(os.path.join(directory, "guids.npy")),
+            np.load(os.path.join(directory, "fingerprints.npy")),
+            pq.read_table(os.path.join(directory, _ROWS)),
+        )
+
+
+def _directory_size(directory: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+
+class RevisionStore:
+    """
+    Directory of the last Revision per model path, extraction and settings, with a size limit.
+    Instances are cheap and picklable, so worker processes can use the store of the node.
+    """
+
+    def __init__(self, directory: str = "", max_size_mb: int = DEFAULT_MAX_SIZE_MB):
+        self.directory = directory or DEFAULT_DIRECTORY
+        self.max_size = max_size_mb * 1024 * 1024
+
+    def key(self, path: str, extraction: str, settings: dict) -> str:
+        description = {
+            "path": os.path.abspath(path),
+            "extraction": extraction,
+            "settings": settings,
+            "format": FORMAT_VERSION,
+        }
+        return hashlib.blake2b(json.dumps(description, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+    def load(self, key: str) -> Optional[Revision]:
+        """
+        The stored Revision of ``key``, or None.
+        """
+        entry = os.path.join(self.directory, key)
+        if not os.path.exists(os.path.join(entry, _META)):
+            return None
+        try:
+            with open(os.path.join(entry, _META)) as f:
+                meta = json.load(f)
+            revision = Revision.load(entry, meta["digest"], meta["context"])
+            os.utime(os.path.join(entry, _META))
+            return revision
+        except (OSError, ValueError, KeyError, pa.ArrowException) as e:
+            LOGGER.warning(f"Ignoring unreadable revision store entry {entry}: {e}")
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+
+    def save(self, key: str, revision: Revision, path: str):
+        entry = os.path.join(self.directory, key)
+        try:
+            self._store(entry, revision, path)
+            self._evict(keep=entry)
+        except OSError as e:
+            LOGGER.warning(f"Could not write the revision store entry for {path}: {e}")
+
+    def _store(self, entry: str, revision: Revision, path: str):
+        # Written next to the final location and swapped in, so readers never see partial entries
+        os.makedirs(self.directory, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.directory)
+        try:
+            revision.save(staging)
+            meta = {"path": os.path.abspath(path), "digest": revision.digest, "context": revision.context,
+                    "elements": len(revision.guids), "created": time.time()}
+            with open(os.path.join(staging, _META), "w") as f:
+                json.dump(meta, f)
+            shutil.rmtree(entry, ignore_errors=True)
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                # Another process stored the same entry in the meantime
+                if not os.path.exists(os.path.join(entry, _META)):
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def entries(self) -> list:
+        """
+        ``(last access time, size in bytes, directory)`` of every complete entry.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for entry in os.scandir(self.directory):
+            meta = os.path.join(entry.path, _META)
+            if entry.is_dir() and os.path.exists(meta):
+                entries.append((os.path.getmtime(meta), _directory_size(entry.path), entry.path))
+        return entries
+
+    def _evict(self, keep: str = None):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, directory in entries:
+            if total <= self.max_size:
+                break
+            if directory == keep:
+                continue
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+            LOGGER.debug(f"Evicted revision store entry {directory}.")
+
+    def clear(self):
+        for _, _, directory in self.entries():
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def _flagged(table: pa.Table, flags) -> pa.Table:
+    return table.append_column(CHANGE_COLUMN, pa.array(flags, type=pa.string()))
+
+
+def changes(previous: Optional[Revision], context: str, guids: np.ndarray, fingerprints: np.ndarray) -> np.ndarray:
+    """
+    Change flag of every current element compared to ``previous``: added, modified or unchanged.
+    Nothing is unchanged when the context differs.
+    """
+    flags = np.full(len(guids), ADDED, dtype=object)
+    if previous is None:
+        return flags
+    before = dict(zip(previous.guids.tolist(), previous.fingerprints.tolist()))
+    same_context = previous.context == context
+    for n, (guid, fingerprint) in enumerate(zip(guids.tolist(), fingerprints.tolist())):
+        known = before.get(guid)
+        if known is not None:
+            flags[n] = UNCHANGED if same_context and known == fingerprint else MODIFIED
+    return flags
+
+
+def incremental_table(store: RevisionStore, path: str, extraction: str, settings: dict, guid_column: str,
+                      open_model: Callable, select: Callable, extract: Callable, geometry: bool = False,
+                      metrics: Optional[Metrics] = None) -> pa.Table:
+    """
+    Output of an extraction of the model at ``path`` with a ChangeFlag column, reusing the rows of
+    the elements that did not change since the previous run with the same ``extraction`` and
+    ``settings``. ``open_model()`` returns the model, ``select(model)`` the elements the extraction
+    considers and ``extract(model, elements, metrics)`` the rows of some of them as an Arrow table
+    with their GlobalId in ``guid_column``. With ``geometry`` a change of shape is a modification.
+    """
+    metrics = metrics or Metrics()
+    key = store.key(path, extraction, settings)
+    previous = store.load(key)
+    digest = model_cache.CACHE.digest(path)
+    if previous is not None and previous.digest == digest:
+        metrics.count(UNCHANGED, len(previous.guids))
+        with metrics.phase(TABLE):
+            return _flagged(previous.rows, [UNCHANGED] * previous.rows.num_rows)
+
+    with metrics.phase(OPEN):
+        model = open_model()
+    with metrics.phase(INDEX):
+        elements = select(model)
+    with metrics.phase(FINGERPRINT):
+        fingerprinter = Fingerprinter(model, geometry)
+        guids, fingerprints = fingerprinter.elements(elements)
+        context = fingerprinter.context()
+    flags = changes(previous, context, guids, fingerprints)
+    for flag in (ADDED, MODIFIED, UNCHANGED):
+        metrics.count(flag, int(np.count_nonzero(flags == flag)))
+
+    rows = extract(model, [element for element, flag in zip(elements, flags) if flag != UNCHANGED], metrics)
+
+    with metrics.phase(TABLE):
+        parts, deleted = [rows], None
+        if previous is not None and guid_column in previous.rows.column_names:
+            previous_guids = previous.rows.column(guid_column)
+            unchanged = pa.array(guids[flags == UNCHANGED].tolist(), type=pa.string())
+            parts.insert(0, previous.rows.filter(pc.is_in(previous_guids, value_set=unchanged)))
+            current = pa.array(guids.tolist(), type=pa.string())
+            deleted = previous.rows.filter(pc.invert(pc.is_in(previous_guids, value_set=current)))
+        if previous is not None:
+            metrics.count(DELETED, len(set(previous.guids.tolist()) - set(guids.tolist())))
+
+        table = concat_tables(parts)
+        row_guids = table.column(guid_column).to_pylist() if guid_column in table.column_names else []
+        # Rows in the order of the elements, as a full extraction returns them
+        position = {guid: n for n, guid in enumerate(guids.tolist())}
+        order = np.argsort([position.get(guid, len(position)) for guid in row_guids], kind="stable")
+        table = table.take(pa.array(order, type=pa.int64()))
+        flag_of = dict(zip(guids.tolist(), flags.tolist()))
+        output = _flagged(table, [flag_of.get(guid, ADDED) for guid in np.take(row_guids, order).tolist()])
+        if deleted is not None and deleted.num_rows:
+            output = concat_tables([output, _flagged(deleted, [DELETED] * deleted.num_rows)])
+
+    store.save(key, Revision(digest, context, guids, fingerprints, table), path)
+    return output
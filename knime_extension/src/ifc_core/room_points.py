@@ -0,0 +1,241 @@
+"""
+Interior point sampling of IfcSpace volumes used by the IFC Room Points node.
+
+Spaces are independent of each other, so they are processed in chunks of space
+ids, either in-process or by a pool of workers that each open the model once.
+Every space reports its points together with its processing time and error.
+"""
+import math
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+import ifcopenshell.geom
+
+from . import model_cache, parallel, solids
+from .geometry_cache import GeometryCache
+from .metrics import FAILED, GEOMETRY, OPEN, PROCESSED, Metrics
+from .options import ENGINE_MESH, ENGINE_OCC
+from .spatial import SpatialIndex
+
+SPACE_CLASSES = ("IfcSpace",)
+
+# Chunks per worker: small enough to balance large and small spaces, large enough to keep the overhead low
+CHUNKS_PER_WORKER = 4
+
+
+class RoomPointOptions(NamedTuple):
+    spacing: float = 0.3  # [m]
+    min_offset: float = 0.1  # [m]
+    engine: str = ENGINE_MESH
+    adaptive: bool = True
+
+
+class SpaceResult(NamedTuple):
+    """
+    Points [m] of one space with its metadata, processing time [s] and error, if any.
+    """
+    global_id: str
+    level: str
+    long_name: str
+    points: np.ndarray
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def get_storey_elevation(space, spatial_index):
+    storey = spatial_index.parent(space)
+    if storey is not None and storey.is_a("IfcBuildingStorey"):
+        elevation = getattr(storey, 'Elevation', 0.0)
+        return elevation, getattr(storey, 'Name', 'Unknown')
+    return 0.0, "Unknown"
+
+
+def geometry_settings(engine: str):
+    """
+    Geometry settings for ``engine``, created once per model rather than once per space.
+    """
+    settings = ifcopenshell.geom.settings()
+    settings.set("use-world-coords", True)
+    if engine == ENGINE_OCC:
+        settings.set("use-python-opencascade", True)
+    return settings
+
+
+def occ_points(space, settings, spacing: float, min_offset: float) -> np.ndarray:
+    """
+    Reference sampling: every grid point is classified by OpenCascade's BRepClass3d_SolidClassifier.
+    """
+    from OCC.Core.BRepClass3d import BRepClass3d_SolidClassifier
+    from OCC.Core.TopAbs import TopAbs_IN
+    from OCC.Core.Bnd import Bnd_Box
+    from OCC.Core.gp import gp_Pnt
+    from OCC.Core.BRepBndLib import brepbndlib
+
+    extracted_points = []
+
+    shape = ifcopenshell.geom.create_shape(settings, space)
+    brep_shape = shape.geometry
+
+    bbox = Bnd_Box()
+    brepbndlib.Add(brep_shape, bbox)
+    xmin, ymin, zmin, xmax, ymax, zmax = bbox.Get()
+
+    classifier = BRepClass3d_SolidClassifier(brep_shape)
+
+    x_coords = np.arange(xmin, xmax, spacing)
+    y_coords = np.arange(ymin, ymax, spacing)
+
+    for x in x_coords:
+        for y in y_coords:
+            floor_point = gp_Pnt(x, y, zmin + solids.FLOOR_OFFSET)
+            classifier.Perform(floor_point, 1e-6)
+            if classifier.State() != TopAbs_IN:
+                continue
+
+            z_coords = np.arange(zmin + spacing, zmax, spacing)
+            for z in z_coords:
+                point = gp_Pnt(x, y, z)
+                classifier.Perform(point, 1e-6)
+                if classifier.State() == TopAbs_IN:
+                    extracted_points.append((x, y, z))
+
+    # Buffer zone
+    filtered_points = [
+        (x, y, z) for x, y, z in extracted_points
+        if (x > xmin + min_offset and x < xmax - min_offset and
+            y > ymin + min_offset and y < ymax - min_offset and
+            z > zmin + min_offset and z < zmax - min_offset)
+    ]
+    return np.array(filtered_points, dtype=float).reshape(-1, 3)
+
+
+def space_points(space, settings, options: RoomPointOptions, geometry=None) -> np.ndarray:
+    """
+    Interior grid points [m] of one space with the engine selected in ``options``.
+    The mesh engine takes the space from ``geometry`` (a GeometrySet) when it is there.
+    """
+    if options.engine == ENGINE_OCC:
+        return occ_points(space, settings, options.spacing, options.min_offset)
+    position = geometry.position(space.id()) if geometry is not None else None
+    if position is not None:
+        vertices, faces = geometry.mesh(position)
+    else:
+        vertices, faces = solids.tessellate(space, settings)
+    return solids.grid_points(vertices, faces, options.spacing, options.min_offset, options.adaptive)
+
+
+# Per-process state: the opened model and what is derived from it once
+_STATE = {}
+
+
+def _init_state(model, options: RoomPointOptions, geometry=None):
+    _STATE.update(
+        model=model,
+        options=options,
+        settings=geometry_settings(options.engine),
+        spatial_index=SpatialIndex(model),
+        geometry=geometry,
+    )
+
+
+def _init_worker(path: str, options: RoomPointOptions, geometry_cache: Optional[GeometryCache],
+                 geometry_key: Optional[str]):
+    # Worker processes are short-lived, caching the model there would only cost memory
+    model = model_cache.open_model(path, False)
+    # Memory-mapped, so all workers share the pages of the entry stored by the parent; the key
+    # computed there spares every worker hashing the whole file again
+    geometry = None
+    if geometry_cache is not None:
+        geometry = geometry_cache.load(path, model, include=SPACE_CLASSES, key=geometry_key)
+    _init_state(model, options, geometry)
+
+
+def _process_space(space) -> SpaceResult:
+    elevation, level_name = get_storey_elevation(space, _STATE["spatial_index"])
+    long_name = getattr(space, "LongName", "Unknown")
+    start = time.perf_counter()
+    try:
+        points = space_points(space, _STATE["settings"], _STATE["options"], _STATE["geometry"])
+        error = None
+    except Exception as e:
+        points, error = np.zeros((0, 3)), f"{type(e).__name__}: {e}"
+    return SpaceResult(space.GlobalId, level_name, long_name, points, time.perf_counter() - start, error)
+
+
+def _process_chunk(space_ids) -> list:
+    model = _STATE["model"]
+    return [_process_space(model.by_id(space_id)) for space_id in space_ids]
+
+
+def extract_room_points(path: str, options: RoomPointOptions = RoomPointOptions(), workers: int = 1,
+                        memory_limit_mb: int = 0, use_cache: bool = True, on_result=None,
+                        geometry_cache: Optional[GeometryCache] = None, metrics: Optional[Metrics] = None) -> list:
+    """
+    Samples every IfcSpace of the model at ``path`` and returns one SpaceResult per space,
+    in model order whatever the number of ``workers``. ``on_result(done, total)`` is called
+    after every finished chunk; an exception it raises stops the run. With ``geometry_cache``
+    the mesh engine reads the space meshes from the persistent cache, tessellating them there
+    first if needed.
+    """
+    metrics = metrics or Metrics()
+    with metrics.phase(OPEN):
+        model = model_cache.open_model(path, use_cache)
+    spaces = model.by_type("IfcSpace")
+    geometry, geometry_key = None, None
+    if options.engine == ENGINE_OCC or not (geometry_cache and geometry_cache.enabled):
+        geometry_cache = None
+    elif spaces:
+        # Stored once here, then only read by the workers
+        with metrics.phase(GEOMETRY):
+            geometry_key = geometry_cache.key(path, SPACE_CLASSES)
+            geometry = geometry_cache.load(path, model, include=SPACE_CLASSES, key=geometry_key)
+    space_ids = [space.id() for space in spaces]
+
+    chunk_size = max(1, math.ceil(len(space_ids) / max(1, workers * CHUNKS_PER_WORKER)))
+    chunks = [space_ids[i:i + chunk_size] for i in range(0, len(space_ids), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        # map_ordered runs in-process: reuse the model opened above through the model cache
+        initializer, initargs = _init_state, (model, options, geometry)
+    else:
+        initializer, initargs = _init_worker, (path, options, geometry_cache, geometry_key)
+
+    done = []
+
+    def report(result):
+        done.extend(result.item)
+        if on_result:
+            on_result(len(done), len(space_ids))
+
+    try:
+        with metrics.phase(GEOMETRY):
+            results = parallel.map_ordered(
+                _process_chunk,
+                chunks,
+                workers=workers,
+                memory_limit_mb=memory_limit_mb,
+                initializer=initializer,
+                initargs=initargs,
+                on_result=report,
+            )
+    finally:
+        # In-process runs must not keep the model alive beyond the cache
+        _STATE.clear()
+
+    space_results = []
+    for chunk in results:
+        if chunk.ok:
+            space_results.extend(chunk.value)
+            continue
+        # The whole chunk was lost, e.g. its worker crashed
+        spatial_index = SpatialIndex(model)
+        for space_id in chunk.item:
+            space = model.by_id(space_id)
+            elevation, level_name = get_storey_elevation(space, spatial_index)
+            space_results.append(SpaceResult(
+                space.GlobalId, level_name, getattr(space, "LongName", "Unknown"), np.zeros((0, 3)), error=chunk.error
+            ))
+    failed = sum(1 for result in space_results if result.error)
+    metrics.count(PROCESSED, len(space_results) - failed)
+    metrics.count(FAILED, failed)
+    return space_results
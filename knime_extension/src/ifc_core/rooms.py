@@ -0,0 +1,263 @@
+"""
+Room containment queries used by the IFC Intersection node.
+
+A RoomTree answers "which room elements completely contain this point" for
+batches of points, from the room model's cached geometry. Trees are kept per
+room model content, so every element model mapped against the same rooms file
+reuses one tree. Its data is the GeometrySet stored by the geometry cache, so it
+is reloaded memory-mapped on later runs instead of being rebuilt by tessellation.
+"""
+import concurrent.futures
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from . import model_cache, solids
+from .geometry_cache import GeometryCache, iterator_products
+from .metrics import GEOMETRY as GEOMETRY_PHASE, INDEX, OPEN, PROCESSED, Metrics
+from .options import GEOMETRY, TOPOLOGY_FIRST
+from .spatial import SpatialIndex
+
+# Room trees kept in memory per process
+MAX_TREES = 4
+
+# Above this many rooms the broad phase goes through a grid instead of testing every room box
+GRID_MIN_ROOMS = 64
+
+# Points closer than this to the surface of a room [m] are inside it, e.g. on a face shared by two rooms
+BOUNDARY_TOLERANCE = 1e-6
+
+
+class RoomTree:
+    """
+    Point containment against the triangulated elements of a rooms model. Points within
+    ``tolerance`` [m] of the surface of a room are inside it.
+    """
+
+    def __init__(self, geometry, tolerance: float = BOUNDARY_TOLERANCE):
+        self.geometry = geometry
+        self.tolerance = tolerance
+        self.ids = np.asarray(geometry.ids)
+        # Room boxes grown by the tolerance, so the broad phase keeps the points on their faces
+        self.bounds = np.asarray(geometry.bounds) + np.array([-tolerance] * 3 + [tolerance] * 3)
+        self._triangles = {}
+        self._grid = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def triangles(self, i: int) -> np.ndarray:
+        """
+        (F,3,3) world triangles of room ``i``, assembled once.
+        """
+        triangles = self._triangles.get(i)
+        if triangles is None:
+            vertices, faces = self.geometry.mesh(i)
+            triangles = self._triangles[i] = vertices[faces]
+        return triangles
+
+    def _build_grid(self):
+        """
+        Buckets the room boxes into a uniform XY grid with cells the size of a typical room,
+        as ``(cell keys, room indices)`` sorted by cell key.
+        """
+        low, high = self.bounds[:, :2], self.bounds[:, 3:5]
+        self._origin = low.min(axis=0)
+        self._cell = max(float(np.median(high - low)), 1e-6)
+        first = np.floor((low - self._origin) / self._cell).astype(np.int64)
+        last = np.floor((high - self._origin) / self._cell).astype(np.int64)
+        self._rows = int(last[:, 1].max()) + 1
+
+        # Every (cell, room) pair of the cells a room box overlaps
+        spans = last - first + 1
+        counts = spans.prod(axis=1)
+        rooms = np.repeat(np.arange(len(self.bounds)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = first[rooms, 0] + offsets // spans[rooms, 1]
+        cy = first[rooms, 1] + offsets % spans[rooms, 1]
+        keys = cx * self._rows + cy
+        order = np.argsort(keys, kind="stable")
+        self._grid = keys[order], rooms[order]
+
+    def candidates(self, points: np.ndarray) -> tuple:
+        """
+        Broad phase: ``(point indices, room indices)`` of all point/room bounding box hits.
+        Small room sets are tested all at once; larger ones through a uniform XY grid, so the
+        work grows with the number of points rather than points times rooms.
+        """
+        if len(self.bounds) > GRID_MIN_ROOMS:
+            return self._grid_candidates(points)
+        point_hits, room_hits = [], []
+        step = max(1, solids.CHUNK_PAIRS // max(len(self.bounds), 1))
+        for start in range(0, len(points), step):
+            chunk = points[start:start + step, None, :]
+            hits = np.all((chunk >= self.bounds[None, :, :3]) & (chunk <= self.bounds[None, :, 3:]), axis=2)
+            p, r = np.nonzero(hits)
+            point_hits.append(p + start)
+            room_hits.append(r)
+        if not point_hits:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(point_hits), np.concatenate(room_hits)
+
+    def _grid_candidates(self, points: np.ndarray) -> tuple:
+        if self._grid is None:
+            self._build_grid()
+        keys, rooms = self._grid
+        cells = np.floor((points[:, :2] - self._origin) / self._cell).astype(np.int64)
+        inside = np.all(cells >= 0, axis=1) & (cells[:, 1] < self._rows)
+        point_keys = np.where(inside, cells[:, 0] * self._rows + cells[:, 1], -1)
+
+        # All rooms registered in the cell of every point, then the exact box test
+        starts = np.searchsorted(keys, point_keys, side="left")
+        counts = np.searchsorted(keys, point_keys, side="right") - starts
+        point_hits = np.repeat(np.arange(len(points)), counts)
+        positions = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(starts, counts)
+        room_hits = rooms[positions]
+        box = self.bounds[room_hits]
+        hit = np.all((points[point_hits] >= box[:, :3]) & (points[point_hits] <= box[:, 3:]), axis=1)
+        return point_hits[hit], room_hits[hit]
+
+    def select(self, points: np.ndarray, threads: int = 1) -> list:
+        """
+        For every point of ``points`` (N,3) [m], the step ids of the elements containing it, in model order.
+        Only the point/room pairs passing the bounding box broad phase are tested exactly, one group
+        of points per room, with the groups spread over ``threads`` threads.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        point_hits, room_hits = self.candidates(points)
+
+        order = np.argsort(room_hits, kind="stable")
+        point_hits, room_hits = point_hits[order], room_hits[order]
+        rooms, starts = np.unique(room_hits, return_index=True)
+        groups = [(int(room), point_hits[start:end]) for room, start, end in zip(rooms, starts, [*starts[1:], len(order)])]
+
+        def exact(group):
+            room, candidates = group
+            return room, candidates[solids.contains(points[candidates], self.triangles(room), self.tolerance)]
+
+        # NumPy releases the GIL in the winding number kernels, so threads run the groups concurrently
+        if threads > 1 and len(groups) > 1:
+            for group in groups:
+                self.triangles(group[0])
+            with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+                results = list(pool.map(exact, groups))
+        else:
+            results = [exact(group) for group in groups]
+
+        matches = [[] for _ in range(len(points))]
+        for room, inside in results:
+            for n in inside:
+                matches[n].append(int(self.ids[room]))
+        return matches
+
+
+_TREES = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def room_tree(path: str, geometry_cache: GeometryCache, model=None) -> RoomTree:
+    """
+    The RoomTree of the rooms model at ``path``, shared by all callers in the process
+    while the file content is unchanged.
+    """
+    key = geometry_cache.key(path)
+    with _LOCK:
+        tree = _TREES.get(key)
+        if tree is not None:
+            _TREES.move_to_end(key)
+            return tree
+
+    tree = RoomTree(geometry_cache.load(path, model))
+    with _LOCK:
+        _TREES[key] = tree
+        while len(_TREES) > MAX_TREES:
+            _TREES.popitem(last=False)
+    return tree
+
+
+def _row(element_guid: str, rooms: list, method: str) -> dict:
+    return {
+        "ElementGUID": str(element_guid),
+        "IsContained": str(rooms[0]) if rooms else "",
+        "ContainingRooms": ";".join(room.GlobalId for room in rooms),
+        "Method": method,
+    }
+
+
+def _by_guid(model, guid: str):
+    try:
+        return model.by_guid(guid)
+    except RuntimeError:
+        return None
+
+
+def map_elements_to_rooms(rooms_path: str, elements_path: str, geometry_cache: GeometryCache,
+                          use_cache: bool = True, threads: int = 1, method: str = GEOMETRY,
+                          metrics: Optional[Metrics] = None) -> list:
+    """
+    Returns ``{"ElementGUID", "IsContained", "ContainingRooms", "Method"}`` rows for the elements
+    of the elements model. ``IsContained`` is the first rooms model element whose geometry contains
+    the element's bounding box centroid (empty if none), ``ContainingRooms`` the GlobalIds of all
+    of them, separated by ``;``.
+
+    With ``method`` TOPOLOGY_FIRST, elements contained in, referenced in or bounding IfcSpaces of
+    the elements model are assigned to the rooms model spaces with the same GlobalId, and only
+    the remaining elements are tessellated and located geometrically. ``Method`` records which
+    relationship (see ``spatial.SpatialIndex.spaces``) or ``Geometry`` decided each row.
+    """
+    metrics = metrics or Metrics()
+    with metrics.phase(OPEN):
+        ifc_rooms = model_cache.open_model(rooms_path, use_cache)
+        ifc_elements = model_cache.open_model(elements_path, use_cache)
+
+    rows = {}
+    unresolved = ()
+    if method == TOPOLOGY_FIRST:
+        with metrics.phase(INDEX):
+            spatial_index = SpatialIndex(ifc_elements)
+            elements = iterator_products(ifc_elements)
+            unresolved = []
+            for elem in elements:
+                relationship, spaces = spatial_index.spaces(elem)
+                rooms = [room for room in (_by_guid(ifc_rooms, space.GlobalId) for space in spaces) if room is not None]
+                if rooms:
+                    rows[elem.id()] = _row(elem.GlobalId, rooms, relationship)
+                else:
+                    unresolved.append(elem)
+        if not unresolved:
+            metrics.count(PROCESSED, len(rows))
+            return [rows[elem.id()] for elem in elements]
+
+    with metrics.phase(GEOMETRY_PHASE):
+        tree = room_tree(rooms_path, geometry_cache, ifc_rooms)
+        geometry = geometry_cache.load(elements_path, ifc_elements, include=unresolved)
+
+        # All centroids are queried in one batch
+        matches = tree.select(geometry.shape_bbox_centroids(), threads)
+    for step_id, element_guid, rooms in zip(geometry.ids.tolist(), geometry.guids.tolist(), matches):
+        rows[step_id] = _row(element_guid, [ifc_rooms.by_id(room) for room in rooms], GEOMETRY)
+    metrics.count(PROCESSED, len(rows))
+
+    if method == TOPOLOGY_FIRST:
+        return [rows[elem.id()] for elem in elements if elem.id() in rows]
+    return list(rows.values())
+
+
+def path_pairs(rooms_paths, elements_paths) -> list:
+    """
+    Distinct rooms/elements path pairs: a single path on one side is paired with every
+    path of the other side, otherwise the paths are paired by position.
+    """
+    rooms_paths, elements_paths = list(rooms_paths), list(elements_paths)
+    if len(rooms_paths) == 1:
+        rooms_paths = rooms_paths * len(elements_paths)
+    elif len(elements_paths) == 1:
+        elements_paths = elements_paths * len(rooms_paths)
+    elif len(rooms_paths) != len(elements_paths):
+        raise ValueError(
+            "There must be as many rooms paths as elements paths, or a single path on one side "
+            f"(got {len(rooms_paths)} rooms and {len(elements_paths)} elements paths)."
+        )
+    return list(dict.fromkeys(zip(rooms_paths, elements_paths)))
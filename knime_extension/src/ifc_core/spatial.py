@@ -0,0 +1,112 @@
+"""
+One-pass index of the spatial structure of a model.
+
+Looking up the storey of an element by scanning every IfcRelContainedInSpatialStructure
+(or IfcRelAggregates) and testing membership in its related objects is O(N) per element
+and O(N²) per model. SpatialIndex reads those relationships once and keeps both
+directions (site -> building -> storey -> space -> elements and back) as dictionaries.
+"""
+
+# Relationships assigning elements to spaces, as reported by SpatialIndex.spaces
+CONTAINMENT = "Containment"
+REFERENCE = "Reference"
+SPACE_BOUNDARY = "SpaceBoundary"
+
+
+class SpatialIndex:
+    """
+    Spatial hierarchy of a model built from IfcRelAggregates, IfcRelContainedInSpatialStructure,
+    IfcRelReferencedInSpatialStructure and IfcRelSpaceBoundary.
+    """
+
+    def __init__(self, model):
+        self.parents = {}
+        self.children = {}
+        self.containers = {}
+        self.contents = {}
+        self.referenced_in = {}
+        self.bounded_spaces = {}
+
+        for rel in model.by_type("IfcRelAggregates"):
+            parent = rel.RelatingObject
+            for obj in rel.RelatedObjects:
+                self.parents.setdefault(obj.id(), parent)
+                self.children.setdefault(parent.id(), []).append(obj)
+
+        for rel in model.by_type("IfcRelContainedInSpatialStructure"):
+            structure = rel.RelatingStructure
+            for elem in rel.RelatedElements:
+                self.containers.setdefault(elem.id(), structure)
+                self.contents.setdefault(structure.id(), []).append(elem)
+
+        for rel in model.by_type("IfcRelReferencedInSpatialStructure"):
+            for elem in rel.RelatedElements:
+                self.referenced_in.setdefault(elem.id(), []).append(rel.RelatingStructure)
+
+        for rel in model.by_type("IfcRelSpaceBoundary"):
+            elem, space = rel.RelatedBuildingElement, rel.RelatingSpace
+            if elem is None or space is None:
+                continue
+            spaces = self.bounded_spaces.setdefault(elem.id(), [])
+            if space not in spaces:
+                spaces.append(space)
+
+    def parent(self, obj):
+        """
+        Aggregating object (IfcRelAggregates) of ``obj``, or None.
+        """
+        return self.parents.get(obj.id())
+
+    def container(self, elem):
+        """
+        Spatial structure element directly containing ``elem``, or None.
+        """
+        return self.containers.get(elem.id())
+
+    def contained(self, structure) -> list:
+        """
+        Elements directly contained in ``structure``.
+        """
+        return self.contents.get(structure.id(), [])
+
+    def decomposed(self, obj) -> list:
+        """
+        Objects aggregated by ``obj`` (e.g. the storeys of a building, the spaces of a storey).
+        """
+        return self.children.get(obj.id(), [])
+
+    def ancestors(self, elem):
+        """
+        Yields the spatial container or aggregating parent of ``elem``, then theirs, up to the project.
+        """
+        seen = {elem.id()}
+        obj = self.container(elem) or self.parent(elem)
+        while obj is not None and obj.id() not in seen:
+            seen.add(obj.id())
+            yield obj
+            obj = self.container(obj) or self.parent(obj)
+
+    def storey(self, elem):
+        """
+        Nearest IfcBuildingStorey above ``elem`` in the spatial hierarchy, or None.
+        """
+        for obj in self.ancestors(elem):
+            if obj.is_a("IfcBuildingStorey"):
+                return obj
+        return None
+
+    def spaces(self, elem) -> tuple:
+        """
+        ``(relationship, spaces)`` assigning ``elem`` to IfcSpaces, by decreasing reliability:
+        contained in a space, referenced in spaces, or bounding spaces. ``(None, [])`` if none applies.
+        """
+        container = self.container(elem)
+        if container is not None and container.is_a("IfcSpace"):
+            return CONTAINMENT, [container]
+        referenced = [s for s in self.referenced_in.get(elem.id(), []) if s.is_a("IfcSpace")]
+        if referenced:
+            return REFERENCE, referenced
+        bounded = [s for s in self.bounded_spaces.get(elem.id(), []) if s.is_a("IfcSpace")]
+        if bounded:
+            return SPACE_BOUNDARY, bounded
+        return None, []
@@ -0,0 +1,362 @@
+"""
+Lightweight scan of IFC-SPF (STEP) files for the IFC Building Info node.
+
+Reading one IfcBuilding and its property sets does not need the full model.
+The file is memory-mapped and searched with byte-level regular expressions: the
+header, the first IFCBUILDING record (the search stops there), the property
+relationships pointing to it and the few records they reference, found by a
+binary search over the ascending entity ids. Only these records are tokenized.
+
+Anything the scan does not reproduce exactly as ``ifcopenshell.util.element.get_psets``
+(type property sets, complex or bounded properties, unusual encodings, ...)
+raises ScanError, and the caller falls back to the full parser.
+"""
+import functools
+import mmap
+import re
+from typing import NamedTuple
+
+import ifcopenshell.ifcopenshell_wrapper as wrapper
+
+
+class ScanError(ValueError):
+    """
+    The file cannot be read by the scanner; it needs the full parser.
+    """
+
+
+class Ref(NamedTuple):
+    id: int
+
+
+class Enum(NamedTuple):
+    value: str
+
+
+class Number(NamedTuple):
+    text: str
+
+
+class Typed(NamedTuple):
+    name: str
+    args: list
+
+
+_TOKEN = re.compile(rb"""\s*(?:
+    (?P<string>'(?:[^']|'')*')
+  | (?P<ref>\#\d+)
+  | (?P<enum>\.[A-Za-z0-9_]+\.)
+  | (?P<number>[+-]?\d+(?:\.\d*)?(?:[Ee][+-]?\d+)?)
+  | (?P<typed>[A-Za-z][A-Za-z0-9_]*)\s*\(
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<comma>,)
+  | (?P<null>[$*])
+)""", re.X)
+
+_ESCAPE = re.compile(r"\\\\|\\X2\\((?:[0-9A-F]{4})+)\\X0\\|\\X4\\((?:[0-9A-F]{8})+)\\X0\\|\\X\\([0-9A-F]{2})|\\S\\(.)|\\PA\\")
+
+_HEADER = re.compile(rb"HEADER\s*;(.*?)ENDSEC\s*;", re.S)
+_HEADER_RECORD = re.compile(rb"(FILE_DESCRIPTION|FILE_NAME|FILE_SCHEMA)\s*\(")
+_DATA = re.compile(rb"DATA\s*;")
+# Keyword-first patterns are much faster to search; the record id is read backwards from the match
+_BUILDING = re.compile(rb"IFCBUILDING\s*\(")
+# Whole relationship records; strings may contain ';'
+_RELATION = re.compile(rb"(IFCRELDEFINESBY(?:PROPERTIES|TYPE))\s*\(((?:'(?:[^']|'')*'|[^;'])*)\)\s*;")
+_RECORD_ID = re.compile(rb";\s*#(\d+)\s*=\s*$")
+_NEXT_RECORD = re.compile(rb";\s*#(\d+)\s*=")
+
+# Below this span the binary search hands over to a direct search
+_SEARCH_WINDOW = 4096
+
+_SIMPLE_QUANTITIES = {
+    "IFCQUANTITYLENGTH", "IFCQUANTITYAREA", "IFCQUANTITYVOLUME", "IFCQUANTITYCOUNT",
+    "IFCQUANTITYWEIGHT", "IFCQUANTITYTIME", "IFCQUANTITYNUMBER",
+}
+
+
+def _decode(raw: bytes) -> str:
+    try:
+        text = raw[1:-1].decode("ascii").replace("''", "'")
+    except UnicodeDecodeError:
+        raise ScanError("Non-ASCII characters in a string.")
+
+    def replace(match):
+        if match.group(0) == "\\\\":
+            return "\\"
+        if match.group(1) or match.group(2):
+            digits, width = (match.group(1), 4) if match.group(1) else (match.group(2), 8)
+            data = bytes.fromhex(digits)
+            return data.decode("utf-16-be" if width == 4 else "utf-32-be")
+        if match.group(3):
+            return bytes.fromhex(match.group(3)).decode("latin-1")
+        if match.group(4):
+            return chr(ord(match.group(4)) + 128)
+        return ""
+
+    decoded = _ESCAPE.sub(replace, text)
+    if "\\" in _ESCAPE.sub("", text):
+        raise ScanError("Unsupported string escape.")
+    return decoded
+
+
+def parse_arguments(data, pos: int) -> tuple:
+    """
+    Parses the STEP parameter list starting after the opening parenthesis at ``pos``,
+    returns ``(values, position after the closing parenthesis)``.
+    """
+    values = []
+    while True:
+        match = _TOKEN.match(data, pos)
+        if match is None:
+            raise ScanError(f"Unexpected content at byte {pos}.")
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == "close":
+            return values, pos
+        if kind == "comma":
+            continue
+        if kind == "open":
+            value, pos = parse_arguments(data, pos)
+        elif kind == "typed":
+            args, pos = parse_arguments(data, pos)
+            value = Typed(match.group(kind).decode().upper(), args)
+        elif kind == "string":
+            value = _decode(match.group(kind))
+        elif kind == "ref":
+            value = Ref(int(match.group(kind)[1:]))
+        elif kind == "enum":
+            value = Enum(match.group(kind)[1:-1].decode().upper())
+        elif kind == "number":
+            value = Number(match.group(kind).decode())
+        else:
+            value = None
+        values.append(value)
+
+
+@functools.lru_cache(maxsize=None)
+def _simple_type(schema: str, type_name: str, attribute: int = -1):
+    """
+    Underlying EXPRESS simple type (``string``, ``real``, ...) of a defined type, or of the
+    ``attribute``-th attribute of an entity. None for anything else.
+    """
+    try:
+        declaration = wrapper.schema_by_name(schema).declaration_by_name(type_name)
+    except (RuntimeError, IndexError):
+        return None
+    kind = declaration.all_attributes()[attribute].type_of_attribute() if attribute >= 0 else declaration.declared_type()
+    while isinstance(kind, wrapper.named_type):
+        declaration = kind.declared_type()
+        if not isinstance(declaration, wrapper.type_declaration):
+            return None
+        kind = declaration.declared_type()
+    return kind.declared_type() if isinstance(kind, wrapper.simple_type) else None
+
+
+def _convert(value, simple_type):
+    if value is None:
+        return None
+    if simple_type == "string" and isinstance(value, str):
+        return value
+    if simple_type == "integer" and isinstance(value, Number):
+        return int(value.text)
+    if simple_type in ("real", "number") and isinstance(value, Number):
+        return float(value.text)
+    if simple_type in ("boolean", "logical") and isinstance(value, Enum) and value.value in ("T", "F"):
+        return value.value == "T"
+    raise ScanError(f"Unsupported value {value!r} of type {simple_type}.")
+
+
+def _typed_value(schema: str, value):
+    # IfcValue select: always written as a typed value
+    if value is None:
+        return None
+    if not isinstance(value, Typed) or len(value.args) != 1:
+        raise ScanError(f"Unsupported property value {value!r}.")
+    return _convert(value.args[0], _simple_type(schema, value.name))
+
+
+class StepFile:
+    """
+    Memory-mapped IFC-SPF file with the record lookups the scan needs.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            try:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ScanError("Empty file.")
+        if not self.data[:64].lstrip().startswith(b"ISO-10303-21"):
+            self.close()
+            raise ScanError("Not an IFC-SPF file (compressed or XML?).")
+        header = _HEADER.search(self.data)
+        data = _DATA.search(self.data, header.end()) if header else None
+        if data is None:
+            self.close()
+            raise ScanError("No HEADER or DATA section.")
+        self.header_section = header.group(1)
+        # Keeps the ';' of "DATA;" so every record follows a ';'
+        self.start, self.end = data.end() - 1, len(self.data)
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def header(self) -> dict:
+        """
+        ``FILE_DESCRIPTION``, ``FILE_NAME`` and ``FILE_SCHEMA`` argument lists by record name.
+        """
+        records = {}
+        for match in _HEADER_RECORD.finditer(self.header_section):
+            records[match.group(1).decode()], _ = parse_arguments(self.header_section, match.end())
+        return records
+
+    def _find(self, step_id: int, start: int):
+        pattern = re.compile(rb";\s*#%d\s*=\s*([A-Za-z0-9_]+)\s*\(" % step_id)
+        return pattern.search(self.data, start, self.end)
+
+    def record(self, step_id: int) -> Typed:
+        """
+        The record ``#step_id``. Files written with ascending ids are binary searched;
+        others are searched from the start of the DATA section.
+        """
+        low, high = self.start, self.end
+        while high - low > _SEARCH_WINDOW:
+            middle = (low + high) // 2
+            match = _NEXT_RECORD.search(self.data, middle, self.end)
+            if match is None or int(match.group(1)) > step_id:
+                high = middle
+            else:
+                low = match.start()
+                if int(match.group(1)) == step_id:
+                    break
+        match = self._find(step_id, low) or self._find(step_id, self.start)
+        if match is None:
+            raise ScanError(f"Record #{step_id} not found.")
+        args, _ = parse_arguments(self.data, match.end())
+        return Typed(match.group(1).decode().upper(), args)
+
+    def records(self, pattern: re.Pattern):
+        """
+        ``(step id, match)`` of the records whose entity name and arguments match ``pattern``,
+        lazily, so a search can stop at the first one. Matches inside strings are skipped.
+        """
+        for match in pattern.finditer(self.data, self.start, self.end):
+            head = self.data[max(self.start, match.start() - 64):match.start()]
+            record_id = _RECORD_ID.search(head)
+            if record_id:
+                yield int(record_id.group(1)), match
+
+    def relations(self, step_id: int) -> list:
+        """
+        ``(relationship id, IFCRELDEFINESBYPROPERTIES/TYPE, arguments)`` of the relationships
+        whose RelatedObjects include ``#step_id``.
+        """
+        reference = re.compile(rb"#%d(?!\d)" % step_id)
+        relations = []
+        for relation_id, match in self.records(_RELATION):
+            if reference.search(match.group(2)):
+                args, _ = parse_arguments(self.data, match.start(2))
+                if isinstance(args[4], list) and Ref(step_id) in args[4]:
+                    relations.append((relation_id, match.group(1).decode(), args))
+        return relations
+
+
+def header_row(description, implementation_level, name, time_stamp, author, organization,
+               preprocessor_version, originating_system, authorization, schemas) -> dict:
+    """
+    File header metadata as one flat dict; list values are joined with "; ".
+    """
+    def text(value):
+        if isinstance(value, (list, tuple)):
+            return "; ".join(str(v) for v in value if v is not None)
+        return "" if value is None else str(value)
+
+    return {
+        "FileSchema": text(schemas[:1]),
+        "FileDescription": text(description),
+        "FileImplementationLevel": text(implementation_level),
+        "FileName": text(name),
+        "FileTimeStamp": text(time_stamp),
+        "FileAuthor": text(author),
+        "FileOrganization": text(organization),
+        "FilePreprocessorVersion": text(preprocessor_version),
+        "FileOriginatingSystem": text(originating_system),
+        "FileAuthorization": text(authorization),
+    }
+
+
+def _header_row(records: dict) -> dict:
+    description = (records.get("FILE_DESCRIPTION") or []) + [None] * 2
+    name = (records.get("FILE_NAME") or []) + [None] * 7
+    schemas = (records.get("FILE_SCHEMA") or [[]])[0] or []
+    return header_row(*description[:2], *name[:7], schemas)
+
+
+def _properties(step_file: StepFile, schema: str, definition: Typed) -> dict:
+    """
+    Properties of a property set or quantity set, as ``ifcopenshell.util.element.get_property_definition``.
+    """
+    props = {}
+    if definition.name == "IFCPROPERTYSET":
+        for ref in definition.args[4] or []:
+            prop = step_file.record(ref.id)
+            name = prop.args[0]
+            if prop.name == "IFCPROPERTYSINGLEVALUE":
+                props[name] = _typed_value(schema, prop.args[2])
+            elif prop.name in ("IFCPROPERTYENUMERATEDVALUE", "IFCPROPERTYLISTVALUE"):
+                values = prop.args[2]
+                props[name] = [_typed_value(schema, v) for v in values] if values else None
+            else:
+                raise ScanError(f"Unsupported property {prop.name}.")
+    elif definition.name == "IFCELEMENTQUANTITY":
+        for ref in definition.args[5] or []:
+            quantity = step_file.record(ref.id)
+            if quantity.name not in _SIMPLE_QUANTITIES:
+                raise ScanError(f"Unsupported quantity {quantity.name}.")
+            props[quantity.args[0]] = _convert(quantity.args[3], _simple_type(schema, quantity.name, 3))
+    else:
+        raise ScanError(f"Unsupported property definition {definition.name}.")
+    return props
+
+
+def scan_building(path: str) -> tuple:
+    """
+    Returns ``(header, properties)`` of the file at ``path``: the file header metadata (see ``header_row``)
+    and the merged property and quantity sets of its IfcBuilding with the lowest step id, equal to the row built from
+    ``ifcopenshell.util.element.get_psets``. Raises ScanError when the file needs the full parser.
+    """
+    with StepFile(path) as step_file:
+        records = step_file.header()
+        header = _header_row(records)
+        schema = header["FileSchema"].upper()
+        if not schema or _simple_type(schema, "IfcLabel") != "string":
+            raise ScanError(f"Unsupported schema '{schema}'.")
+
+        # The lowest step id, as the first of ``model.by_type("IfcBuilding")``
+        building = min((step_id for step_id, _ in step_file.records(_BUILDING)), default=None)
+        if building is None:
+            raise ScanError("No IfcBuilding record found.")
+
+        psets = {}
+        # Inverse relationships are ordered by id, as in IfcOpenShell
+        for relation_id, relation, args in sorted(step_file.relations(building)):
+            if relation == "IFCRELDEFINESBYTYPE":
+                raise ScanError("The IfcBuilding has a type; its property sets need the full parser.")
+            if not isinstance(args[5], Ref):
+                raise ScanError("Unsupported property set definition set.")
+            definition = step_file.record(args[5].id)
+            props = _properties(step_file, schema, definition)
+            props["id"] = args[5].id
+            psets.setdefault(definition.args[2], {}).update(props)
+
+    row = {}
+    for pset in psets.values():
+        row.update(pset)
+    return header, row
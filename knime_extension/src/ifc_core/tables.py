@@ -0,0 +1,226 @@
+"""
+Output tables of the extractions as pandas DataFrames.
+
+The KNIME nodes and the command line (see ``batch``) build their outputs
+through these functions, so both produce the same columns.
+"""
+import logging
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .bounds import ElementBounds, element_bounds, product_bounds
+from .connectivity import room_connectivity
+from .geometry_cache import GeometryCache, iterator_products
+from .metrics import GEOMETRY as GEOMETRY_PHASE, INDEX, PROCESSED, TABLE, Metrics
+from .offsets import offset_points
+from .options import DEFAULT_CLASSES, DEFAULT_DISTANCE, GEOMETRY
+from .room_points import RoomPointOptions, extract_room_points
+from .revisions import RevisionStore, incremental_table
+from .rooms import map_elements_to_rooms
+from .spatial import SpatialIndex
+
+LOGGER = logging.getLogger(__name__)
+
+CENTROID_COLUMNS = ["X", "Y", "Z", "GlobalID", "Level"]
+OFFSET_COLUMNS = ["X", "Y", "Z", "GlobalID", "PointType", "IfcClass", "CenterSource"]
+ROOM_POINT_COLUMNS = ["X", "Y", "Z", "GlobalID", "Level", "LongName"]
+SPACE_SUMMARY_COLUMNS = ["GlobalID", "Level", "LongName", "Points", "Seconds", "Status", "Error"]
+# Per-space summary columns added to every room point row on request
+SPACE_DETAIL_COLUMNS = {"Points": "SpacePoints", "Seconds": "SpaceSeconds", "Status": "SpaceStatus", "Error": "SpaceError"}
+ROOM_MAPPING_COLUMNS = ["ElementGUID", "IsContained", "ContainingRooms", "Method"]
+CONNECTIVITY_COLUMNS = ["DoorGUID", "IfcClass", "RoomA", "RoomB"]
+
+
+def storey_name(element, spatial_index: SpatialIndex) -> str:
+    """
+    Name of the IfcBuildingStorey the element belongs to, or ``Unknown``.
+    """
+    storey = spatial_index.container(element)
+    if storey is not None and storey.is_a("IfcBuildingStorey"):
+        return storey.Name
+    return "Unknown"
+
+
+def building_table(rows: Sequence[dict]) -> pd.DataFrame:
+    """
+    One string row per ``building.read_building`` result; columns missing in a model stay empty.
+    """
+    return pd.DataFrame(list(rows)).astype("string")
+
+
+def centroid_table(path: str, model, geometry_cache: GeometryCache, include: Sequence[str] = (),
+                   exclude: Sequence[str] = (), threads: int = 0, fast: bool = False,
+                   metrics: Optional[Metrics] = None) -> pd.DataFrame:
+    """
+    Bounding box centroid [mm] and storey name of every element (see ``bounds.element_bounds``).
+    """
+    metrics = metrics or Metrics()
+    with metrics.phase(GEOMETRY_PHASE):
+        bounds = element_bounds(path, model, geometry_cache, include, exclude, threads, fast)
+    if not len(bounds.ids):
+        raise RuntimeError("Unable to initialize the geometry iterator.")
+    return _centroid_frame(model, bounds, metrics)
+
+
+def incremental_centroid_table(path: str, open_model: Callable, geometry_cache: GeometryCache,
+                               revisions: RevisionStore, include: Sequence[str] = (), exclude: Sequence[str] = (),
+                               threads: int = 0, fast: bool = False, metrics: Optional[Metrics] = None) -> pd.DataFrame:
+    """
+    ``centroid_table`` with a ChangeFlag column, where only the elements whose definition, shape or
+    placement changed since the previous run are tessellated again (see ``revisions.incremental_table``).
+    ``open_model()`` is only called when the file changed.
+    """
+    products = []
+
+    def select(model):
+        # Rather more candidates than the geometry iterator returns: those without geometry get no row
+        products.extend(iterator_products(model, include, exclude, openings=True))
+        return products
+
+    def extract(model, changed, metrics):
+        with metrics.phase(GEOMETRY_PHASE):
+            if len(changed) == len(products):
+                # Nothing to reuse: the whole model goes through the geometry cache
+                bounds = element_bounds(path, model, geometry_cache, include, exclude, threads, fast)
+            else:
+                bounds = product_bounds(model, changed, threads, fast)
+        return pa.Table.from_pandas(_centroid_frame(model, bounds, metrics), preserve_index=False)
+
+    table = incremental_table(
+        revisions, path, "centroids", {"include": list(include), "exclude": list(exclude), "fast": fast},
+        "GlobalID", open_model, select, extract, geometry=True, metrics=metrics,
+    )
+    return table.to_pandas()
+
+
+def _centroid_frame(model, bounds: ElementBounds, metrics: Metrics) -> pd.DataFrame:
+    metrics.count("analytic", bounds.analytic)
+    with metrics.phase(INDEX):
+        spatial_index = SpatialIndex(model)
+    with metrics.phase(TABLE):
+        levels = []
+        for n, step_id in enumerate(bounds.ids.tolist()):
+            metrics.progress(n, len(bounds.ids), f"Located {n} of {len(bounds.ids)} elements")
+            element = model.by_id(int(step_id))
+            levels.append(storey_name(element, spatial_index) if element else "Unknown")
+
+        centroids = bounds.centroids() * 1000
+        data = {
+            "X": centroids[:, 0],
+            "Y": centroids[:, 1],
+            "Z": centroids[:, 2],
+            "GlobalID": [str(guid) for guid in bounds.guids],
+            "Level": levels,
+        }
+        table = pd.DataFrame(data, columns=CENTROID_COLUMNS)
+    metrics.count(PROCESSED, len(table))
+    return table
+
+
+def door_offset_table(path: str, model, classes: Sequence[str] = DEFAULT_CLASSES, distance: float = DEFAULT_DISTANCE,
+                      geometry_cache: Optional[GeometryCache] = None, threads: int = 0,
+                      metrics: Optional[Metrics] = None) -> pd.DataFrame:
+    """
+    Positive and negative offset point [mm] of every element of ``classes``, one after the other,
+    for each of its bounding boxes (see ``offsets.offset_points``).
+    """
+    metrics = metrics or Metrics()
+    with metrics.phase(GEOMETRY_PHASE):
+        points = offset_points(path, model, classes, distance, geometry_cache, threads)
+    metrics.count(PROCESSED, len(set(points.guids)))
+    with metrics.phase(TABLE):
+        coordinates = np.stack([points.positive, points.negative], axis=1).reshape(-1, 3)
+        data = {
+            "X": coordinates[:, 0],
+            "Y": coordinates[:, 1],
+            "Z": coordinates[:, 2],
+            "GlobalID": np.repeat(np.array(points.guids, dtype=object), 2),
+            "PointType": ["Offset_Pos", "Offset_Neg"] * len(points.guids),
+            "IfcClass": np.repeat(np.array(points.classes, dtype=object), 2),
+            "CenterSource": np.repeat(np.array(points.sources, dtype=object), 2),
+        }
+        return pd.DataFrame(data, columns=OFFSET_COLUMNS)
+
+
+def room_point_tables(path: str, options: RoomPointOptions = RoomPointOptions(), workers: int = 1,
+                      memory_limit_mb: int = 0, use_cache: bool = True, on_result=None,
+                      geometry_cache: Optional[GeometryCache] = None,
+                      metrics: Optional[Metrics] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Interior points [mm] of every IfcSpace and a summary row per space with its point count,
+    processing time and error (see ``room_points.extract_room_points``).
+    """
+    metrics = metrics or Metrics()
+    results = extract_room_points(
+        path, options, workers, memory_limit_mb, use_cache, on_result, geometry_cache, metrics
+    )
+
+    with metrics.phase(TABLE):
+        return _room_point_frames(results)
+
+
+def _room_point_frames(results) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    frames = []
+    summary = []
+    for result in results:
+        if result.error:
+            LOGGER.warning(f"Failed to process space {result.global_id}: {result.error}")
+        points = pd.DataFrame(result.points * 1000, columns=["X", "Y", "Z"])
+        points["GlobalID"] = result.global_id
+        points["Level"] = result.level
+        points["LongName"] = result.long_name
+        frames.append(points)
+        summary.append([
+            result.global_id, result.level, result.long_name, len(result.points),
+            result.seconds, "Failed" if result.error else "OK", result.error or "",
+        ])
+
+    points_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ROOM_POINT_COLUMNS)
+    return points_df[ROOM_POINT_COLUMNS], pd.DataFrame(summary, columns=SPACE_SUMMARY_COLUMNS)
+
+
+def with_space_summary(points_df: pd.DataFrame, summary_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Room points with the summary of their space in SpacePoints, SpaceSeconds, SpaceStatus and
+    SpaceError columns. Spaces without points (e.g. failed ones) get one row with missing X/Y/Z.
+    """
+    details = summary_df.rename(columns=SPACE_DETAIL_COLUMNS)
+    detail_columns = list(SPACE_DETAIL_COLUMNS.values())
+    points = points_df.merge(details[["GlobalID"] + detail_columns], on="GlobalID", how="left")
+    empty = details[~details["GlobalID"].isin(points_df["GlobalID"])]
+    if empty.empty:
+        return points
+    empty = empty.assign(X=np.nan, Y=np.nan, Z=np.nan)[ROOM_POINT_COLUMNS + detail_columns]
+    return pd.concat([points, empty], ignore_index=True)
+
+
+def room_mapping_table(rooms_path: str, elements_path: str, geometry_cache: GeometryCache, use_cache: bool = True,
+                       threads: int = 1, method: str = GEOMETRY, metrics: Optional[Metrics] = None) -> pd.DataFrame:
+    """
+    Containing rooms of the elements of one model pair (see ``rooms.map_elements_to_rooms``),
+    followed by the paths of the pair.
+    """
+    metrics = metrics or Metrics()
+    rows = map_elements_to_rooms(rooms_path, elements_path, geometry_cache, use_cache, threads, method, metrics)
+    with metrics.phase(TABLE):
+        elements_df = pd.DataFrame(rows, columns=ROOM_MAPPING_COLUMNS).astype(str)
+        elements_df["RoomsModelPath"] = rooms_path
+        elements_df["ElementsModelPath"] = elements_path
+    return elements_df
+
+
+def connectivity_table(path: str, model, geometry_cache: GeometryCache, classes: Sequence[str] = DEFAULT_CLASSES,
+                       distance: float = DEFAULT_DISTANCE, threads: int = 1,
+                       metrics: Optional[Metrics] = None) -> pd.DataFrame:
+    """
+    One room adjacency edge per door (see ``connectivity.room_connectivity``).
+    """
+    metrics = metrics or Metrics()
+    with metrics.phase(GEOMETRY_PHASE):
+        edges = room_connectivity(path, model, geometry_cache, classes, distance, threads)
+    metrics.count(PROCESSED, len(edges))
+    with metrics.phase(TABLE):
+        return pd.DataFrame(edges, columns=CONNECTIVITY_COLUMNS).astype(str)
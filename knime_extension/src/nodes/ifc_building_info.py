@@ -1,8 +1,10 @@
+import functools
+
 import knime_extension as knext
-import ifcopenshell
-from ifcopenshell.util import element
-import pandas as pd
+from ifc_core.metrics import TABLE
 from .categories import category
+from .parameters import ModelCacheSettings, ParallelSettings
+from .utils import map_models, node_metrics, publish_metrics
 
 
 # IFC Building Info Reader Node
@@ -27,35 +29,40 @@ class IFCBuilding:
     #model_param = knext.stringParameter("Model Path", "The classic placeholder", "foobar")
     models_column = knext.ColumnParameter("Model List Column","Paths of IFC Models",port_index=0)
 
-    def ifcopenshellreader(self, path):
-        model = ifcopenshell.open(path)
+    fast_scan = knext.BoolParameter(
+        "Fast Scan",
+        "Scan the file for the IfcBuilding and its property sets instead of parsing the whole model. "
+        "Files the scanner cannot read exactly are parsed in full, so the output is the same.",
+        default_value=True,
+        since_version="2.1.0",
+    )
 
-        building = model.by_type('IfcBuilding')
-        buildPset=element.get_psets(building[0])
-        dict={}
-        if buildPset:             
-            for ps in buildPset.values():
-                dict.update(ps)   
-        df = pd.DataFrame({building[0].GlobalId: dict})  
-        df = df.transpose()
-        return df
+    header = knext.BoolParameter(
+        "File Header Columns",
+        "Append the schema and the file header metadata (FILE_DESCRIPTION, FILE_NAME) as File* columns.",
+        default_value=False,
+        since_version="2.1.0",
+    )
+
+    parallel = ParallelSettings()
+    cache = ModelCacheSettings()
 
     def configure(self, configure_context, input_schema_1):
         return input_schema_1
 
     def execute(self, exec_context, input_1):
+        from ifc_core import building
+        from ifc_core.tables import building_table
 
         df_models_list = input_1.to_pandas()
+        metrics = node_metrics(exec_context)
 
-        df_list = []
-
-        for model in df_models_list['Path']:
-            df_list.append(self.ifcopenshellreader(model))
+        read_building = functools.partial(building.read_building, fast_scan=self.fast_scan, header=self.header)
+        rows = map_models(exec_context, read_building, df_models_list['Path'], self.parallel, self.cache, metrics)
 
-        df_full = pd.concat(df_list, ignore_index=True)
-        
-        #df_full = df_full.convert_dtypes()
-        df_full = df_full.astype('string')
+        with metrics.phase(TABLE):
+            df_full = building_table(rows)
+        publish_metrics(exec_context, metrics)
 
         #https://github.com/mdjska/daylight-analysis/blob/main/daylight_analysis_load_IFC_data.py
         #https://community.osarch.org/discussion/510/ifcopenshell-get-wall-layers-and-materials
@@ -1,9 +1,10 @@
 import knime_extension as knext
-import ifcopenshell
-import ifcopenshell.util.placement
-import pandas as pd
-import numpy as np
+from ifc_core.metrics import OPEN
+from ifc_core.options import DEFAULT_CLASSES, DEFAULT_DISTANCE, split_names
 from .categories import category
+from .parameters import GeometryCacheSettings, ModelCacheSettings
+from .utils import (node_metrics, open_geometry_cache, open_model, publish_cache_stats,
+                    publish_geometry_cache_stats, publish_metrics)
 
 # Node development reference links:
 # https://www.knime.com/blog/4-steps-for-your-python-team-to-develop-knime-nodes
@@ -21,20 +22,48 @@ from .categories import category
     after="",
 )
 @knext.input_table(name="IFC Path Table", description="Table containing IFC model paths")
-@knext.output_table(name="Door Offset Points", description="Offset points for IfcDoor elements")
+@knext.output_table(name="Door Offset Points", description="Offset points for IfcDoor elements (or the configured classes)")
 
 
 class IFCDoorOffsetPointsExtractor:
+    """
+    This node computes two points on either side of every door (or window, opening, ...): the element's center
+    moved by the offset distance along the Y axis of its placement, in both directions. Coordinates are in millimeters.
+    The center is taken from every IfcBoundingBox item of the element's representation, with one pair of points per
+    item, or from the element's geometry when there is none.
+    """
     path_column = knext.ColumnParameter(
         "IFC Path Column",
         "Column containing the path to the IFC file",
         port_index=0,
     )
 
+    classes = knext.StringParameter(
+        "IFC Classes",
+        "Comma-separated IFC classes to compute offset points for, subclasses included (e.g. IfcDoor, IfcWindow, IfcOpeningElement).",
+        default_value=", ".join(DEFAULT_CLASSES),
+        since_version="2.1.0",
+    )
+
+    distance = knext.DoubleParameter(
+        "Offset Distance [mm]",
+        "Distance of the offset points from the element center, in millimeters.",
+        default_value=DEFAULT_DISTANCE,
+        min_value=0.0,
+        since_version="2.1.0",
+    )
+
+    cache = ModelCacheSettings()
+
+    geometry_cache = GeometryCacheSettings()
+
     def configure(self, configure_context, input_schema):
         return None
 
     def execute(self, exec_context, input_table):
+        import pandas as pd
+        from ifc_core.tables import door_offset_table
+
         df = input_table.to_pandas()
 
         if df.empty:
@@ -43,50 +72,20 @@ class IFCDoorOffsetPointsExtractor:
             raise ValueError(f"The specified column '{self.path_column}' is not present in the input table.")
 
         ifc_path = df[self.path_column].iloc[0]
-        model = ifcopenshell.open(ifc_path)
-        doors = model.by_type("IfcDoor")
-
-        offset_distance = 1500.0  # Already in millimeters
-        data = []
-
-        for door in doors:
-            try:
-                placement = door.ObjectPlacement
-                matrix = ifcopenshell.util.placement.get_local_placement(placement)
-
-                if not door.Representation:
-                    continue
-
-                direction_y = matrix[:3, 1]
-                norm_y = direction_y / np.linalg.norm(direction_y)
-
-                for rep in door.Representation.Representations:
-                    if rep.RepresentationType == "BoundingBox":
-                        for item in rep.Items:
-                            if item.is_a("IfcBoundingBox"):
-                                corner = np.array(item.Corner.Coordinates, dtype=float)
-                                x_dim, y_dim, z_dim = float(item.XDim), float(item.YDim), float(item.ZDim)
-                                center_local = corner + np.array([x_dim, y_dim, z_dim], dtype=float) / 2.0
-                                center_global = matrix[:3, :3] @ center_local + matrix[:3, 3]
-
-                                # No conversion necessary: all values are in millimeters
-                                offset_pos = center_global + offset_distance * norm_y
-                                offset_neg = center_global - offset_distance * norm_y
-
-                                for pt, label in zip([offset_pos, offset_neg], ["Offset_Pos", "Offset_Neg"]):
-                                    data.append([
-                                        float(pt[0]),
-                                        float(pt[1]),
-                                        float(pt[2]),
-                                        door.GlobalId,
-                                        label
-                                    ])
-
-            except Exception as e:
-                print(f"Error processing door {door.GlobalId}: {e}")
-                continue
-
-        result_df = pd.DataFrame(data, columns=["X", "Y", "Z", "GlobalID", "PointType"])
+        metrics = node_metrics(exec_context)
+        with metrics.phase(OPEN):
+            model = open_model(ifc_path, self.cache)
+        publish_cache_stats(exec_context)
+
+        classes = split_names(self.classes)
+        if not classes:
+            raise ValueError("At least one IFC class is required.")
+
+        # Elements without an IfcBoundingBox are located by their (cached) tessellation
+        cache = open_geometry_cache(self.geometry_cache)
+        result_df = door_offset_table(ifc_path, model, classes, self.distance, cache, metrics=metrics)
+        publish_geometry_cache_stats(exec_context, cache)
+        publish_metrics(exec_context, metrics)
 
         # Optional: keep float precision for KNIME output
         pd.options.display.float_format = '{:.8f}'.format
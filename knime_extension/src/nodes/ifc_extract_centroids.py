@@ -1,11 +1,12 @@
+import functools
+
 import knime_extension as knext
-import ifcopenshell
-from ifcopenshell.util import element
-import ifcopenshell.util.shape
-import ifcopenshell.geom
-import multiprocessing
-import pandas as pd
+from ifc_core.metrics import OPEN
+from ifc_core.options import split_names
 from .categories import category
+from .parameters import GeometryCacheSettings, IncrementalSettings, ModelCacheSettings
+from .utils import (node_metrics, open_geometry_cache, open_model, open_revision_store, publish_cache_stats,
+                    publish_geometry_cache_stats, publish_metrics)
 
 # Node development reference links:
 # https://www.knime.com/blog/4-steps-for-your-python-team-to-develop-knime-nodes
@@ -14,6 +15,9 @@ from .categories import category
 
 #IFC Extract Element Centroids Node
 
+MODE_FULL = "Full Tessellation"
+MODE_FAST = "Bounding Box Fast"
+
 @knext.node(
     name="IFC Element Centroids",
     node_type=knext.NodeType.SOURCE,
@@ -29,6 +33,9 @@ class IFCCentroidExtractor:
     """
     This node reads an IFC file and computes the 3D bounding box centroid for each element.
     The output table contains coordinates (in millimeters), the element GlobalId, the building storey name
+    With incremental extraction only the elements whose definition, shape or placement changed since the
+    previous run on the same model path are tessellated, and a ChangeFlag column is added.
+    The time spent per phase and the element counts are published as ifc_metrics_* flow variables.
     """
 
     path_column = knext.ColumnParameter(
@@ -37,21 +44,50 @@ class IFCCentroidExtractor:
         port_index=0,
     )
 
-    def get_storey_name(self, element, model):
-        """
-        Retrieve the name of the IfcBuildingStorey to which the element belongs.
-        """
-        for rel in model.by_type("IfcRelContainedInSpatialStructure"):
-            if element in rel.RelatedElements:
-                storey = rel.RelatingStructure
-                if storey.is_a("IfcBuildingStorey"):
-                    return storey.Name
-        return "Unknown"
+    mode = knext.StringParameter(
+        "Geometry Mode",
+        "Full Tessellation triangulates every element. Bounding Box Fast derives the bounding box of elements "
+        "made of extruded rectangles, circles or polylines, or with an IfcBoundingBox representation, "
+        "from their definition and placement, and only tessellates the remaining elements.",
+        default_value=MODE_FULL,
+        enum=[MODE_FULL, MODE_FAST],
+        since_version="2.1.0",
+    )
+
+    include_classes = knext.StringParameter(
+        "Include IFC Classes",
+        "Comma-separated IFC classes to process, subclasses included (e.g. IfcWall, IfcDoor). Empty processes all classes.",
+        default_value="",
+        since_version="2.1.0",
+    )
+
+    exclude_classes = knext.StringParameter(
+        "Exclude IFC Classes",
+        "Comma-separated IFC classes to skip, subclasses included (e.g. IfcSpace). Ignored when classes are included.",
+        default_value="",
+        since_version="2.1.0",
+    )
+
+    threads = knext.IntParameter(
+        "Threads",
+        "Number of threads of the geometry iterator. 0 uses all processors.",
+        default_value=0,
+        min_value=0,
+        since_version="2.1.0",
+    )
+
+    cache = ModelCacheSettings()
+
+    geometry_cache = GeometryCacheSettings()
+
+    incremental = IncrementalSettings()
 
     def configure(self, configure_context, input_schema_1):
         return None
 
     def execute(self, exec_context, input_1):
+        from ifc_core.tables import centroid_table, incremental_centroid_table
+
         df = input_1.to_pandas()
 
         if df.empty:
@@ -60,48 +96,41 @@ class IFCCentroidExtractor:
             raise ValueError(f"The specified column '{self.path_column}' is not present in the input table.")
 
         ifc_path = df[self.path_column].iloc[0]
-        print(f"[INFO] Opening IFC file: {ifc_path}")
-        model = ifcopenshell.open(ifc_path)
-
-        settings = ifcopenshell.geom.settings()
-        settings.set(settings.USE_WORLD_COORDS, True)
-
-        iterator = ifcopenshell.geom.iterator(settings, model, multiprocessing.cpu_count())
-        if not iterator.initialize():
-            raise RuntimeError("Unable to initialize the geometry iterator.")
-
-        print("[INFO] Geometry iterator initialized. Starting extraction of centroids...")
-
-        data = []
-        processed = 0
-        failed = 0
-
-        while True:
-            shape = iterator.get()
-            if not shape:
-                break
-
-            element = model.by_id(shape.id)
-            global_id = element.GlobalId if element else "N/A"
-            level = self.get_storey_name(element, model) if element else "Unknown"
-
-            try:
-                centroid = ifcopenshell.util.shape.get_bbox_centroid(shape.geometry)
-                centroid_mm = [coord * 1000 for coord in centroid]
-                data.append([*centroid_mm, global_id, level])
-                print(f"[OK] Found centroid for: {global_id}")
-                processed += 1
-            except Exception as e:
-                print(f"[ERROR] Failed to get centroid for {global_id}: {e}")
-                failed += 1
-
-            if not iterator.next():
-                break
-
-        print(f"[DONE] Centroid extraction completed.")
-        print(f"         Success: {processed}")
-        print(f"         Failed : {failed}")
-        print(f"         Total   : {processed + failed}")
-
-        result_df = pd.DataFrame(data, columns=["X", "Y", "Z", "GlobalID", "Level"])
-        return knext.Table.from_pandas(result_df)
\ No newline at end of file
+        metrics = node_metrics(exec_context)
+        cache = open_geometry_cache(self.geometry_cache)
+        revisions = open_revision_store(self.incremental)
+        include = split_names(self.include_classes)
+        exclude = split_names(self.exclude_classes)
+        fast = self.mode == MODE_FAST
+
+        if revisions is not None:
+            # The model is only opened when the file changed since the previous run
+            result_df = incremental_centroid_table(
+                ifc_path,
+                functools.partial(open_model, ifc_path, self.cache),
+                cache,
+                revisions,
+                include=include,
+                exclude=exclude,
+                threads=self.threads,
+                fast=fast,
+                metrics=metrics,
+            )
+        else:
+            with metrics.phase(OPEN):
+                model = open_model(ifc_path, self.cache)
+            result_df = centroid_table(
+                ifc_path,
+                model,
+                cache,
+                include=include,
+                exclude=exclude,
+                threads=self.threads,
+                fast=fast,
+                metrics=metrics,
+            )
+        publish_cache_stats(exec_context)
+        publish_geometry_cache_stats(exec_context, cache)
+        publish_metrics(exec_context, metrics)
+
+        return knext.Table.from_pandas(result_df)
@@ -1,18 +1,10 @@
 import knime_extension as knext
-import ifcopenshell
-from ifcopenshell.util import element, classification, placement
-import ifcopenshell.geom
-import ifcopenshell.util.shape
-import pandas as pd
-import numpy as np
 import os
+from ifc_core.options import ENGINE_MESH, ENGINE_OCC
 from .categories import category
-
-from OCC.Core.BRepClass3d import BRepClass3d_SolidClassifier
-from OCC.Core.TopAbs import TopAbs_IN
-from OCC.Core.Bnd import Bnd_Box
-from OCC.Core.gp import gp_Pnt
-from OCC.Core.BRepBndLib import brepbndlib
+from .parameters import GeometryCacheSettings, ModelCacheSettings, ParallelSettings
+from .utils import (node_metrics, open_geometry_cache, publish_cache_stats, publish_geometry_cache_stats,
+                    publish_metrics, publish_space_summary)
 
 # Node development reference links:
 # https://www.knime.com/blog/4-steps-for-your-python-team-to-develop-knime-nodes
@@ -33,8 +25,11 @@ from OCC.Core.BRepBndLib import brepbndlib
 
 class ExtractRoomVolumePoints:
     """
-    Extracts interior points within each room in an IFC file using OpenCascade geometry,
-    returning a 3D point cloud with room metadata.
+    Extracts interior points within each room in an IFC file, returning a 3D point cloud with room metadata.
+    Points are classified either in bulk against the tessellated room (NumPy Mesh) or one by one with
+    OpenCascade's solid classifier (reference mode). The number of spaces, failed spaces and points,
+    the processing time and the error of every failed space are exposed as ifc_space_summary_* flow variables;
+    "Space Summary Columns" adds the summary of its space to every row.
     """
 
     path_column = knext.ColumnParameter(
@@ -55,67 +50,46 @@ class ExtractRoomVolumePoints:
         default_value=100,
     )
 
-    def get_storey_elevation(self, space, ifc_file):
-        for rel in ifc_file.by_type("IfcRelAggregates"):
-            if space in rel.RelatedObjects:
-                storey = rel.RelatingObject
-                if storey.is_a("IfcBuildingStorey"):
-                    elevation = getattr(storey, 'Elevation', 0.0)
-                    return elevation, getattr(storey, 'Name', 'Unknown')
-        return 0.0, "Unknown"
-
-    def get_shape_geometry(self, space, spacing, min_offset):
-        settings = ifcopenshell.geom.settings()
-        settings.set("USE_WORLD_COORDS", True)
-        settings.set("USE_PYTHON_OPENCASCADE", True)
-
-        extracted_points = []
-
-        try:
-            shape = ifcopenshell.geom.create_shape(settings, space)
-            brep_shape = shape.geometry
-
-            bbox = Bnd_Box()
-            brepbndlib.Add(brep_shape, bbox)
-            xmin, ymin, zmin, xmax, ymax, zmax = bbox.Get()
-
-            classifier = BRepClass3d_SolidClassifier(brep_shape)
-
-            x_coords = np.arange(xmin, xmax, spacing)
-            y_coords = np.arange(ymin, ymax, spacing)
-
-            for x in x_coords:
-                for y in y_coords:
-                    floor_point = gp_Pnt(x, y, zmin + 0.01)
-                    classifier.Perform(floor_point, 1e-6)
-                    if classifier.State() != TopAbs_IN:
-                        continue
-
-                    z_coords = np.arange(zmin + spacing, zmax, spacing)
-                    for z in z_coords:
-                        point = gp_Pnt(x, y, z)
-                        classifier.Perform(point, 1e-6)
-                        if classifier.State() == TopAbs_IN:
-                            extracted_points.append((x, y, z))
-
-            # Buffer zone
-            offset_m = min_offset / 1000.0
-            filtered_points = [
-                (x, y, z) for x, y, z in extracted_points
-                if (x > xmin + offset_m and x < xmax - offset_m and
-                    y > ymin + offset_m and y < ymax - offset_m and
-                    z > zmin + offset_m and z < zmax - offset_m)
-            ]
-
-            return filtered_points
-
-        except Exception as e:
-            return []
+    engine = knext.StringParameter(
+        "Classification Engine",
+        "NumPy Mesh tessellates each room once and classifies the whole grid at once with winding numbers. "
+        "OpenCascade classifies every point with BRepClass3d_SolidClassifier; it is much slower and kept as reference.",
+        default_value=ENGINE_MESH,
+        enum=[ENGINE_MESH, ENGINE_OCC],
+        since_version="2.1.0",
+    )
+
+    adaptive = knext.BoolParameter(
+        "Adaptive Sampling",
+        "Classify coarse cells of the grid first and subdivide only the cells crossing the room boundary. "
+        "Returns the same grid points with far fewer classifications on large rooms. NumPy Mesh engine only.",
+        default_value=True,
+        since_version="2.1.0",
+    )
+
+    space_summary = knext.BoolParameter(
+        "Space Summary Columns",
+        "Add the point count, processing time [s], status and error of the space to every row "
+        "(SpacePoints, SpaceSeconds, SpaceStatus, SpaceError). Spaces without points, e.g. failed ones, "
+        "then get one row with missing X/Y/Z.",
+        default_value=False,
+        since_version="2.1.0",
+    )
+
+    parallel = ParallelSettings()
+
+    cache = ModelCacheSettings()
+
+    geometry_cache = GeometryCacheSettings()
 
     def configure(self, configure_context, input_schema_1):
         return None
 
     def execute(self, exec_context, input_1):
+        from ifc_core import model_cache
+        from ifc_core.room_points import RoomPointOptions
+        from ifc_core.tables import room_point_tables, with_space_summary
+
         df = input_1.to_pandas()
 
         if df.empty:
@@ -126,23 +100,36 @@ class ExtractRoomVolumePoints:
         if not os.path.exists(ifc_path):
             raise ValueError(f"File not found: {ifc_path}")
 
-        ifc_file = ifcopenshell.open(ifc_path)
-        spaces = ifc_file.by_type("IfcSpace")
-
-        data = []
-
-        for space in spaces:
-            try:
-                elevation, level_name = self.get_storey_elevation(space, ifc_file)
-                long_name = getattr(space, "LongName", "Unknown")
-
-                spacing_m = self.spacing / 1000.0
-                points = self.get_shape_geometry(space,spacing_m, self.min_offset_mm)
-
-                for x, y, z in points:
-                    data.append([x * 1000, y * 1000, z * 1000, space.GlobalId, level_name, long_name])
-            except Exception:
-                continue
-
-        result_df = pd.DataFrame(data, columns=["X", "Y", "Z", "GlobalID", "Level", "LongName"])
-        return knext.Table.from_pandas(result_df)
\ No newline at end of file
+        options = RoomPointOptions(
+            spacing=self.spacing / 1000.0,
+            min_offset=self.min_offset_mm / 1000.0,
+            engine=self.engine,
+            adaptive=self.adaptive,
+        )
+        model_cache.set_budget(self.cache.budget_mb)
+        geometry_cache = open_geometry_cache(self.geometry_cache)
+        metrics = node_metrics(exec_context)
+        result_df, summary_df = room_point_tables(
+            ifc_path,
+            options,
+            workers=self.parallel.workers,
+            memory_limit_mb=self.parallel.memory_limit_mb,
+            use_cache=self.cache.enabled,
+            # Canceling stops the run after the current chunk of spaces
+            on_result=lambda done, total: metrics.progress(done, total, f"Processed {done} of {total} spaces"),
+            geometry_cache=geometry_cache,
+            metrics=metrics,
+        )
+        publish_cache_stats(exec_context)
+        publish_geometry_cache_stats(exec_context, geometry_cache)
+        publish_metrics(exec_context, metrics)
+
+        # Reported as flow variables, so the node keeps its single output port
+        failed = publish_space_summary(exec_context, summary_df)
+        if failed:
+            exec_context.set_warning(f"{failed} of {len(summary_df)} spaces could not be processed, "
+                                     f"see the ifc_space_summary_errors flow variable.")
+
+        if self.space_summary:
+            result_df = with_space_summary(result_df, summary_df)
+        return knext.Table.from_pandas(result_df)
@@ -1,10 +1,9 @@
 import knime_extension as knext
-import ifcopenshell
-import ifcopenshell.geom
-import ifcopenshell.util.shape
-import multiprocessing
-import pandas as pd
+from ifc_core.options import GEOMETRY, TOPOLOGY_FIRST
 from .categories import category
+from .parameters import GeometryCacheSettings, ModelCacheSettings
+from .utils import (node_metrics, open_geometry_cache, publish_cache_stats, publish_geometry_cache_stats,
+                    publish_metrics)
 
 # Node development reference links:
 # https://www.knime.com/blog/4-steps-for-your-python-team-to-develop-knime-nodes
@@ -22,73 +21,70 @@ from .categories import category
     )
 @knext.input_table(name="Rooms IFC File", description="Table containing paths to the IFC file with rooms")
 @knext.input_table(name="Elements IFC File", description="Table containing paths to the IFC file with elements")
-@knext.output_table(name="Elements with Room Mapping", description="Table containing elements and their respective rooms")
+@knext.output_table(name="Elements with Room Mapping", description="Table containing elements, their respective rooms and the model pair they come from")
 
 class IFCRoomMapping:
     """
-    This node processes two IFC files (one containing rooms and another containing elements) and determines which objects belong to which room.
+    This node processes pairs of IFC files (one containing rooms and another containing elements) and determines which objects belong to which room.
+    A single rooms file can be mapped against many element files; its room tree is built once and reused.
     """
     rooms_column = knext.ColumnParameter("Rooms IFC File Column", "Column containing the path to the IFC file with rooms", port_index=0)
     elements_column = knext.ColumnParameter("Elements IFC File Column", "Column containing the path to the IFC file with elements", port_index=1)
 
-    def map_elements_to_rooms(self, rooms_ifc_path, elements_ifc_path):
-        ifc_rooms = ifcopenshell.open(rooms_ifc_path)
-        ifc_elements = ifcopenshell.open(elements_ifc_path)
-
-        element_centroids = {}
-        settings = ifcopenshell.geom.settings()
-        iterator = ifcopenshell.geom.iterator(settings, ifc_elements, multiprocessing.cpu_count())
-
-        if iterator.initialize():
-            while True:
-                shape = iterator.get()
-                element = ifc_elements.by_id(shape.id)
-                guid = element.GlobalId
-                centroid = ifcopenshell.util.shape.get_shape_bbox_centroid(shape, shape.geometry)
-                element_centroids[shape.id] = centroid
-                if not iterator.next():
-                    break
-
-        tree = ifcopenshell.geom.tree()
-        iterator = ifcopenshell.geom.iterator(settings, ifc_rooms, multiprocessing.cpu_count())
-
-        if iterator.initialize():
-            while True:
-                native_shape = iterator.get_native()
-                if native_shape:
-                    tree.add_element(native_shape)
-                if not iterator.next():
-                    break
+    method = knext.StringParameter(
+        "Assignment Method",
+        "Geometry locates every element's centroid in the room geometry. Topology First assigns elements "
+        "contained in, referenced in or bounding an IfcSpace (IfcRelContainedInSpatialStructure, "
+        "IfcRelReferencedInSpatialStructure, IfcRelSpaceBoundary) to the rooms model space with the same GlobalId, "
+        "and only tessellates and locates the remaining elements. The Method column records the decision.",
+        default_value=GEOMETRY,
+        enum=[GEOMETRY, TOPOLOGY_FIRST],
+        since_version="2.1.0",
+    )
 
-        step_id_to_guid = {step_id: ifc_elements.by_id(step_id).GlobalId for step_id in element_centroids}
+    threads = knext.IntParameter(
+        "Threads",
+        "Number of threads running the exact containment tests. Only elements whose centroid lies in a room's "
+        "bounding box are tested exactly.",
+        default_value=1,
+        min_value=1,
+        since_version="2.1.0",
+    )
 
-        mapped_elements = []
-        for step_id, centroid in element_centroids.items():
-            element_guid = step_id_to_guid.get(step_id, "UNKNOWN_GUID")
-            matching_room = tree.select(centroid.tolist(), completely_whitin=True)
-            room_id = matching_room[0] if matching_room else ""
-            mapped_elements.append({
-                "ElementGUID": str(element_guid),
-                "IsContained": str(room_id)
-            })
+    cache = ModelCacheSettings()
 
-        elements_df = pd.DataFrame(mapped_elements).astype(str)
-        return elements_df
+    geometry_cache = GeometryCacheSettings()
 
     def configure(self, configure_context, input_schema_1, input_schema_2):
         if len(input_schema_1.column_names) == 0 or len(input_schema_2.column_names) == 0:
             raise ValueError("One or both input tables have no columns. Ensure they contain at least one column in KNIME.")
 
     def execute(self, exec_context, input_1, input_2):
+        import pandas as pd
+        from ifc_core import model_cache
+        from ifc_core.rooms import path_pairs
+        from ifc_core.tables import room_mapping_table
+
         df_rooms = input_1.to_pandas()
         df_elements = input_2.to_pandas()
 
         if df_rooms.empty or df_elements.empty:
             raise ValueError("One of the input tables is empty. Ensure valid IFC file paths are provided.")
 
-        rooms_path = df_rooms[self.rooms_column].iloc[0]
-        elements_path = df_elements[self.elements_column].iloc[0]
-
-        elements_df = self.map_elements_to_rooms(rooms_path, elements_path)
-
-        return knext.Table.from_pandas(elements_df) 
+        pairs = path_pairs(df_rooms[self.rooms_column], df_elements[self.elements_column])
+
+        # Elements models sharing a rooms file are mapped against the same room tree
+        geometry_cache = open_geometry_cache(self.geometry_cache)
+        model_cache.set_budget(self.cache.budget_mb)
+        metrics = node_metrics(exec_context)
+        frames = []
+        for n, (rooms_path, elements_path) in enumerate(pairs):
+            metrics.progress(n, len(pairs), f"Mapping {elements_path}")
+            frames.append(room_mapping_table(
+                rooms_path, elements_path, geometry_cache, self.cache.enabled, self.threads, self.method, metrics
+            ))
+        publish_cache_stats(exec_context)
+        publish_geometry_cache_stats(exec_context, geometry_cache)
+        publish_metrics(exec_context, metrics)
+
+        return knext.Table.from_pandas(pd.concat(frames, ignore_index=True))
@@ -1,9 +1,11 @@
+import functools
+
 import knime_extension as knext
-import ifcopenshell
-from ifcopenshell.util import element, classification, placement
-import ifcopenshell.util.shape
-import pandas as pd
+from ifc_core.metrics import OPEN, TABLE, Canceled, Metrics
+from ifc_core.options import split_names
 from .categories import category
+from .parameters import IncrementalSettings, ModelCacheSettings, ParallelSettings
+from .utils import map_models, node_metrics, open_model, open_revision_store, publish_cache_stats, publish_metrics
 
 import logging
 LOGGER = logging.getLogger(__name__)
@@ -14,6 +16,82 @@ LOGGER = logging.getLogger(__name__)
 # https://docs.knime.com/latest/pure_python_node_extensions_guide/index.html#_defining_custom_port_objects
 
 
+@knext.parameter_group(label="Content", since_version="2.1.0")
+class ContentSettings:
+    """
+    Restricts the extraction to the classes, property sets and feature groups that are needed.
+    Anything left out is not computed at all, so a narrow selection reads large models much faster.
+    """
+
+    include_classes = knext.StringParameter(
+        "Include IFC Classes",
+        "Comma-separated IFC classes to read, subclasses included (e.g. IfcWall, IfcDoor). Empty reads all classes.",
+        default_value="",
+    )
+
+    exclude_classes = knext.StringParameter(
+        "Exclude IFC Classes",
+        "Comma-separated IFC classes to skip, subclasses included (e.g. IfcSpace).",
+        default_value="",
+    )
+
+    psets = knext.StringParameter(
+        "Property Allow-List",
+        "Comma-separated property sets (e.g. Pset_WallCommon) or single properties "
+        "(e.g. Pset_WallCommon.FireRating) to extract. Empty extracts all property sets.",
+        default_value="",
+    )
+
+    classifications = knext.BoolParameter(
+        "Classifications", "Extract classification references.", default_value=True
+    )
+
+    materials = knext.BoolParameter(
+        "Materials", "Extract material names and layer thicknesses.", default_value=True
+    )
+
+    placement = knext.BoolParameter(
+        "Placement", "Extract the global X/Y/Z coordinates of the object placement.", default_value=True
+    )
+
+    def to_options(self):
+        """
+        The settings as ``reader.ReaderOptions``.
+        """
+        from ifc_core.reader import ReaderOptions
+
+        return ReaderOptions(
+            include_classes=split_names(self.include_classes),
+            exclude_classes=split_names(self.exclude_classes),
+            psets=split_names(self.psets),
+            classifications=self.classifications,
+            materials=self.materials,
+            placement=self.placement,
+        )
+
+
+@knext.parameter_group(label="Output", since_version="2.1.0")
+class OutputSettings:
+    """
+    Controls how the element rows are written to the output table.
+    """
+
+    streaming = knext.BoolParameter(
+        "Streaming Output",
+        "Write the rows in fixed-size batches while the models are walked, so memory is bounded by the "
+        "batch size instead of the number of elements. Every model is walked twice (once to determine "
+        "the columns) and the models are read one after another, ignoring the parallel execution settings.",
+        default_value=False,
+    )
+
+    batch_size = knext.IntParameter(
+        "Batch Size [rows]",
+        "Number of rows written per batch in streaming mode.",
+        default_value=10000,
+        min_value=1,
+    )
+
+
 # IFC Reader Node
 
 @knext.node(
@@ -29,153 +107,20 @@ LOGGER = logging.getLogger(__name__)
 class IFCReader:
     """
     KNIME node that reads IFC2x3 and IFC4 files (or later versions supported by IfcOpenShell),
-    and returns a dataframe where each row represents an IFC element, with properties,
-    classifications, materials, and placement data as columns.
+    and returns a table where each row represents an IFC element, with properties,
+    classifications, materials, and placement data as typed columns (numbers, booleans and strings
+    keep the type of the IFC value).
+    Several models can be read in parallel worker processes.
+    With incremental extraction only the elements changed since the previous run on the same model
+    path are read, and a ChangeFlag column (added, modified, unchanged, deleted) is added.
+    The time spent per phase and the element counts are published as ifc_metrics_* flow variables.
     """
 
-    def ifcopenshellreader(self, path: str) -> pd.DataFrame:
-        """
-        Opens an IFC file with IfcOpenShell and returns a dataframe
-        containing all elements found in the model.
-        Supports IFC2x3 and IFC4 formats.
-        """
-        model = ifcopenshell.open(path)
-        dict_rows = {}
-
-        # Get all building storeys (IfcBuildingStorey)
-        storeys = model.by_type("IfcBuildingStorey")
-        for storey in storeys:
-            elements = element.get_decomposition(storey)
-
-            for elem in elements:
-                subDict = {}
-
-                # 1) IFC type information
-                ifcType = elem.is_a()
-                subDict["ifcType"] = ifcType
-
-                ifcElementType = element.get_type(elem)
-                subDict["ifcElementType"] = ifcElementType
-
-                # 2) Classifications (e.g. OmniClass, Uniclass, etc.)
-                classificationReference = list(classification.get_references(elem))
-                for cl in classificationReference:
-                    try:
-                        source_name = cl.ReferencedSource.Name if cl.ReferencedSource else "UnknownSource"
-                        item_ref = cl.ItemReference if cl.ItemReference else "UnknownItem"
-                        className = source_name + "_" + item_ref[:2]
-                        subDict[className + ": ItemReference"] = item_ref
-                        if cl.Name:
-                            subDict[className + ": Name"] = cl.Name
-                    except:
-                        pass
-
-                # 3) Element name (parsing colon-separated names if present)
-                if elem.Name:
-                    if ":" in elem.Name:
-                        parts = elem.Name.split(":")
-                        if len(parts) > 1:
-                            subDict["ElementName"] = parts[1]
-                    else:
-                        subDict["ElementName"] = elem.Name
-
-                # 4) Property Sets (Psets)
-                pset = element.get_psets(elem)
-                if pset:
-                    for ps_values in pset.values():
-                        if ps_values:
-                            subDict.update(ps_values)
-
-                # 5) Tag and Type Tag (if available)
-                if hasattr(elem, "Tag") and elem.Tag:
-                    subDict["Tag"] = elem.Tag
-                if ifcElementType and hasattr(ifcElementType, "Tag") and ifcElementType.Tag:
-                    subDict["ifcElementTypeTag"] = ifcElementType.Tag
-
-                # 6) Materials (manual extraction approach)
-                associations = getattr(elem, "HasAssociations", []) or []
-                materialNumber = 0
-                usedMaterials = []
-                for assoc in associations:
-                    mat = getattr(assoc, "RelatingMaterial", None)
-                    if not mat:
-                        continue
-
-                    try:
-                        if mat.is_a('IfcMaterial'):
-                            mname = mat.Name
-                            if mname not in usedMaterials:
-                                usedMaterials.append(mname)
-                                materialNumber += 1
-                                subDict[f"Material_{str(materialNumber).zfill(3)}"] = mname
-
-                        elif mat.is_a('IfcMaterialList'):
-                            for m in mat.Materials:
-                                if m.Name not in usedMaterials:
-                                    usedMaterials.append(m.Name)
-                                    materialNumber += 1
-                                    subDict[f"Material_{str(materialNumber).zfill(3)}"] = m.Name
-
-                        elif mat.is_a('IfcMaterialLayerSetUsage'):
-                            layerSet = getattr(mat, "ForLayerSet", None)
-                            if layerSet and hasattr(layerSet, "MaterialLayers"):
-                                for lyr in layerSet.MaterialLayers:
-                                    mname = lyr.Material.Name if lyr.Material else "UnnamedLayer"
-                                    if mname not in usedMaterials:
-                                        usedMaterials.append(mname)
-                                        materialNumber += 1
-                                        subDict[f"Material_{str(materialNumber).zfill(3)}"] = mname
-                                    # Se vuoi anche salvare spessore
-                                    subDict[f"LayerThk_{str(materialNumber).zfill(3)}"] = lyr.LayerThickness
-
-                        elif mat.is_a('IfcMaterialConstituentSet'):
-                            constituents = getattr(mat, "MaterialConstituents", [])
-                            for c in constituents:
-                                if c.Material and c.Material.Name not in usedMaterials:
-                                    usedMaterials.append(c.Material.Name)
-                                    materialNumber += 1
-                                    subDict[f"Material_{str(materialNumber).zfill(3)}"] = c.Material.Name
-
-                        elif mat.is_a('IfcMaterialProfileSetUsage'):
-                            profSet = getattr(mat, "ForProfileSet", None)
-                            if profSet and hasattr(profSet, "MaterialProfiles"):
-                                for mp in profSet.MaterialProfiles:
-                                    if mp.Material and mp.Material.Name not in usedMaterials:
-                                        usedMaterials.append(mp.Material.Name)
-                                        materialNumber += 1
-                                        subDict[f"Material_{str(materialNumber).zfill(3)}"] = mp.Material.Name
-                                    # Se vuoi recuperare spessori da mp.Profile, dipende dal tipo di profilo, ecc.
-                    except:
-                        pass
-
-                # 6b) Optional: You could use IfcOpenShell utility functions instead (commented)
-                # - element.get_material_layers(elem)
-                # - element.get_material_profile_sets(elem)
-                # - element.get_material_constituents(elem)
-
-                # 7) Global coordinates (from ObjectPlacement)
-                locMatrix = placement.get_local_placement(elem.ObjectPlacement)
-                x, y, z = locMatrix[0][-1], locMatrix[1][-1], locMatrix[2][-1]
-                subDict["Global X"], subDict["Global Y"], subDict["Global Z"] = x, y, z
-
-                # 8) Clean up keys ending with whitespace
-                wrongKeys = [key for key in subDict if key.endswith(' ')]
-                for key in wrongKeys:
-                    value = subDict.pop(key)
-                    newKey = key.rstrip() + "(1)"
-                    subDict[newKey] = value
-
-                # 9) Store this element’s data using GlobalId
-                dict_rows[elem.GlobalId] = subDict
-
-        # Create dataframe and reset index
-        df = pd.DataFrame(dict_rows).transpose().reset_index()
-        df = df.rename(columns={'index': 'UniqueID'})
-
-        # Add source model path
-        df['ModelPath'] = path
-
-        return df
+    content = ContentSettings()
+    parallel = ParallelSettings()
+    cache = ModelCacheSettings()
+    output = OutputSettings()
+    incremental = IncrementalSettings()
 
     def configure(self, configure_context, input_schema_1):
         return None
@@ -183,20 +128,89 @@ class IFCReader:
     def execute(self, exec_context, input_1):
         """
         Executes the reading process on one or more IFC file paths
-        and merges the results into a single dataframe.
+        and merges the results into a single table.
         """
+        from ifc_core import reader
+        from ifc_core.columns import concat_tables, plain_table
+
         df_models_list = input_1.to_pandas()
+        options = self.content.to_options()
+        metrics = node_metrics(exec_context)
 
-        df_list = []
-        for model_path in df_models_list['Path']:
-            df_list.append(self.ifcopenshellreader(model_path))
+        revisions = open_revision_store(self.incremental)
 
-        df_full = pd.concat(df_list, ignore_index=True)
+        if self.output.streaming:
+            if revisions is not None:
+                exec_context.set_warning("Incremental extraction is not available with streaming output and was ignored.")
+            return self.execute_streaming(exec_context, list(df_models_list['Path']), options, metrics)
 
-        # Convert all fields to string type (optional, for KNIME compatibility)
-        df_full = df_full.astype('string')
+        read_model = functools.partial(reader.read_model, options=options, revisions=revisions)
+        tables = map_models(exec_context, read_model, df_models_list['Path'], self.parallel, self.cache, metrics)
 
-        return knext.Table.from_pandas(df_full)
+        # Columns of different models are aligned and widened to a common type
+        with metrics.phase(TABLE):
+            table_full = plain_table(concat_tables(tables))
+
+        publish_metrics(exec_context, metrics)
+        return knext.Table.from_pyarrow(table_full)
+
+    def execute_streaming(self, exec_context, paths, options, metrics):
+        """
+        Walks every model twice: first to collect the columns shared by all batches,
+        then to write the rows batch by batch. Models failing in either walk are logged
+        and skipped with a warning; rows written before a failure are kept.
+        """
+        from ifc_core import reader
+        from ifc_core.columns import merge_schemas, plain_table, TableBuilder
+
+        # The first walk fills the first half of the progress bar and is not counted
+        discovery = Metrics(metrics.on_progress, metrics.is_canceled)
+        schemas, readable = [], []
+        for n, path in enumerate(paths):
+            discovery.section(n, 2 * len(paths))
+            try:
+                with metrics.phase(OPEN):
+                    model = open_model(path, self.cache)
+                schema, _ = reader.discover_schema(model, path, options, discovery)
+            except Canceled:
+                raise
+            except Exception as e:
+                LOGGER.warning(f"Failed to process {path}: {e}")
+                continue
+            schemas.append(schema)
+            readable.append(path)
+
+        if not readable:
+            raise RuntimeError("None of the models could be processed, see the log for details.")
+
+        schema = merge_schemas(schemas)
+        output = knext.BatchOutputTable.create(row_ids="generate")
+        written, failed = 0, 0
+        for n, path in enumerate(readable):
+            metrics.section(len(readable) + n, 2 * len(readable))
+            # Batches written before a failure stay in the output, so the model may be incomplete
+            try:
+                with metrics.phase(OPEN):
+                    model = open_model(path, self.cache)
+                for batch in reader.iter_batches(model, path, schema, self.output.batch_size, options, metrics):
+                    with metrics.phase(TABLE):
+                        output.append(plain_table(batch))
+                    written += batch.num_rows
+            except Canceled:
+                raise
+            except Exception as e:
+                LOGGER.warning(f"Failed to write the rows of {path}: {e}")
+                failed += 1
+        failed += len(paths) - len(readable)
+        if failed:
+            exec_context.set_warning(f"{failed} of {len(paths)} models could not be processed, see the log for details.")
+
+        if written == 0:
+            output.append(plain_table(TableBuilder().finish(schema)))
+
+        publish_cache_stats(exec_context)
+        publish_metrics(exec_context, metrics)
+        return output
 
 
         #https://github.com/mdjska/daylight-analysis/blob/main/daylight_analysis_load_IFC_data.py
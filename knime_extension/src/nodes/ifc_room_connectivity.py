@@ -0,0 +1,98 @@
+import knime_extension as knext
+from ifc_core.metrics import OPEN
+from ifc_core.options import DEFAULT_CLASSES, DEFAULT_DISTANCE, split_names
+from .categories import category
+from .parameters import GeometryCacheSettings, ModelCacheSettings
+from .utils import (node_metrics, open_geometry_cache, open_model, publish_cache_stats,
+                    publish_geometry_cache_stats, publish_metrics)
+
+# Node development reference links:
+# https://www.knime.com/blog/4-steps-for-your-python-team-to-develop-knime-nodes
+# https://www.knime.com/blog/python-script-node-bundled-packages
+# https://docs.knime.com/latest/pure_python_node_extensions_guide/index.html#_defining_custom_port_objects
+
+
+# IFC Room Connectivity Node
+
+@knext.node(
+    name="IFC Room Connectivity",
+    node_type=knext.NodeType.SOURCE,
+    icon_path="icons/ifc.png",
+    category=category,
+    after="",
+)
+@knext.input_table(name="IFC Path Table", description="Table containing IFC model paths")
+@knext.output_table(name="Room Adjacency", description="One edge per door: the door GlobalId and the rooms on both of its sides")
+
+
+class IFCRoomConnectivity:
+    """
+    This node builds a room adjacency graph from the doors of an IFC file.
+    Both offset points of every door (as in IFC Door Offset XYZ) are located in the IfcSpace volumes
+    (as used by IFC Room Points) through a spatial index, which replaces the cross join of door offset
+    points and room points. RoomA holds the space on the positive side of the door, RoomB the one on the
+    negative side; a side outside of all spaces is left empty.
+    """
+
+    path_column = knext.ColumnParameter(
+        "IFC Path Column",
+        "Column containing the path to the IFC file",
+        port_index=0,
+    )
+
+    classes = knext.StringParameter(
+        "IFC Classes",
+        "Comma-separated IFC classes connecting rooms, subclasses included (e.g. IfcDoor, IfcOpeningElement).",
+        default_value=", ".join(DEFAULT_CLASSES),
+    )
+
+    distance = knext.DoubleParameter(
+        "Offset Distance [mm]",
+        "Distance of the offset points from the door center, in millimeters. "
+        "It must be larger than half the wall thickness to reach the rooms.",
+        default_value=DEFAULT_DISTANCE,
+        min_value=0.0,
+    )
+
+    threads = knext.IntParameter(
+        "Threads",
+        "Number of threads running the exact containment tests.",
+        default_value=1,
+        min_value=1,
+    )
+
+    cache = ModelCacheSettings()
+
+    geometry_cache = GeometryCacheSettings()
+
+    def configure(self, configure_context, input_schema):
+        return None
+
+    def execute(self, exec_context, input_table):
+        from ifc_core.tables import connectivity_table
+
+        df = input_table.to_pandas()
+
+        if df.empty:
+            raise ValueError("The input table is empty.")
+        if self.path_column not in df.columns:
+            raise ValueError(f"The specified column '{self.path_column}' is not present in the input table.")
+
+        classes = split_names(self.classes)
+        if not classes:
+            raise ValueError("At least one IFC class is required.")
+
+        ifc_path = df[self.path_column].iloc[0]
+        metrics = node_metrics(exec_context)
+        with metrics.phase(OPEN):
+            model = open_model(ifc_path, self.cache)
+        publish_cache_stats(exec_context)
+
+        cache = open_geometry_cache(self.geometry_cache)
+        result_df = connectivity_table(ifc_path, model, cache, classes, self.distance, self.threads, metrics)
+        publish_geometry_cache_stats(exec_context, cache)
+        publish_metrics(exec_context, metrics)
+        if not model.by_type("IfcSpace"):
+            exec_context.set_warning("The model has no IfcSpace elements; the adjacency table is empty.")
+
+        return knext.Table.from_pandas(result_df)
@@ -0,0 +1,106 @@
+import knime_extension as knext
+
+# Parameter groups shared by several IFC nodes
+
+
+@knext.parameter_group(label="Parallel Execution", since_version="2.1.0")
+class ParallelSettings:
+    """
+    Process-pool settings used when the node has to handle several IFC models or spaces.
+    """
+
+    workers = knext.IntParameter(
+        "Worker Processes",
+        "Number of worker processes handling IFC models (or the spaces of a model) at the same time. "
+        "With 1 everything is processed one after another inside the KNIME Python process.",
+        default_value=1,
+        min_value=1,
+    )
+
+    memory_limit_mb = knext.IntParameter(
+        "Worker Memory Limit [MB]",
+        "Maximum memory of each worker process (0 = unlimited). A model exceeding it is reported "
+        "as failed instead of stopping the node. Only enforced on Linux and macOS.",
+        default_value=0,
+        min_value=0,
+    )
+
+
+@knext.parameter_group(label="Model Cache", since_version="2.1.0")
+class ModelCacheSettings:
+    """
+    Parsed IFC models are kept in memory and reused by the BIM nodes running in the same
+    KNIME Python process, so a model is parsed once instead of once per node.
+    Cache statistics are published as flow variables.
+    """
+
+    enabled = knext.BoolParameter(
+        "Use Model Cache",
+        "Reuse an already parsed model when path, modification time, size and content are unchanged.",
+        default_value=True,
+    )
+
+    budget_mb = knext.IntParameter(
+        "Cache Memory Budget [MB]",
+        "Estimated memory the cached models may use. Least recently used models are evicted first.",
+        default_value=4096,
+        min_value=0,
+    )
+
+
+@knext.parameter_group(label="Geometry Cache", since_version="2.1.0")
+class GeometryCacheSettings:
+    """
+    Tessellated geometry is stored on disk per model content and geometry settings and
+    loaded memory-mapped by later runs and by the other geometry nodes, instead of
+    tessellating the model again.
+    """
+
+    enabled = knext.BoolParameter(
+        "Use Geometry Cache",
+        "Reuse tessellated geometry stored by an earlier run for an unchanged model.",
+        default_value=True,
+    )
+
+    directory = knext.StringParameter(
+        "Cache Directory",
+        "Directory of the geometry cache. Empty uses a folder in the system temporary directory.",
+        default_value="",
+    )
+
+    max_size_mb = knext.IntParameter(
+        "Cache Size Limit [MB]",
+        "Disk space the cache may use. Least recently used models are removed first.",
+        default_value=4096,
+        min_value=0,
+    )
+
+
+@knext.parameter_group(label="Incremental Extraction", since_version="2.1.0")
+class IncrementalSettings:
+    """
+    The output of every model is stored on disk with a fingerprint of each element (its attributes,
+    property sets, type, materials, classifications and placement chain). When the model at the same
+    path is run again, only new and changed elements are extracted and the stored rows are reused for
+    the others; an unchanged file is not even opened. A ChangeFlag column tells added, modified,
+    unchanged and deleted elements apart, deleted ones keeping their previous row.
+    """
+
+    enabled = knext.BoolParameter(
+        "Incremental Extraction",
+        "Only extract the elements that changed since the previous run on the same model path.",
+        default_value=False,
+    )
+
+    directory = knext.StringParameter(
+        "Store Directory",
+        "Directory of the stored outputs. Empty uses a folder in the system temporary directory.",
+        default_value="",
+    )
+
+    max_size_mb = knext.IntParameter(
+        "Store Size Limit [MB]",
+        "Disk space the stored outputs may use. Least recently used models are removed first.",
+        default_value=4096,
+        min_value=0,
+    )
@@ -0,0 +1,144 @@
+import functools
+import logging
+
+from ifc_core.metrics import FAILED, Metrics, measured
+
+LOGGER = logging.getLogger(__name__)
+
+# Helpers shared by the IFC node implementations.
+# IfcOpenShell, NumPy and multiprocessing are imported on first use, so registering the nodes stays cheap.
+
+
+def open_model(path, cache_settings):
+    """
+    Opens an IFC model through the shared model cache configured by the node's ModelCacheSettings.
+    """
+    from ifc_core import model_cache
+
+    model_cache.set_budget(cache_settings.budget_mb)
+    return model_cache.open_model(path, cache_settings.enabled)
+
+
+def publish_cache_stats(exec_context):
+    """
+    Exposes the model cache statistics as flow variables.
+    """
+    from ifc_core import model_cache
+
+    for key, value in model_cache.stats().items():
+        exec_context.flow_variables[f"ifc_model_cache_{key}"] = value
+
+
+def open_geometry_cache(settings):
+    """
+    GeometryCache configured by the node's GeometryCacheSettings.
+    """
+    from ifc_core.geometry_cache import GeometryCache
+
+    return GeometryCache(settings.directory, settings.max_size_mb, settings.enabled)
+
+
+def open_revision_store(settings):
+    """
+    RevisionStore configured by the node's IncrementalSettings, or None when incremental extraction is off.
+    """
+    if not settings.enabled:
+        return None
+    from ifc_core.revisions import RevisionStore
+
+    return RevisionStore(settings.directory, settings.max_size_mb)
+
+
+def publish_geometry_cache_stats(exec_context, cache):
+    """
+    Exposes the geometry cache statistics as flow variables.
+    """
+    for key, value in cache.stats().items():
+        exec_context.flow_variables[f"ifc_geometry_cache_{key}"] = value
+
+
+def node_metrics(exec_context):
+    """
+    Metrics reporting progress to the node and raising ``metrics.Canceled`` once the user cancels it.
+    """
+    return Metrics(on_progress=exec_context.set_progress, is_canceled=exec_context.is_canceled)
+
+
+def publish_metrics(exec_context, metrics):
+    """
+    Exposes the phase timings and counters as flow variables and logs them.
+    """
+    for key, value in metrics.summary().items():
+        exec_context.flow_variables[f"ifc_metrics_{key}"] = value
+    LOGGER.info(f"Metrics: {metrics}")
+
+
+def publish_space_summary(exec_context, summary_df):
+    """
+    Exposes the per-space summary of IFC Room Points as flow variables: the number of spaces,
+    failed spaces and points, the processing time and ``GlobalID: error`` of every failed space.
+    """
+    failed = summary_df[summary_df["Status"] == "Failed"]
+    exec_context.flow_variables["ifc_space_summary_spaces"] = len(summary_df)
+    exec_context.flow_variables["ifc_space_summary_failed"] = len(failed)
+    exec_context.flow_variables["ifc_space_summary_points"] = int(summary_df["Points"].sum())
+    exec_context.flow_variables["ifc_space_summary_seconds"] = round(float(summary_df["Seconds"].sum()), 3)
+    exec_context.flow_variables["ifc_space_summary_errors"] = "; ".join(
+        f"{guid}: {error}" for guid, error in zip(failed["GlobalID"], failed["Error"])
+    )
+    return len(failed)
+
+
+def map_models(exec_context, func, paths, settings, cache_settings, metrics=None):
+    """
+    Runs ``func(path, use_cache, metrics)`` on every model path with the node's ParallelSettings and
+    returns the successful values in input order. Failed models are logged
+    and reported as a node warning; the node only fails if no model could be read.
+    Progress, cancellation and the metrics of every model go through ``metrics``.
+    """
+    from ifc_core import model_cache, parallel
+
+    paths = list(paths)
+    metrics = metrics or node_metrics(exec_context)
+    done = []
+
+    def on_result(result):
+        done.append(result)
+        if result.ok and settings.workers > 1:
+            metrics.merge(result.value[1])
+        metrics.section()
+        metrics.progress(len(done), len(paths), f"Processed {len(done)} of {len(paths)} models")
+        # The progress reported while reading the next model fills its share of the bar
+        metrics.section(len(done), len(paths))
+
+    metrics.section(0, len(paths))
+    if settings.workers > 1:
+        # Worker processes are short-lived, caching models there would only cost memory
+        # and their metrics travel back with the values
+        func = functools.partial(measured, func, use_cache=False)
+    else:
+        model_cache.set_budget(cache_settings.budget_mb)
+        func = functools.partial(func, use_cache=cache_settings.enabled, metrics=metrics)
+
+    results = parallel.map_ordered(
+        func,
+        paths,
+        workers=settings.workers,
+        memory_limit_mb=settings.memory_limit_mb,
+        on_result=on_result,
+    )
+    publish_cache_stats(exec_context)
+
+    if settings.workers > 1:
+        results = [r._replace(value=r.value[0]) if r.ok else r for r in results]
+    failed = [r for r in results if not r.ok]
+    metrics.count(f"models_{FAILED}", len(failed))
+    for r in failed:
+        LOGGER.warning(f"Failed to process {r.item}: {r.error}")
+    if failed and len(failed) == len(results):
+        raise RuntimeError(f"None of the models could be processed. First error in {failed[0].item}: {failed[0].error}")
+    if failed:
+        exec_context.set_warning(f"{len(failed)} of {len(results)} models could not be processed, see the log for details.")
+
+    metrics.section()
+    return [r.value for r in results if r.ok]
@@ -0,0 +1,28 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "knime_extension", "src"))
+sys.path.insert(0, os.path.join(HERE, "..", "benchmarks"))
+
+
+@pytest.fixture(scope="session")
+def synthetic_model(tmp_path_factory):
+    """
+    Path of a small generated model (see ``benchmarks/synthetic.py``), shared by all tests: do not modify it.
+    """
+    pytest.importorskip("ifcopenshell")
+    from synthetic import write
+
+    return write(str(tmp_path_factory.mktemp("models") / "small.ifc"), storeys=2, spaces=4, walls=10, doors=4)
+
+
+@pytest.fixture
+def model_path(synthetic_model, tmp_path):
+    """
+    Path of a private copy of the synthetic model, which the test may edit.
+    """
+    return shutil.copy(synthetic_model, str(tmp_path / "model.ifc"))
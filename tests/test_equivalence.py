@@ -0,0 +1,189 @@
+"""
+The optimized code paths give the same results as the IfcOpenShell utilities the nodes used before,
+on a small generated model.
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+ifcopenshell = pytest.importorskip("ifcopenshell")
+
+import ifcopenshell.geom  # noqa: E402
+import ifcopenshell.guid  # noqa: E402
+import ifcopenshell.util.element  # noqa: E402
+import ifcopenshell.util.placement  # noqa: E402
+import ifcopenshell.util.shape  # noqa: E402
+import ifcopenshell.util.unit  # noqa: E402
+
+from ifc_core import building, model_cache, reader, solids  # noqa: E402
+from ifc_core.bounds import element_bounds  # noqa: E402
+from ifc_core.geometry_cache import GeometryCache, tessellate_model  # noqa: E402
+from ifc_core.offsets import BOUNDING_BOX, offset_points  # noqa: E402
+from ifc_core.placements import PlacementResolver  # noqa: E402
+
+# Coordinates [m] and [mm] agree to this tolerance
+TOLERANCE = 1e-6
+
+
+@pytest.fixture(scope="module")
+def model(synthetic_model):
+    return ifcopenshell.open(synthetic_model)
+
+
+def _world_settings():
+    settings = ifcopenshell.geom.settings()
+    settings.set("use-world-coords", True)
+    return settings
+
+
+def test_placements_match_get_local_placement(model):
+    resolver = PlacementResolver(model)
+    for plc in model.by_type("IfcLocalPlacement"):
+        np.testing.assert_allclose(resolver.matrix(plc), ifcopenshell.util.placement.get_local_placement(plc),
+                                   atol=TOLERANCE)
+
+
+def test_placements_normalize_direction_ratios():
+    model = ifcopenshell.file(schema="IFC4")
+    point, direction = model.createIfcCartesianPoint, model.createIfcDirection
+    root = model.createIfcLocalPlacement(None, model.createIfcAxis2Placement3D(
+        point((1.0, 2.0, 3.0)), direction((0.0, 0.0, 2.0)), direction((3.0, 0.0, 0.0))))
+    child = model.createIfcLocalPlacement(root, model.createIfcAxis2Placement3D(
+        point((10.0, 0.0, 0.0)), None, direction((0.0, 5.0, 0.0))))
+    resolver = PlacementResolver(model)
+    for plc in (root, child):
+        np.testing.assert_allclose(resolver.matrix(plc), ifcopenshell.util.placement.get_local_placement(plc))
+
+
+def test_mesh_centroids_match_create_shape(model):
+    geometry = tessellate_model(model)
+    settings = _world_settings()
+    centroids = geometry.bbox_centroids()
+    for step_id, centroid in zip(geometry.ids.tolist(), centroids):
+        shape = ifcopenshell.geom.create_shape(settings, model.by_id(step_id))
+        expected = ifcopenshell.util.shape.get_bbox_centroid(shape.geometry)
+        np.testing.assert_allclose(centroid, expected, atol=TOLERANCE)
+
+
+def test_analytic_bounds_match_tessellation(synthetic_model, model):
+    cache = GeometryCache(enabled=False)
+    full = element_bounds(synthetic_model, model, cache)
+    fast = element_bounds(synthetic_model, model, cache, fast=True)
+    assert fast.analytic > 0
+    tessellated = dict(zip(full.ids.tolist(), full.bounds))
+    assert sorted(fast.ids.tolist()) == sorted(tessellated)
+    for step_id, bounds in zip(fast.ids.tolist()[:fast.analytic], fast.bounds[:fast.analytic]):
+        if model.by_id(step_id).is_a("IfcDoor"):
+            # Authored IfcBoundingBox, not necessarily the extent of the body
+            continue
+        np.testing.assert_allclose(bounds, tessellated[step_id], atol=TOLERANCE)
+
+
+def test_door_offsets_match_baseline(synthetic_model, model):
+    # The loop of the original IFC Door Offset XYZ node, for the doors with an IfcBoundingBox
+    expected = {}
+    for door in model.by_type("IfcDoor"):
+        matrix = ifcopenshell.util.placement.get_local_placement(door.ObjectPlacement)
+        axis = matrix[:3, 1] / np.linalg.norm(matrix[:3, 1])
+        for rep in door.Representation.Representations:
+            if rep.RepresentationType != "BoundingBox":
+                continue
+            for item in rep.Items:
+                corner = np.array(item.Corner.Coordinates, dtype=float)
+                center = matrix[:3, :3] @ (corner + np.array([item.XDim, item.YDim, item.ZDim]) / 2.0) + matrix[:3, 3]
+                expected.setdefault(door.GlobalId, []).append((center + 1500.0 * axis, center - 1500.0 * axis))
+    assert expected
+
+    points = offset_points(synthetic_model, model, ("IfcDoor",), 1500.0, GeometryCache(enabled=False))
+    actual = {}
+    for guid, source, positive, negative in zip(points.guids, points.sources, points.positive, points.negative):
+        if source == BOUNDING_BOX:
+            actual.setdefault(guid, []).append((positive, negative))
+    assert sorted(actual) == sorted(expected)
+    for guid, pairs in expected.items():
+        np.testing.assert_allclose(np.array(actual[guid]), np.array(pairs), atol=TOLERANCE)
+
+
+def test_step_scan_matches_full_parser(synthetic_model):
+    scanned = building.read_building(synthetic_model, use_cache=False, fast_scan=True, header=True)
+    parsed = building.read_building(synthetic_model, use_cache=False, fast_scan=False, header=True)
+    assert scanned == parsed
+
+
+def test_step_scan_picks_building_of_by_type(tmp_path):
+    # Two buildings whose records are written in reverse order of their step ids
+    model = ifcopenshell.file(schema="IFC4")
+    for name in ("First", "Second"):
+        pset = model.createIfcPropertySet(ifcopenshell.guid.new(), None, "Pset_Test", None, [
+            model.createIfcPropertySingleValue("Reference", None, model.createIfcLabel(name), None),
+        ])
+        model.createIfcRelDefinesByProperties(
+            ifcopenshell.guid.new(), None, None, None, [model.createIfcBuilding(ifcopenshell.guid.new(), None, name)], pset
+        )
+    lines = model.to_string().splitlines()
+    buildings = [n for n, line in enumerate(lines) if "=IFCBUILDING(" in line]
+    lines[buildings[0]], lines[buildings[-1]] = lines[buildings[-1]], lines[buildings[0]]
+    path = tmp_path / "buildings.ifc"
+    path.write_text("\n".join(lines))
+
+    scanned = building.read_building(str(path), use_cache=False, fast_scan=True)
+    parsed = building.read_building(str(path), use_cache=False, fast_scan=False)
+    assert scanned == parsed
+    assert scanned["Reference"] == "First"
+
+
+def test_cached_model_skips_scan(model_path, monkeypatch):
+    model_cache.CACHE.open(model_path)
+
+    def scan(path):
+        raise AssertionError("The file was scanned although its model is cached.")
+
+    monkeypatch.setattr(building.step_scan, "scan_building", scan)
+    assert building.read_building(model_path, fast_scan=True)
+
+
+def test_adaptive_grid_matches_uniform(model):
+    settings = _world_settings()
+    for space in model.by_type("IfcSpace"):
+        vertices, faces = solids.tessellate(space, settings)
+        uniform = solids.grid_points(vertices, faces, 0.3, 0.1, adaptive=False)
+        adaptive = solids.grid_points(vertices, faces, 0.3, 0.1, adaptive=True)
+        assert len(uniform)
+        np.testing.assert_array_equal(np.unique(adaptive, axis=0), np.unique(uniform, axis=0))
+
+
+def _baseline_rows(model) -> dict:
+    """
+    Type, name, tag, property and placement values per GlobalId as the original IFC Reader read them.
+    """
+    rows = {}
+    for storey in model.by_type("IfcBuildingStorey"):
+        for elem in ifcopenshell.util.element.get_decomposition(storey):
+            row = {"ifcType": elem.is_a(), "ifcElementType": ifcopenshell.util.element.get_type(elem)}
+            if elem.Name:
+                row["ElementName"] = elem.Name.split(":")[1] if ":" in elem.Name else elem.Name
+            for values in ifcopenshell.util.element.get_psets(elem).values():
+                row.update(values)
+            if getattr(elem, "Tag", None):
+                row["Tag"] = elem.Tag
+            matrix = ifcopenshell.util.placement.get_local_placement(elem.ObjectPlacement)
+            row["Global X"], row["Global Y"], row["Global Z"] = matrix[:3, 3]
+            rows[elem.GlobalId] = row
+    return rows
+
+
+def test_typed_columns_match_baseline_strings(synthetic_model, model):
+    table = reader.read_model(synthetic_model, use_cache=False)
+    assert table.schema.field("ifcType").type.value_type == "string"
+    # Read from Arrow: pandas would turn sparse integer columns into floats
+    typed = {row["UniqueID"]: row for row in table.to_pylist()}
+    baseline = _baseline_rows(model)
+    assert sorted(typed) == sorted(baseline)
+
+    for guid, row in baseline.items():
+        for column, value in row.items():
+            actual = typed[guid][column]
+            if isinstance(value, float):
+                assert actual == pytest.approx(value, abs=TOLERANCE), (guid, column)
+            else:
+                # The baseline converted every value to a string
+                assert str(actual) == str(value), (guid, column)
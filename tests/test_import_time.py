@@ -0,0 +1,29 @@
+"""
+Registering the extension must stay cheap: importing the extension module or a
+node module must not load the packages the nodes only need once they execute.
+Every import runs in a fresh process (see ``benchmarks/import_time.py``).
+"""
+import glob
+import os
+
+import pytest
+
+from import_time import HEAVY_MODULES, SRC, probe
+
+pytest.importorskip("knime.extension", reason="needs the KNIME Python environment")
+
+BUDGET_MS = 200.0
+RUNS = 3
+
+NODE_MODULES = sorted(
+    f"nodes.{os.path.splitext(os.path.basename(path))[0]}"
+    for path in glob.glob(os.path.join(SRC, "nodes", "*.py"))
+)
+
+
+@pytest.mark.parametrize("module", ["cvp_app_knime_bim"] + NODE_MODULES)
+def test_import_is_light(module):
+    runs = [probe(module, "knime_extension") for _ in range(RUNS)]
+    best = min(runs, key=lambda run: run["seconds"])
+    assert not set(HEAVY_MODULES).intersection(best["loaded"])
+    assert best["seconds"] * 1000 <= BUDGET_MS
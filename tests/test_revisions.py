@@ -0,0 +1,111 @@
+"""
+Incremental re-extraction: change flags, and merged rows equal to a full extraction of the new revision.
+"""
+import pytest
+
+pd = pytest.importorskip("pandas")
+ifcopenshell = pytest.importorskip("ifcopenshell")
+
+import ifcopenshell.api.root  # noqa: E402
+import ifcopenshell.guid  # noqa: E402
+import ifcopenshell.util.element  # noqa: E402
+
+from ifc_core import reader  # noqa: E402
+from ifc_core.geometry_cache import GeometryCache  # noqa: E402
+from ifc_core.revisions import ADDED, CHANGE_COLUMN, DELETED, MODIFIED, UNCHANGED, RevisionStore  # noqa: E402
+from ifc_core.tables import centroid_table, incremental_centroid_table  # noqa: E402
+
+
+def _edit(path: str, edit) -> dict:
+    """
+    Applies ``edit(model)`` to the model at ``path`` and saves it; returns what ``edit`` returns.
+    """
+    model = ifcopenshell.open(path)
+    changed = edit(model)
+    model.write(path)
+    return changed
+
+
+def _move_rename_delete(model) -> dict:
+    walls, doors = model.by_type("IfcWall"), model.by_type("IfcDoor")
+    moved, renamed, deleted = walls[0], walls[1], doors[0]
+    location = moved.ObjectPlacement.RelativePlacement.Location
+    x, y, z = location.Coordinates
+    location.Coordinates = (x + 500.0, y, z)
+    renamed.Name = "Renamed wall"
+    guids = {"moved": moved.GlobalId, "renamed": renamed.GlobalId, "deleted": deleted.GlobalId}
+    ifcopenshell.api.root.remove_product(model, product=deleted)
+    return guids
+
+
+def _classify_wall_type(model) -> set:
+    wall_type = model.by_type("IfcWallType")[0]
+    reference = model.createIfcClassificationReference(Identification="EF_25_10", Name="Walls")
+    model.createIfcRelAssociatesClassification(ifcopenshell.guid.new(), None, None, None, [wall_type], reference)
+    return {wall.GlobalId for wall in model.by_type("IfcWall") if ifcopenshell.util.element.get_type(wall) == wall_type}
+
+
+def _current_rows(table: pd.DataFrame) -> pd.DataFrame:
+    rows = table[table[CHANGE_COLUMN] != DELETED].drop(columns=CHANGE_COLUMN)
+    return rows.reset_index(drop=True)
+
+
+def _flags(table: pd.DataFrame, guid_column: str) -> dict:
+    return dict(zip(table[guid_column], table[CHANGE_COLUMN]))
+
+
+def test_reader_flags_and_rows(model_path, tmp_path):
+    store = RevisionStore(str(tmp_path / "revisions"))
+    first = reader.read_model(model_path, use_cache=False, revisions=store).to_pandas()
+    assert set(first[CHANGE_COLUMN]) == {ADDED}
+    again = reader.read_model(model_path, use_cache=False, revisions=store).to_pandas()
+    assert set(again[CHANGE_COLUMN]) == {UNCHANGED}
+
+    changed = _edit(model_path, _move_rename_delete)
+    table = reader.read_model(model_path, use_cache=False, revisions=store).to_pandas()
+    flags = _flags(table, "UniqueID")
+    assert flags[changed["moved"]] == MODIFIED
+    assert flags[changed["renamed"]] == MODIFIED
+    assert flags[changed["deleted"]] == DELETED
+    assert {flag for guid, flag in flags.items() if guid not in changed.values()} == {UNCHANGED}
+
+    full = reader.read_model(model_path, use_cache=False).to_pandas()
+    pd.testing.assert_frame_equal(_current_rows(table)[list(full.columns)], full)
+
+
+def test_reader_type_association_modifies_occurrences(model_path, tmp_path):
+    store = RevisionStore(str(tmp_path / "revisions"))
+    reader.read_model(model_path, use_cache=False, revisions=store)
+
+    typed_walls = _edit(model_path, _classify_wall_type)
+    assert typed_walls
+    table = reader.read_model(model_path, use_cache=False, revisions=store).to_pandas()
+    flags = _flags(table, "UniqueID")
+    assert {flags[guid] for guid in typed_walls} == {MODIFIED}
+
+    full = reader.read_model(model_path, use_cache=False).to_pandas()
+    pd.testing.assert_frame_equal(_current_rows(table)[list(full.columns)], full)
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_incremental_centroids(model_path, tmp_path, fast):
+    store = RevisionStore(str(tmp_path / "revisions"))
+    geometry_cache = GeometryCache(str(tmp_path / "geometry"))
+
+    def run():
+        return incremental_centroid_table(model_path, lambda: ifcopenshell.open(model_path), geometry_cache,
+                                          store, fast=fast)
+
+    assert set(run()[CHANGE_COLUMN]) == {ADDED}
+    changed = _edit(model_path, _move_rename_delete)
+    table = run()
+    flags = _flags(table, "GlobalID")
+    assert flags[changed["moved"]] == MODIFIED
+    assert flags[changed["renamed"]] == MODIFIED
+    assert flags[changed["deleted"]] == DELETED
+
+    # A full run lists the elements in the order of the geometry iterator
+    full = centroid_table(model_path, ifcopenshell.open(model_path), GeometryCache(enabled=False), fast=fast)
+    merged = _current_rows(table)[list(full.columns)].sort_values("GlobalID", ignore_index=True)
+    pd.testing.assert_frame_equal(merged, full.sort_values("GlobalID", ignore_index=True),
+                                  check_exact=False, atol=1e-6)
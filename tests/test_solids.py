@@ -0,0 +1,49 @@
+"""
+Point containment of ``solids`` and ``rooms.RoomTree`` on the boundary of rooms.
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("ifcopenshell")
+
+from ifc_core import solids  # noqa: E402
+from ifc_core.geometry_cache import GeometrySet  # noqa: E402
+from ifc_core.rooms import RoomTree  # noqa: E402
+
+# Unit cube [0,1]^3 as 12 outward-facing triangles
+CUBE_VERTICES = np.array([[x, y, z] for x in (0.0, 1.0) for y in (0.0, 1.0) for z in (0.0, 1.0)])
+CUBE_FACES = np.array([
+    [0, 1, 3], [0, 3, 2], [4, 6, 7], [4, 7, 5],  # x = 0, x = 1
+    [0, 4, 5], [0, 5, 1], [2, 3, 7], [2, 7, 6],  # y = 0, y = 1
+    [0, 2, 6], [0, 6, 4], [1, 5, 7], [1, 7, 3],  # z = 0, z = 1
+])
+
+
+def _two_rooms() -> GeometrySet:
+    """
+    Two unit cubes side by side along X, sharing the face x = 1.
+    """
+    matrices = np.stack([np.eye(4), np.eye(4)])
+    matrices[1, 0, 3] = 1.0
+    return GeometrySet(
+        ids=np.array([10, 20]),
+        guids=np.array(["room-a", "room-b"], dtype="U22"),
+        vertex_offsets=np.array([0, 8, 16]),
+        face_offsets=np.array([0, 12, 24]),
+        vertices=np.concatenate([CUBE_VERTICES, CUBE_VERTICES]),
+        faces=np.concatenate([CUBE_FACES, CUBE_FACES]),
+        matrices=matrices,
+        bounds=np.array([[0.0, 0.0, 0.0, 1.0, 1.0, 1.0], [1.0, 0.0, 0.0, 2.0, 1.0, 1.0]]),
+    )
+
+
+def test_contains_point_on_face_with_tolerance():
+    triangles = CUBE_VERTICES[CUBE_FACES]
+    points = np.array([[0.5, 0.5, 0.5], [1.0, 0.5, 0.5], [1.0, 1.0, 1.0], [1.01, 0.5, 0.5]])
+    assert solids.contains(points, triangles, tolerance=1e-6).tolist() == [True, True, True, False]
+
+
+def test_room_tree_point_on_shared_face_is_in_both_rooms():
+    tree = RoomTree(_two_rooms())
+    matches = tree.select(np.array([[1.0, 0.5, 0.5], [0.5, 0.5, 0.5], [1.5, 0.5, 0.5], [3.0, 0.5, 0.5]]))
+    assert matches == [[10, 20], [10], [20], []]